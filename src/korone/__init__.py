@@ -6,10 +6,10 @@ from aiogram.enums import ParseMode
 from aiogram.fsm.storage.base import DefaultKeyBuilder
 from aiogram.fsm.storage.redis import RedisEventIsolation, RedisStorage
 from aiogram.types import LinkPreviewOptions
-from redis.asyncio import Redis
 
 from .config import CONFIG
 from .logger import get_logger
+from .utils.redis_pool import create_redis_client
 
 logger = get_logger(__name__)
 
@@ -22,8 +22,12 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML, link_preview=LinkPreviewOptions(is_disabled=True)),
     session=session,
 )
-aredis = Redis(host=CONFIG.redis_host, port=CONFIG.redis_port, db=CONFIG.redis_db_states, single_connection_client=True)
-fsm_redis = Redis(host=CONFIG.redis_host, port=CONFIG.redis_port, db=CONFIG.redis_db_fsm, single_connection_client=True)
+aredis = create_redis_client("states", db=CONFIG.redis_db_states, max_connections=CONFIG.redis_max_connections)
+# Media processing locks get their own pool so lock renewal never queues behind bulk cache traffic.
+media_lock_redis = create_redis_client(
+    "media-locks", db=CONFIG.redis_db_states, max_connections=CONFIG.redis_media_lock_max_connections
+)
+fsm_redis = create_redis_client("fsm", db=CONFIG.redis_db_fsm, max_connections=CONFIG.redis_fsm_max_connections)
 fsm_key_builder = DefaultKeyBuilder(prefix=CONFIG.redis_fsm_key_prefix, with_bot_id=True)
 storage = RedisStorage(
     redis=fsm_redis,
@@ -38,4 +42,4 @@ events_isolation = RedisEventIsolation(
 )
 dp = Dispatcher(storage=storage, events_isolation=events_isolation)
 
-__all__ = ("aredis", "bot", "dp", "fsm_redis")
+__all__ = ("aredis", "bot", "dp", "fsm_redis", "media_lock_redis")
@@ -13,8 +13,9 @@ from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from korone.args.middleware import ArgumentsMiddleware
 from korone.modules.error.utils.ignored import IGNORED_EXCEPTIONS
 
-from . import aredis, bot, dp
+from . import aredis, bot, dp, media_lock_redis
 from .config import CONFIG
+from .db.last_saw import last_saw_buffer
 from .db.repositories.chat import ChatRepository
 from .db.utils import close_db, init_db, migrate_db_if_needed
 from .logger import get_logger, setup_logging
@@ -25,8 +26,11 @@ from .middlewares.disabling import DisablingMiddleware
 from .middlewares.save_chats import SAVE_CHATS_REQUIRED_UPDATE_TYPES, SaveChatsMiddleware
 from .modules import LOADED_MODULES, load_modules
 from .modules.help.utils.commands import sync_bot_commands
+from .modules.medias.utils.platforms.reddit.anubis import ProofOfWorkPool
 from .utils.aiohttp_session import HTTPClient
+from .utils.cached import close_local_cache, start_local_cache
 from .utils.i18n import i18n
+from .utils.image_pool import ImagePool
 
 logger = get_logger(__name__)
 
@@ -74,6 +78,7 @@ async def prepare_runtime() -> list[str]:
         )
 
     await init_db()
+    start_local_cache()
     await migrate_db_if_needed()
     await ensure_bot_in_db()
     await load_modules(dp, CONFIG.modules_load, CONFIG.modules_not_load)
@@ -92,12 +97,17 @@ async def drop_pending_updates() -> None:
 async def shutdown(*, close_bot_session: bool = True) -> None:
     await logger.ainfo("Shutting down the bot...")
     await drop_pending_updates()
+    await last_saw_buffer.shutdown()
     await close_db()
     await HTTPClient.close()
+    await ImagePool.close()
+    await ProofOfWorkPool.close()
     if close_bot_session:
         await bot.session.close()
     await dp.storage.close()
+    await close_local_cache()
     await aredis.aclose(close_connection_pool=True)
+    await media_lock_redis.aclose(close_connection_pool=True)
 
 
 async def run_polling() -> None:
@@ -15,4 +15,10 @@ CACHE_DEFAULT_TTL_SECONDS: Final[int] = 1800  # 30 minutes
 
 CACHE_ADMIN_TTL_SECONDS: Final[int] = 7200  # 2 hours
 
+CACHE_CHAT_SETTINGS_TTL_SECONDS: Final[int] = 600  # 10 minutes
+CACHE_CHAT_SETTINGS_LOCAL_TTL_SECONDS: Final[int] = 60  # 1 minute
+
 CACHE_FILE_ID_TTL_SECONDS: Final[int] = 2678400  # 31 days
+
+CACHE_MEDIA_POST_METADATA_TTL_SECONDS: Final[int] = 600  # 10 minutes
+CACHE_MEDIA_SHORT_LINK_TTL_SECONDS: Final[int] = 604800  # 7 days
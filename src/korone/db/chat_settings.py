@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import func, select
+
+from korone.constants import CACHE_CHAT_SETTINGS_LOCAL_TTL_SECONDS, CACHE_CHAT_SETTINGS_TTL_SECONDS
+from korone.db.models.chat import ChatModel
+from korone.db.models.chat_admin import ChatAdminModel
+from korone.db.models.disabling import DisablingModel
+from korone.db.session import session_scope
+from korone.utils.cached import Cached, JsonValue
+
+
+@dataclass(frozen=True, slots=True)
+class ChatSettings:
+    """Per-chat settings read on the hot path, loaded with a single query and cached."""
+
+    chat_id: int
+    disabled: tuple[str, ...]
+    language_code: str | None
+    admins_updated_at: datetime | None
+
+    def is_disabled(self, name: str) -> bool:
+        return name in self.disabled
+
+    def admin_cache_age(self) -> float | None:
+        if self.admins_updated_at is None:
+            return None
+        return (datetime.now(UTC) - self.admins_updated_at).total_seconds()
+
+
+def _settings_version_key(chat_id: int) -> str:
+    return f"chat-settings:version:{chat_id}"
+
+
+# Versioned, so a snapshot loaded just before a settings change commits is not written back after its invalidation.
+_settings_cache: Cached[[int], dict[str, JsonValue]] = Cached(
+    ttl=CACHE_CHAT_SETTINGS_TTL_SECONDS,
+    key="chat-settings",
+    local_ttl=CACHE_CHAT_SETTINGS_LOCAL_TTL_SECONDS,
+    version_key=_settings_version_key,
+)
+
+
+@_settings_cache
+async def _fetch_snapshot(chat_id: int) -> dict[str, JsonValue]:
+    stmt = select(
+        select(ChatModel.language_code).where(ChatModel.chat_id == chat_id).scalar_subquery(),
+        select(DisablingModel.cmds).where(DisablingModel.chat_id == chat_id).scalar_subquery(),
+        select(func.min(ChatAdminModel.last_updated))
+        .join(ChatModel, ChatAdminModel.chat_id == ChatModel.id)
+        .where(ChatModel.chat_id == chat_id)
+        .scalar_subquery(),
+    )
+    async with session_scope() as session:
+        language_code, cmds, admins_updated_at = (await session.execute(stmt)).one()
+
+    return {
+        "disabled": list(cmds or []),
+        "language_code": language_code,
+        "admins_updated_at": admins_updated_at.timestamp() if admins_updated_at else None,
+    }
+
+
+async def get_chat_settings(chat_id: int) -> ChatSettings:
+    snapshot = await _fetch_snapshot(chat_id)
+    disabled = snapshot.get("disabled")
+    language_code = snapshot.get("language_code")
+    admins_updated_at = snapshot.get("admins_updated_at")
+    return ChatSettings(
+        chat_id=chat_id,
+        disabled=tuple(cmd for cmd in disabled if isinstance(cmd, str)) if isinstance(disabled, list) else (),
+        language_code=language_code if isinstance(language_code, str) else None,
+        admins_updated_at=(
+            datetime.fromtimestamp(admins_updated_at, UTC) if isinstance(admins_updated_at, int | float) else None
+        ),
+    )
+
+
+async def invalidate_chat_settings(chat_id: int) -> None:
+    await _settings_cache.reset_cache(chat_id)
@@ -16,7 +16,7 @@ def get_engine() -> AsyncEngine:
         pool_pre_ping=True,
         pool_use_lifo=True,
         pool_recycle=1800,
-        pool_size=5,
-        max_overflow=10,
+        pool_size=CONFIG.db_pool_size,
+        max_overflow=CONFIG.db_max_overflow,
         pool_timeout=30,
     )
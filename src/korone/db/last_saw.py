@@ -0,0 +1,155 @@
+import asyncio
+from itertools import batched
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, DateTime, column, func, update, values
+from sqlalchemy.exc import SQLAlchemyError
+
+from korone.config import CONFIG
+from korone.db.models.chat import ChatModel, UserInGroupModel
+from korone.db.session import session_scope
+from korone.logger import get_logger
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+logger = get_logger(__name__)
+
+
+class LastSawBuffer:
+    """Coalesce `last_saw` bumps in memory and write them in periodic bulk updates.
+
+    Chats are keyed by Telegram `chat_id`, memberships by the `(user_id, group_id)` primary keys stored in
+    `users_in_groups`. Only the newest timestamp per key is kept, and the SQL uses `GREATEST` so a late flush
+    never moves a row back in time.
+    """
+
+    def __init__(self, *, flush_interval: float, batch_size: int) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._chats: dict[int, datetime] = {}
+        self._memberships: dict[tuple[int, int], datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._chats) + len(self._memberships)
+
+    def touch_chat(self, chat_id: int, seen_at: datetime) -> None:
+        self._merge(self._chats, chat_id, seen_at)
+        self._schedule()
+
+    def touch_membership(self, user_id: int, group_id: int, seen_at: datetime) -> None:
+        self._merge(self._memberships, (user_id, group_id), seen_at)
+        self._schedule()
+
+    @staticmethod
+    def _merge[K](pending: dict[K, datetime], key: K, seen_at: datetime) -> None:
+        if (current := pending.get(key)) is None or seen_at > current:
+            pending[key] = seen_at
+
+    def _schedule(self) -> None:
+        if self.pending >= self.batch_size:
+            self._wakeup.set()
+
+        if self._closed or (self._task is not None and not self._task.done()):
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run(), name="last-saw-flush")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            chats, self._chats = self._chats, {}
+            memberships, self._memberships = self._memberships, {}
+            if not chats and not memberships:
+                return
+
+            chat_count, membership_count = len(chats), len(memberships)
+            try:
+                for chunk in batched(sorted(chats.items()), self.batch_size, strict=False):
+                    await self._flush_chats(chunk)
+                    for chat_id, _seen_at in chunk:
+                        del chats[chat_id]
+                for chunk in batched(sorted(memberships.items()), self.batch_size, strict=False):
+                    await self._flush_memberships(chunk)
+                    for key, _seen_at in chunk:
+                        del memberships[key]
+            except (SQLAlchemyError, OSError) as error:
+                self._restore(chats, memberships)
+                await logger.awarning("LastSawBuffer: flush failed", pending=self.pending, error=str(error))
+                return
+            except BaseException:
+                # Cancelled mid-flush (e.g. by `shutdown`): the final flush must still see the unwritten rows.
+                self._restore(chats, memberships)
+                raise
+
+            await logger.adebug("LastSawBuffer: flushed", chats=chat_count, memberships=membership_count)
+
+    def _restore(self, chats: dict[int, datetime], memberships: dict[tuple[int, int], datetime]) -> None:
+        # Put back whatever was not written so the next flush retries it. Rewriting a chunk that did commit is
+        # harmless, as the update only ever moves `last_saw` forward.
+        for chat_id, seen_at in chats.items():
+            self._merge(self._chats, chat_id, seen_at)
+        for key, seen_at in memberships.items():
+            self._merge(self._memberships, key, seen_at)
+
+    @staticmethod
+    async def _flush_chats(rows: tuple[tuple[int, datetime], ...]) -> None:
+        incoming = values(
+            column("chat_id", BigInteger), column("last_saw", DateTime(timezone=True)), name="incoming"
+        ).data(list(rows))
+        stmt = (
+            update(ChatModel)
+            .where(ChatModel.chat_id == incoming.c.chat_id)
+            .values(last_saw=func.greatest(ChatModel.last_saw, incoming.c.last_saw))
+            .execution_options(synchronize_session=False)
+        )
+        async with session_scope() as session:
+            await session.execute(stmt)
+
+    @staticmethod
+    async def _flush_memberships(rows: tuple[tuple[tuple[int, int], datetime], ...]) -> None:
+        incoming = values(
+            column("user_id", BigInteger),
+            column("group_id", BigInteger),
+            column("last_saw", DateTime(timezone=True)),
+            name="incoming",
+        ).data([(user_id, group_id, seen_at) for (user_id, group_id), seen_at in rows])
+        stmt = (
+            update(UserInGroupModel)
+            .where(UserInGroupModel.user_id == incoming.c.user_id, UserInGroupModel.group_id == incoming.c.group_id)
+            .values(last_saw=func.greatest(UserInGroupModel.last_saw, incoming.c.last_saw))
+            .execution_options(synchronize_session=False)
+        )
+        async with session_scope() as session:
+            await session.execute(stmt)
+
+    async def shutdown(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+last_saw_buffer = LastSawBuffer(
+    flush_interval=CONFIG.db_last_saw_flush_interval, batch_size=CONFIG.db_last_saw_batch_size
+)
@@ -1,4 +1,4 @@
-from korone.db.repositories.chat import ChatRepository, ChatTopicRepository, UserInGroupRepository
+from korone.db.repositories.chat import ChatRepository, ChatTopicRepository, ChatUnitOfWork, UserInGroupRepository
 from korone.db.repositories.chat_admin import ChatAdminRepository
 from korone.db.repositories.disabling import DisablingRepository
 from korone.db.repositories.language import LanguageRepository
@@ -9,6 +9,7 @@ __all__ = (
     "ChatAdminRepository",
     "ChatRepository",
     "ChatTopicRepository",
+    "ChatUnitOfWork",
     "DisablingRepository",
     "LanguageRepository",
     "LastFMRepository",
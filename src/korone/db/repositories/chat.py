@@ -1,17 +1,22 @@
-import asyncio
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING, TypedDict
 
 from aiogram.enums import ChatType
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select, tuple_, union_all
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from korone.db.base import get_one
+from korone.db.last_saw import last_saw_buffer
 from korone.db.models.chat import ChatModel, ChatTopicModel, UserInGroupModel
 from korone.db.session import session_scope
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
     from aiogram.types import Chat, User
+    from sqlalchemy import ColumnElement, CompoundSelect, FromClause
+    from sqlalchemy.dialects.postgresql import Insert
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class ChatData(TypedDict):
@@ -23,22 +28,58 @@ class ChatData(TypedDict):
     last_saw: datetime
 
 
+# Columns an upsert actually rewrites; `last_saw` goes through the write-behind buffer instead.
+_CHAT_PROFILE_COLUMNS: tuple[str, ...] = ("type", "first_name_or_title", "last_name", "username", "is_bot")
+
+
+def _returning_all(
+    upsert: Insert, table: FromClause, keys: tuple[str, ...], wanted: ColumnElement[bool]
+) -> CompoundSelect:
+    """Make `upsert` return the rows its conflict clause skipped as well, within the same statement.
+
+    The upsert runs as a CTE whose rows are unioned with the `wanted` rows it left alone. The outer select
+    still sees the table as it was before the upsert, hence rows the upsert returned are excluded from it.
+    """
+    upserted = upsert.returning(*table.c).cte("upserted")
+    key = tuple_(*(table.c[name] for name in keys))
+    skipped = select(*table.c).where(wanted, key.not_in(select(*(upserted.c[name] for name in keys))))
+    return union_all(select(*upserted.c), skipped)
+
+
 class UserInGroupRepository:
     @staticmethod
     async def ensure_user_in_group(user: ChatModel, group: ChatModel) -> UserInGroupModel:
-        now = datetime.now(UTC)
         async with session_scope() as session:
-            if model := await get_one(
-                session, UserInGroupModel, UserInGroupModel.user_id == user.id, UserInGroupModel.group_id == group.id
-            ):
-                model.last_saw = now
-                return model
-
-            model = UserInGroupModel(user_id=user.id, group_id=group.id, last_saw=now)
-            session.add(model)
-            await session.flush()
+            (model,) = await UserInGroupRepository._upsert_many(session, [(user.id, group.id)])
             return model
 
+    @staticmethod
+    async def _upsert_many(session: AsyncSession, pairs: list[tuple[int, int]]) -> list[UserInGroupModel]:
+        now = datetime.now(UTC)
+        pair_key = tuple_(UserInGroupModel.user_id, UserInGroupModel.group_id)
+        stmt = _returning_all(
+            pg_insert(UserInGroupModel)
+            .values([
+                {"user_id": user_id, "group_id": group_id, "last_saw": now} for user_id, group_id in sorted(pairs)
+            ])
+            .on_conflict_do_nothing(constraint="ux_users_in_groups_user_group"),
+            UserInGroupModel.__table__,
+            ("user_id", "group_id"),
+            pair_key.in_(pairs),
+        )
+        result = await session.scalars(select(UserInGroupModel).from_statement(stmt))
+        models = {(model.user_id, model.group_id): model for model in result}
+
+        # A row committed by a concurrent insert after this statement started is in neither half of the union.
+        if missing := [pair for pair in pairs if pair not in models]:
+            result = await session.scalars(select(UserInGroupModel).where(pair_key.in_(missing)))
+            models.update(((model.user_id, model.group_id), model) for model in result)
+
+        for user_id, group_id in pairs:
+            last_saw_buffer.touch_membership(user_id, group_id, now)
+
+        return list(models.values())
+
     @staticmethod
     async def remove_user_in_chat(user_id: int, group_id: int) -> UserInGroupModel | None:
         async with session_scope() as session:
@@ -97,10 +138,21 @@ class ChatTopicRepository:
             await session.flush()
             return model
 
+    @staticmethod
+    async def _upsert_many(session: AsyncSession, topics: Mapping[tuple[int, int], str | None]) -> list[ChatTopicModel]:
+        stmt = pg_insert(ChatTopicModel).values([
+            {"group_id": group_id, "thread_id": thread_id, "name": name}
+            for (group_id, thread_id), name in sorted(topics.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="ux_chat_topics_group_thread",
+            set_={"name": func.coalesce(stmt.excluded.name, ChatTopicModel.name)},
+        ).returning(ChatTopicModel)
+        result = await session.scalars(stmt, execution_options={"populate_existing": True})
+        return list(result.all())
 
-class ChatRepository:
-    _upsert_lock: asyncio.Lock = asyncio.Lock()
 
+class ChatRepository:
     @staticmethod
     def _user_data(user: User) -> ChatData:
         return {
@@ -145,20 +197,74 @@ class ChatRepository:
 
     @classmethod
     async def _upsert(cls, chat_id: int, data: ChatData) -> ChatModel:
-        async with cls._upsert_lock, session_scope() as session:
-            stmt = (
-                pg_insert(ChatModel)
-                .values(chat_id=chat_id, **data)
-                .on_conflict_do_update(index_elements=[ChatModel.chat_id], set_=dict(data))
-                .returning(ChatModel.id)
-            )
-            model_id = (await session.execute(stmt)).scalar_one()
-            model = await session.get(ChatModel, model_id)
-            if model is None:
-                msg = f"Upsert for chat_id={chat_id} did not return a chat model"
-                raise RuntimeError(msg)
+        # The upsert is atomic on its own, so concurrent updates need no lock.
+        async with session_scope() as session:
+            (model,) = await cls._upsert_many(session, {chat_id: data})
             return model
 
+    @staticmethod
+    async def _upsert_many(session: AsyncSession, chats: Mapping[int, ChatData]) -> list[ChatModel]:
+        # Sorted rows keep the lock order stable between concurrent batches touching the same chats.
+        stmt = pg_insert(ChatModel).values([{"chat_id": chat_id, **data} for chat_id, data in sorted(chats.items())])
+        stmt = _returning_all(
+            stmt.on_conflict_do_update(
+                index_elements=[ChatModel.chat_id],
+                set_={column: stmt.excluded[column] for column in _CHAT_PROFILE_COLUMNS},
+                where=or_(
+                    *(
+                        getattr(ChatModel, column).is_distinct_from(stmt.excluded[column])
+                        for column in _CHAT_PROFILE_COLUMNS
+                    )
+                ),
+            ),
+            ChatModel.__table__,
+            ("chat_id",),
+            ChatModel.chat_id.in_(chats),
+        )
+        result = await session.scalars(
+            select(ChatModel).from_statement(stmt), execution_options={"populate_existing": True}
+        )
+        models = {model.chat_id: model for model in result}
+
+        # A row committed by a concurrent insert after this statement started is in neither half of the union.
+        if missing := [chat_id for chat_id in chats if chat_id not in models]:
+            result = await session.scalars(select(ChatModel).where(ChatModel.chat_id.in_(missing)))
+            models.update((model.chat_id, model) for model in result)
+
+        for chat_id, data in chats.items():
+            last_saw_buffer.touch_chat(chat_id, data["last_saw"])
+
+        return list(models.values())
+
+    @classmethod
+    async def ensure_users(cls, session: AsyncSession, users: Iterable[User]) -> dict[int, int]:
+        """Insert missing users in one statement and map every Telegram user id to its row id.
+
+        Existing rows are left untouched, so neither their profile nor `last_saw` changes here.
+        """
+        users_by_id = {user.id: user for user in users}
+        if not users_by_id:
+            return {}
+
+        rows = _returning_all(
+            pg_insert(ChatModel)
+            .values([{"chat_id": user_id, **cls._user_data(user)} for user_id, user in sorted(users_by_id.items())])
+            .on_conflict_do_nothing(index_elements=[ChatModel.chat_id]),
+            ChatModel.__table__,
+            ("chat_id",),
+            ChatModel.chat_id.in_(users_by_id),
+        ).subquery()
+        ids: dict[int, int] = dict((await session.execute(select(rows.c.chat_id, rows.c.id))).tuples().all())
+
+        # A row committed by a concurrent insert after this statement started is in neither half of the union.
+        if missing := [user_id for user_id in users_by_id if user_id not in ids]:
+            result = await session.execute(
+                select(ChatModel.chat_id, ChatModel.id).where(ChatModel.chat_id.in_(missing))
+            )
+            ids.update(result.tuples().all())
+
+        return ids
+
     @staticmethod
     async def do_chat_migrate(old_id: int, new_chat: Chat) -> ChatModel | None:
         async with session_scope() as session:
@@ -229,3 +335,68 @@ class ChatRepository:
                 return user
         msg = "User not found"
         raise LookupError(msg)
+
+
+class ChatUnitOfWork:
+    """Collect chat, membership and topic upserts of one update and write them in a single transaction.
+
+    Entities are staged by Telegram ID and resolved to their database models after `flush()`.
+    """
+
+    def __init__(self) -> None:
+        self._chats: dict[int, ChatData] = {}
+        self._memberships: set[tuple[int, int]] = set()
+        self._topics: dict[tuple[int, int], str | None] = {}
+        self._chat_models: dict[int, ChatModel] = {}
+        self._membership_models: dict[tuple[int, int], UserInGroupModel] = {}
+
+    def upsert_user(self, user: User) -> None:
+        self._chats[user.id] = ChatRepository._user_data(user)
+
+    def upsert_group(self, chat: Chat) -> None:
+        self._chats[chat.id] = ChatRepository._group_data(chat)
+
+    def ensure_user_in_group(self, user_id: int, group_id: int) -> None:
+        self._memberships.add((user_id, group_id))
+
+    def ensure_topic(self, group_id: int, thread_id: int, topic_name: str | None) -> None:
+        key = (group_id, thread_id)
+        self._topics[key] = topic_name or self._topics.get(key)
+
+    async def flush(self) -> None:
+        if not self._chats:
+            return
+
+        async with session_scope() as session:
+            chats = await ChatRepository._upsert_many(session, self._chats)
+            self._chat_models.update((model.chat_id, model) for model in chats)
+            by_pk = {model.id: model.chat_id for model in chats}
+
+            if memberships := [
+                (self._chat_models[user_id].id, self._chat_models[group_id].id)
+                for user_id, group_id in self._memberships
+            ]:
+                for model in await UserInGroupRepository._upsert_many(session, memberships):
+                    self._membership_models[by_pk[model.user_id], by_pk[model.group_id]] = model
+
+            if topics := {
+                (self._chat_models[group_id].id, thread_id): name
+                for (group_id, thread_id), name in self._topics.items()
+            }:
+                await ChatTopicRepository._upsert_many(session, topics)
+
+        self._chats.clear()
+        self._memberships.clear()
+        self._topics.clear()
+
+    def chat(self, chat_id: int) -> ChatModel:
+        if model := self._chat_models.get(chat_id):
+            return model
+        msg = f"Chat {chat_id} was not flushed by this unit of work"
+        raise LookupError(msg)
+
+    def user_in_group(self, user_id: int, group_id: int) -> UserInGroupModel:
+        if model := self._membership_models.get((user_id, group_id)):
+            return model
+        msg = f"Membership of {user_id} in {group_id} was not flushed by this unit of work"
+        raise LookupError(msg)
@@ -2,12 +2,19 @@ from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any
 
 from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from korone.db.chat_settings import invalidate_chat_settings
+from korone.db.models.chat import ChatModel
 from korone.db.models.chat_admin import ChatAdminModel
+from korone.db.repositories.chat import ChatRepository
 from korone.db.session import session_scope
 
 if TYPE_CHECKING:
-    from korone.db.models.chat import ChatModel
+    from collections.abc import Iterable, Mapping
+
+    from aiogram.types import User
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class ChatAdminRepository:
@@ -40,25 +47,63 @@ class ChatAdminRepository:
             return result.scalars().first()
 
     @staticmethod
-    async def replace_chat_admins(chat: ChatModel, admins_map: dict[int, dict[str, Any]]) -> None:
+    async def get_admins_by_user_chat_id(chat: ChatModel) -> tuple[dict[int, dict[str, Any]], datetime | None]:
+        async with session_scope() as session:
+            stmt = (
+                select(ChatModel.chat_id, ChatAdminModel.data, ChatAdminModel.last_updated)
+                .join(ChatModel, ChatAdminModel.user_id == ChatModel.id)
+                .where(ChatAdminModel.chat_id == chat.id)
+            )
+            rows = (await session.execute(stmt)).all()
+
+        admins = {user_chat_id: data for user_chat_id, data, _last_updated in rows}
+        return admins, min((last_updated for _chat_id, _data, last_updated in rows), default=None)
+
+    @classmethod
+    async def replace_chat_admins(cls, chat: ChatModel, admins_map: Mapping[int, dict[str, Any]]) -> datetime:
         now = datetime.now(UTC)
         async with session_scope() as session:
-            stmt = select(ChatAdminModel).where(ChatAdminModel.chat_id == chat.id)
-            result = await session.execute(stmt)
-            existing_admins = {model.user_id: model for model in result.scalars()}
-
-            for user_id, admin_data in admins_map.items():
-                if admin := existing_admins.get(user_id):
-                    admin.data = admin_data
-                    admin.last_updated = now
-                    continue
-
-                session.add(ChatAdminModel(chat_id=chat.id, user_id=user_id, data=admin_data, last_updated=now))
-
-            stale_user_ids = set(existing_admins) - set(admins_map)
-            if stale_user_ids:
-                await session.execute(
-                    delete(ChatAdminModel).where(
-                        ChatAdminModel.chat_id == chat.id, ChatAdminModel.user_id.in_(stale_user_ids)
-                    )
-                )
+            await cls._replace_many(session, chat, admins_map, now)
+
+        await invalidate_chat_settings(chat.chat_id)
+        return now
+
+    @classmethod
+    async def replace_chat_admins_from_users(
+        cls, chat: ChatModel, admins: Iterable[tuple[User, dict[str, Any]]]
+    ) -> datetime:
+        """Store the admins of `chat` as reported by Telegram, creating any users not seen before.
+
+        Users and admin rows are written in a single transaction with one statement each.
+        """
+        admins = list(admins)
+        now = datetime.now(UTC)
+        async with session_scope() as session:
+            user_ids = await ChatRepository.ensure_users(session, (user for user, _data in admins))
+            admins_map = {user_ids[user.id]: data for user, data in admins}
+            await cls._replace_many(session, chat, admins_map, now)
+
+        await invalidate_chat_settings(chat.chat_id)
+        return now
+
+    @staticmethod
+    async def _replace_many(
+        session: AsyncSession, chat: ChatModel, admins_map: Mapping[int, dict[str, Any]], now: datetime
+    ) -> None:
+        stale = delete(ChatAdminModel).where(ChatAdminModel.chat_id == chat.id)
+        if admins_map:
+            stale = stale.where(ChatAdminModel.user_id.not_in(list(admins_map)))
+        await session.execute(stale)
+
+        if not admins_map:
+            return
+
+        stmt = pg_insert(ChatAdminModel).values([
+            {"chat_id": chat.id, "user_id": user_id, "data": data, "last_updated": now}
+            for user_id, data in sorted(admins_map.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="ux_chat_admins_chat_user",
+            set_={"data": stmt.excluded.data, "last_updated": stmt.excluded.last_updated},
+        )
+        await session.execute(stmt)
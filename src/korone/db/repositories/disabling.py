@@ -1,4 +1,5 @@
 from korone.db.base import get_one
+from korone.db.chat_settings import invalidate_chat_settings
 from korone.db.models.disabling import DisablingModel
 from korone.db.session import session_scope
 
@@ -16,12 +17,13 @@ class DisablingRepository:
             if model := await get_one(session, DisablingModel, DisablingModel.chat_id == chat_id):
                 if cmd not in (model.cmds or []):
                     model.cmds = [*model.cmds, cmd]
-                return model
+            else:
+                model = DisablingModel(chat_id=chat_id, cmds=[cmd])
+                session.add(model)
+                await session.flush()
 
-            model = DisablingModel(chat_id=chat_id, cmds=[cmd])
-            session.add(model)
-            await session.flush()
-            return model
+        await invalidate_chat_settings(chat_id)
+        return model
 
     @staticmethod
     async def enable(chat_id: int, cmd: str) -> DisablingModel:
@@ -32,24 +34,29 @@ class DisablingRepository:
                 raise LookupError(msg)
 
             model.cmds = [c for c in model.cmds if c != cmd]
-            return model
+
+        await invalidate_chat_settings(chat_id)
+        return model
 
     @staticmethod
     async def enable_all(chat_id: int) -> DisablingModel | None:
         async with session_scope() as session:
             if model := await get_one(session, DisablingModel, DisablingModel.chat_id == chat_id):
                 await session.delete(model)
-                return model
-        return None
+
+        if model:
+            await invalidate_chat_settings(chat_id)
+        return model
 
     @staticmethod
     async def set_disabled(chat_id: int, cmds: list[str]) -> DisablingModel:
         async with session_scope() as session:
             if model := await get_one(session, DisablingModel, DisablingModel.chat_id == chat_id):
                 model.cmds = cmds
-                return model
+            else:
+                model = DisablingModel(chat_id=chat_id, cmds=cmds)
+                session.add(model)
+                await session.flush()
 
-            model = DisablingModel(chat_id=chat_id, cmds=cmds)
-            session.add(model)
-            await session.flush()
-            return model
+        await invalidate_chat_settings(chat_id)
+        return model
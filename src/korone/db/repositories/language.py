@@ -1,5 +1,6 @@
 from korone.config import CONFIG
 from korone.db.base import get_one
+from korone.db.chat_settings import invalidate_chat_settings
 from korone.db.models.chat import ChatModel
 from korone.db.session import session_scope
 
@@ -16,7 +17,10 @@ class LanguageRepository:
         async with session_scope() as session:
             if item := await get_one(session, ChatModel, ChatModel.chat_id == chat_id):
                 item.language_code = lang
-                return item
 
-        msg = "Chat not found"
-        raise LookupError(msg)
+        if not item:
+            msg = "Chat not found"
+            raise LookupError(msg)
+
+        await invalidate_chat_settings(chat_id)
+        return item
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+import uvloop
+
+from . import aredis, bot, media_lock_redis
+from .config import CONFIG
+from .db.utils import close_db, init_db
+from .logger import get_logger, setup_logging
+from .modules.medias.utils.job_stream import MediaStreamConsumer
+from .modules.medias.utils.platforms.reddit.anubis import ProofOfWorkPool
+from .modules.medias.utils.processing import MediaProcessingManager
+from .utils.aiohttp_session import HTTPClient
+from .utils.cached import close_local_cache, start_local_cache
+from .utils.image_pool import ImagePool
+
+logger = get_logger(__name__)
+
+
+async def shutdown(manager: MediaProcessingManager) -> None:
+    await logger.ainfo("Shutting down the media worker...")
+    await manager.shutdown()
+    await close_db()
+    await HTTPClient.close()
+    await ImagePool.close()
+    await ProofOfWorkPool.close()
+    await bot.session.close()
+    await close_local_cache()
+    await aredis.aclose(close_connection_pool=True)
+    await media_lock_redis.aclose(close_connection_pool=True)
+
+
+async def run_worker() -> None:
+    await logger.ainfo("Starting up the media worker...")
+    await init_db()
+    start_local_cache()
+
+    manager = MediaProcessingManager()
+    consumer = MediaStreamConsumer(manager, bot)
+    await manager.start()
+    try:
+        await consumer.run()
+    finally:
+        await shutdown(manager)
+
+
+def main() -> None:
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    setup_logging(level=logging.DEBUG if CONFIG.debug_mode else logging.INFO)
+    uvloop.install()
+    main()
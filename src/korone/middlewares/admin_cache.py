@@ -1,4 +1,3 @@
-from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any
 
 from aiogram import BaseMiddleware
@@ -6,18 +5,16 @@ from aiogram.exceptions import TelegramAPIError
 from aiogram.types import Update
 
 from korone.constants import CACHE_ADMIN_TTL_SECONDS
-from korone.db.repositories.chat_admin import ChatAdminRepository
 from korone.logger import get_logger
-from korone.middlewares.context_data import as_korone_context, get_chat_db
-from korone.modules.utils_.chat_member import update_chat_members
+from korone.middlewares.context_data import as_korone_context, get_chat_db, get_context_chat_settings
+from korone.modules.utils_.chat_member import refresh_chat_members
 
 if TYPE_CHECKING:
     from collections.abc import Awaitable, Callable
 
     from aiogram.types import TelegramObject
 
-    from korone.db.models.chat import ChatModel
-    from korone.db.models.chat_admin import ChatAdminModel
+    from korone.db.chat_settings import ChatSettings
     from korone.middlewares.context_data import KoroneContextData
 
 logger = get_logger(__name__)
@@ -47,10 +44,10 @@ class AdminCacheMiddleware(BaseMiddleware):
             await logger.adebug("AdminCacheMiddleware: not a group chat, skipping", chat_id=chat_tid)
             return
 
-        if await self._is_cache_stale(chat_db):
+        if self._is_cache_stale(await get_context_chat_settings(data, chat_tid)):
             await logger.adebug("AdminCacheMiddleware: refreshing admin cache", chat_id=chat_tid)
             try:
-                await update_chat_members(chat_db)
+                await refresh_chat_members(chat_db)
             except TelegramAPIError as error:
                 await logger.awarning(
                     "AdminCacheMiddleware: failed to refresh admin cache", chat_id=chat_tid, error=str(error)
@@ -58,14 +55,7 @@ class AdminCacheMiddleware(BaseMiddleware):
         else:
             await logger.adebug("AdminCacheMiddleware: admin cache is up to date", chat_id=chat_tid)
 
-    async def _is_cache_stale(self, chat: ChatModel) -> bool:
-        oldest_admin = await self._get_oldest_admin(chat)
-        if oldest_admin is None:
-            return True
-
-        cache_age_seconds = (datetime.now(UTC) - oldest_admin.last_updated).total_seconds()
-        return cache_age_seconds > CACHE_ADMIN_TTL_SECONDS
-
     @staticmethod
-    async def _get_oldest_admin(chat: ChatModel) -> ChatAdminModel | None:
-        return await ChatAdminRepository.get_oldest_admin(chat)
+    def _is_cache_stale(settings: ChatSettings) -> bool:
+        cache_age_seconds = settings.admin_cache_age()
+        return cache_age_seconds is None or cache_age_seconds > CACHE_ADMIN_TTL_SECONDS
@@ -9,7 +9,7 @@ from aiogram.types import Chat
 from korone.db.models.chat import ChatModel
 from korone.db.repositories.chat import ChatRepository
 from korone.logger import get_logger
-from korone.middlewares.context_data import as_korone_context
+from korone.middlewares.context_data import as_korone_context, get_chat_db, get_context_chat_settings
 from korone.utils.i18n import gettext as _
 
 if TYPE_CHECKING:
@@ -30,11 +30,12 @@ class ChatContext:
 
 class ChatContextMiddleware(BaseMiddleware):
     @staticmethod
-    async def get_current_chat_info(chat: Chat) -> ChatContext:
+    async def get_current_chat_info(chat: Chat, db_model: ChatModel | None = None) -> ChatContext:
         chat_type = ChatType(chat.type)
         title = chat.title if chat_type != ChatType.PRIVATE and chat.title else _("Private chat")
 
-        db_model = await ChatRepository.get_by_chat_id(chat.id)
+        if db_model is None or db_model.chat_id != chat.id:
+            db_model = await ChatRepository.get_by_chat_id(chat.id)
         if not db_model:
             if chat_type == ChatType.PRIVATE:
                 db_model = ChatModel(
@@ -69,5 +70,7 @@ class ChatContextMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         await logger.adebug("ChatContextMiddleware: providing current chat info")
-        context["chat"] = await self.get_current_chat_info(real_chat)
+        # SaveChatsMiddleware has usually loaded this chat already; reuse it instead of querying again.
+        context["chat"] = await self.get_current_chat_info(real_chat, get_chat_db(context))
+        await get_context_chat_settings(context, real_chat.id)
         return await handler(event, data)
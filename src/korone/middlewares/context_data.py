@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING, Any, Required, cast
 
 from aiogram.dispatcher.middlewares.data import MiddlewareData
 
+from korone.db.chat_settings import ChatSettings, get_chat_settings
+
 if TYPE_CHECKING:
     from aiogram.types import Chat, User
 
@@ -17,6 +19,7 @@ class KoroneContextData(MiddlewareData, total=False):
     user_in_group: UserInGroupModel | None
     updated_chats: list[Chat | User]
     new_users: list[ChatModel]
+    chat_settings: ChatSettings
 
 
 def as_korone_context(data: dict[str, Any]) -> KoroneContextData:
@@ -28,3 +31,11 @@ def get_chat_db(context: KoroneContextData) -> ChatModel | None:
     if group_db is not None:
         return group_db
     return context.get("chat_db")
+
+
+async def get_context_chat_settings(context: KoroneContextData, chat_id: int) -> ChatSettings:
+    settings = context.get("chat_settings")
+    if settings is None or settings.chat_id != chat_id:
+        settings = await get_chat_settings(chat_id)
+        context["chat_settings"] = settings
+    return settings
@@ -5,8 +5,8 @@ from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message
 
-from korone.db.repositories.disabling import DisablingRepository
 from korone.logger import get_logger
+from korone.middlewares.context_data import as_korone_context, get_context_chat_settings
 from korone.modules.utils_.admin import is_user_admin
 
 if TYPE_CHECKING:
@@ -32,7 +32,8 @@ class DisablingMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         chat_id = event.chat.id
-        disabled = await DisablingRepository.get_disabled(chat_id)
+        settings = await get_context_chat_settings(as_korone_context(data), chat_id)
+        disabled = list(settings.disabled)
 
         data["disabled"] = disabled
         await logger.adebug("DisablingMiddleware", chat_id=chat_id, disabled=disabled)
@@ -5,7 +5,7 @@ from aiogram.utils.i18n.middleware import I18nMiddleware
 
 from korone.config import CONFIG
 from korone.logger import get_logger
-from korone.middlewares.context_data import as_korone_context, get_chat_db
+from korone.middlewares.context_data import as_korone_context, get_chat_db, get_context_chat_settings
 
 if TYPE_CHECKING:
     from aiogram.types import TelegramObject, User
@@ -15,17 +15,18 @@ logger = get_logger(__name__)
 
 class LocalizationMiddleware(I18nMiddleware):
     async def get_locale(self, event: TelegramObject, data: dict[str, Any]) -> str:
-        chat_in_db = get_chat_db(as_korone_context(data))
+        context = as_korone_context(data)
+        chat_in_db = get_chat_db(context)
         if chat_in_db is None:
             await logger.adebug("LocalizationMiddleware: Chat cannot be found in this event, leaving locale to default")
             return CONFIG.default_locale
 
-        if chat_in_db.language_code:
-            if chat_in_db.language_code in self.i18n.available_locales:
-                return chat_in_db.language_code
+        if language_code := (await get_context_chat_settings(context, chat_in_db.chat_id)).language_code:
+            if language_code in self.i18n.available_locales:
+                return language_code
             await logger.adebug(
                 "LocalizationMiddleware: Locale not available, falling back to default",
-                locale=chat_in_db.language_code,
+                locale=language_code,
                 available=self.i18n.available_locales,
             )
 
@@ -8,11 +8,11 @@ from aiogram.utils.deep_linking import create_start_link
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from korone.config import CONFIG
-from korone.db.repositories.chat import ChatRepository
+from korone.db.repositories.chat import ChatRepository, ChatUnitOfWork
 from korone.logger import get_logger
 from korone.middlewares.context_data import as_korone_context
 from korone.modules.help.callbacks import HELP_START_PAYLOAD
-from korone.modules.utils_.chat_member import update_chat_members
+from korone.modules.utils_.chat_member import refresh_chat_members
 from korone.utils.i18n import gettext as _
 
 if TYPE_CHECKING:
@@ -20,7 +20,7 @@ if TYPE_CHECKING:
 
     from aiogram.types import ChatJoinRequest, ChatMemberUpdated, Message, TelegramObject
 
-    from korone.db.models.chat import ChatModel, UserInGroupModel
+    from korone.db.models.chat import ChatModel
     from korone.middlewares.context_data import KoroneContextData
 
 logger = get_logger(__name__)
@@ -42,13 +42,13 @@ class SaveChatsMiddleware(BaseMiddleware):
         await ChatRepository.delete_user_in_group(user_id, group)
 
     @staticmethod
-    async def _chats_update(chats: Iterable[Chat | User]) -> None:
+    async def _chats_update(chats: Iterable[Chat | User], uow: ChatUnitOfWork) -> None:
         for chat in chats:
             await logger.adebug("SaveChatsMiddleware: Updating chat", chat_id=chat.id)
             if isinstance(chat, User):
-                await ChatRepository.upsert_user(chat)
+                uow.upsert_user(chat)
             else:
-                await ChatRepository.upsert_group(chat)
+                uow.upsert_group(chat)
 
     @staticmethod
     async def handle_replied_message(reply_message: Message, chat_id: int) -> list[Chat | User]:
@@ -74,7 +74,7 @@ class SaveChatsMiddleware(BaseMiddleware):
         return chats_to_update
 
     @staticmethod
-    async def save_topic(message: Message, group: ChatModel) -> None:
+    async def save_topic(message: Message, group_id: int, uow: ChatUnitOfWork) -> None:
         name: str | None
         if message.forum_topic_created:
             name = message.forum_topic_created.name
@@ -87,9 +87,9 @@ class SaveChatsMiddleware(BaseMiddleware):
 
         if message.message_thread_id is not None:
             await logger.adebug(
-                "SaveChatsMiddleware: Saving topic", group=group, thread_id=message.message_thread_id, name=name
+                "SaveChatsMiddleware: Saving topic", group_id=group_id, thread_id=message.message_thread_id, name=name
             )
-            await ChatRepository.ensure_topic(group, message.message_thread_id, name)
+            uow.ensure_topic(group_id, message.message_thread_id, name)
 
     @staticmethod
     async def close_topic(message: Message, group: ChatModel) -> None:
@@ -99,24 +99,24 @@ class SaveChatsMiddleware(BaseMiddleware):
                 await ChatRepository.ensure_topic(group, message.message_thread_id, None)
 
     @staticmethod
-    async def update_from_user(
-        message: Message, current_group: ChatModel
-    ) -> tuple[ChatModel | None, UserInGroupModel | None]:
+    async def update_from_user(message: Message, uow: ChatUnitOfWork) -> int | None:
         if not message.from_user:
-            return None, None
+            return None
 
-        if message.sender_chat and message.sender_chat.id == current_group.chat_id:
-            return None, None
+        if message.sender_chat and message.sender_chat.id == message.chat.id:
+            return None
 
         if message.sender_chat:
             await logger.adebug("SaveChatsMiddleware: Updating from sender_chat", sender_chat=message.sender_chat.id)
-            current_user = await ChatRepository.upsert_group(message.sender_chat)
+            uow.upsert_group(message.sender_chat)
+            current_user_id = message.sender_chat.id
         else:
             await logger.adebug("SaveChatsMiddleware: Updating from from_user", from_user=message.from_user.id)
-            current_user = await ChatRepository.upsert_user(message.from_user)
+            uow.upsert_user(message.from_user)
+            current_user_id = message.from_user.id
 
-        user_in_group = await ChatRepository.ensure_user_in_group(current_user, current_group)
-        return current_user, user_in_group
+        uow.ensure_user_in_group(current_user_id, message.chat.id)
+        return current_user_id
 
     async def handle_message(self, message: Message, context: KoroneContextData) -> None:
         await logger.adebug(
@@ -125,21 +125,41 @@ class SaveChatsMiddleware(BaseMiddleware):
         if await self._handle_migration(context, message):
             return
 
-        chat, _user = await self._handle_private_and_group_message(context, message)
-
-        if message.chat.type not in {ChatType.GROUP, ChatType.SUPERGROUP}:
+        if await self._handle_private_message(context, message):
             return
 
-        chats_to_update = await self._handle_message_update(message, chat)
-        await self._chats_update(chats_to_update)
-        context["updated_chats"] = chats_to_update
+        uow = ChatUnitOfWork()
+        await logger.adebug("SaveChatsMiddleware: Handling group message", chat_id=message.chat.id)
+        uow.upsert_group(message.chat)
+        current_user_id = await self.update_from_user(message, uow)
 
-        await self.save_topic(message, chat)
+        is_group = message.chat.type in {ChatType.GROUP, ChatType.SUPERGROUP}
+        chats_to_update: list[Chat | User] = []
+        new_members: list[User] = []
+        if is_group:
+            chats_to_update = await self._handle_message_update(message, uow)
+            await self._chats_update(chats_to_update, uow)
+            await self.save_topic(message, message.chat.id, uow)
+            new_members = await self._handle_new_chat_members(message, uow)
+            await self._stage_new_owner(message, uow)
+
+        await uow.flush()
+
+        group = uow.chat(message.chat.id)
+        context["chat_db"] = context["group_db"] = group
+        context["user_db"] = uow.chat(current_user_id) if current_user_id is not None else None
+        context["user_in_group"] = (
+            uow.user_in_group(current_user_id, message.chat.id) if current_user_id is not None else None
+        )
 
-        context["new_users"] = await self._handle_new_chat_members(message, chat)
+        if not is_group:
+            return
 
-        await self._handle_left_chat_member(message, chat)
-        await self._handle_chat_owner_updates(message, chat)
+        context["updated_chats"] = chats_to_update
+        context["new_users"] = [uow.chat(member.id) for member in new_members]
+
+        await self._handle_left_chat_member(message, group)
+        await self._handle_chat_owner_updates(message, group)
 
     @staticmethod
     async def _handle_migration(context: KoroneContextData, message: Message) -> bool:
@@ -164,25 +184,17 @@ class SaveChatsMiddleware(BaseMiddleware):
             return True
         return False
 
-    async def _handle_private_and_group_message(
-        self, context: KoroneContextData, message: Message
-    ) -> tuple[ChatModel, ChatModel]:
-        if message.chat.type == ChatType.PRIVATE and message.from_user:
-            await logger.adebug("SaveChatsMiddleware: Handling private message", user_id=message.from_user.id)
-            user = await ChatRepository.upsert_user(message.from_user)
-            context["chat_db"] = context["user_db"] = user
-            return user, user
-        await logger.adebug("SaveChatsMiddleware: Handling group message", chat_id=message.chat.id)
-        current_group = await ChatRepository.upsert_group(message.chat)
-        context["chat_db"] = context["group_db"] = current_group
-
-        current_user, user_in_group = await self.update_from_user(message, current_group)
-        context["user_in_group"] = user_in_group
-        context["user_db"] = current_user
+    @staticmethod
+    async def _handle_private_message(context: KoroneContextData, message: Message) -> bool:
+        if message.chat.type != ChatType.PRIVATE or not message.from_user:
+            return False
 
-        return current_group, current_user or current_group
+        await logger.adebug("SaveChatsMiddleware: Handling private message", user_id=message.from_user.id)
+        user = await ChatRepository.upsert_user(message.from_user)
+        context["chat_db"] = context["user_db"] = user
+        return True
 
-    async def _handle_message_update(self, message: Message, group: ChatModel) -> list[Chat | User]:
+    async def _handle_message_update(self, message: Message, uow: ChatUnitOfWork) -> list[Chat | User]:
         chats_to_update: list[Chat | User] = []
 
         if reply_message := message.reply_to_message:
@@ -190,10 +202,10 @@ class SaveChatsMiddleware(BaseMiddleware):
                 "SaveChatsMiddleware: Handling reply message update", reply_message_id=reply_message.message_id
             )
             chat_id = reply_message.chat.id
-            await self.save_topic(reply_message, group)
+            await self.save_topic(reply_message, message.chat.id, uow)
             chats_to_update.extend(await self.handle_replied_message(reply_message, chat_id))
 
-        elif message.forward_from or (message.forward_from_chat and message.forward_from_chat.id != group.chat_id):
+        elif message.forward_from or (message.forward_from_chat and message.forward_from_chat.id != message.chat.id):
             await logger.adebug("SaveChatsMiddleware: Handling forwarded message update")
             if message.forward_from_chat:
                 chats_to_update.append(message.forward_from_chat)
@@ -203,24 +215,24 @@ class SaveChatsMiddleware(BaseMiddleware):
         return chats_to_update
 
     @staticmethod
-    async def _handle_new_chat_members(message: Message, group: ChatModel) -> list[ChatModel]:
+    async def _handle_new_chat_members(message: Message, uow: ChatUnitOfWork) -> list[User]:
         if not message.new_chat_members:
             return []
 
         await logger.adebug(
             "SaveChatsMiddleware: Handling new chat members", members_count=len(message.new_chat_members)
         )
-        new_users = []
+        new_members = []
         for member in message.new_chat_members:
             if message.from_user and member.id == message.from_user.id:
                 continue
 
             await logger.adebug("SaveChatsMiddleware: Saving new chat member", user_id=member.id)
-            new_user = await ChatRepository.upsert_user(member)
-            await ChatRepository.ensure_user_in_group(new_user, group)
-            new_users.append(new_user)
+            uow.upsert_user(member)
+            uow.ensure_user_in_group(member.id, message.chat.id)
+            new_members.append(member)
 
-        return new_users
+        return new_members
 
     async def _handle_left_chat_member(self, message: Message, group: ChatModel) -> None:
         if not message.left_chat_member:
@@ -239,7 +251,7 @@ class SaveChatsMiddleware(BaseMiddleware):
             "SaveChatsMiddleware: Refreshing admin cache after ownership update", chat_id=group.chat_id, reason=reason
         )
         try:
-            await update_chat_members(group)
+            await refresh_chat_members(group, force=True)
         except TelegramAPIError as error:
             await logger.awarning(
                 "SaveChatsMiddleware: Failed to refresh admin cache after ownership update",
@@ -248,6 +260,19 @@ class SaveChatsMiddleware(BaseMiddleware):
                 error=str(error),
             )
 
+    @staticmethod
+    async def _stage_new_owner(message: Message, uow: ChatUnitOfWork) -> None:
+        if owner_changed := message.chat_owner_changed:
+            new_owner = owner_changed.new_owner
+        elif owner_left := message.chat_owner_left:
+            new_owner = owner_left.new_owner
+        else:
+            return
+
+        if new_owner:
+            uow.upsert_user(new_owner)
+            uow.ensure_user_in_group(new_owner.id, message.chat.id)
+
     async def _handle_chat_owner_updates(self, message: Message, group: ChatModel) -> None:
         if owner_changed := message.chat_owner_changed:
             new_owner = owner_changed.new_owner
@@ -256,8 +281,6 @@ class SaveChatsMiddleware(BaseMiddleware):
                 chat_id=group.chat_id,
                 new_owner_user_id=new_owner.id,
             )
-            new_owner_db = await ChatRepository.upsert_user(new_owner)
-            await ChatRepository.ensure_user_in_group(new_owner_db, group)
             await self._refresh_admin_cache(group, reason="chat_owner_changed")
             return
 
@@ -275,10 +298,6 @@ class SaveChatsMiddleware(BaseMiddleware):
         if message.from_user and message.from_user.id != CONFIG.bot_id:
             await self._delete_user_in_chat_by_user_id(message.from_user.id, group)
 
-        if new_owner:
-            new_owner_db = await ChatRepository.upsert_user(new_owner)
-            await ChatRepository.ensure_user_in_group(new_owner_db, group)
-
         await self._refresh_admin_cache(group, reason="chat_owner_left")
 
     @staticmethod
@@ -288,20 +307,22 @@ class SaveChatsMiddleware(BaseMiddleware):
             return
 
         await logger.adebug("SaveChatsMiddleware: Saving from user", user_id=from_user.id)
-        user = await ChatRepository.upsert_user(from_user)
-        context["user_db"] = user
+        uow = ChatUnitOfWork()
+        uow.upsert_user(from_user)
 
         event_chat = context.get("event_chat")
-        if isinstance(event_chat, Chat):
-            chat_type = ChatType(event_chat.type)
-            if chat_type in {ChatType.GROUP, ChatType.SUPERGROUP}:
-                await logger.adebug("SaveChatsMiddleware: Saving callback event chat", chat_id=event_chat.id)
-                group = await ChatRepository.upsert_group(event_chat)
-                context["chat_db"] = context["group_db"] = group
-                context["user_in_group"] = await ChatRepository.ensure_user_in_group(user, group)
-                return
+        if isinstance(event_chat, Chat) and ChatType(event_chat.type) in {ChatType.GROUP, ChatType.SUPERGROUP}:
+            await logger.adebug("SaveChatsMiddleware: Saving callback event chat", chat_id=event_chat.id)
+            uow.upsert_group(event_chat)
+            uow.ensure_user_in_group(from_user.id, event_chat.id)
+            await uow.flush()
+            context["user_db"] = uow.chat(from_user.id)
+            context["chat_db"] = context["group_db"] = uow.chat(event_chat.id)
+            context["user_in_group"] = uow.user_in_group(from_user.id, event_chat.id)
+            return
 
-        context["chat_db"] = context["user_db"] = user
+        await uow.flush()
+        context["chat_db"] = context["user_db"] = uow.chat(from_user.id)
 
     @staticmethod
     async def save_chat_join_request(join_request: ChatJoinRequest, context: KoroneContextData) -> None:
@@ -310,10 +331,12 @@ class SaveChatsMiddleware(BaseMiddleware):
             chat_id=join_request.chat.id,
             user_id=join_request.from_user.id,
         )
-        chat = await ChatRepository.upsert_group(join_request.chat)
-        user = await ChatRepository.upsert_user(join_request.from_user)
-        context["chat_db"] = context["group_db"] = chat
-        context["user_db"] = user
+        uow = ChatUnitOfWork()
+        uow.upsert_group(join_request.chat)
+        uow.upsert_user(join_request.from_user)
+        await uow.flush()
+        context["chat_db"] = context["group_db"] = uow.chat(join_request.chat.id)
+        context["user_db"] = uow.chat(join_request.from_user.id)
 
     @staticmethod
     async def _send_group_welcome_message(event: ChatMemberUpdated) -> None:
@@ -21,6 +21,7 @@ logger = get_logger(__name__)
 BASE_URL = "https://www.gsmarena.com"
 MOBILE_BASE_URL = "https://m.gsmarena.com"
 CACHE_TTL = 60 * 60 * 24
+LOCAL_CACHE_TTL: Final[int] = 60 * 10
 MAX_RETRIES: Final[int] = 3
 RETRY_BASE_DELAY: Final[float] = 5.0
 
@@ -50,7 +51,7 @@ def _build_request_url(url: str) -> str:
     return f"{str(CONFIG.cors_bypass_url).rstrip('/')}/{url}"
 
 
-@Cached(ttl=CACHE_TTL, key="gsmarena:html")
+@Cached(ttl=CACHE_TTL, key="gsmarena:html", local_ttl=LOCAL_CACHE_TTL)
 async def fetch_html(url: str) -> str:
     request_url = _build_request_url(url)
     timeout = aiohttp.ClientTimeout(total=60)
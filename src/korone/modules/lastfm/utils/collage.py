@@ -1,4 +1,5 @@
 import asyncio
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 from typing import TYPE_CHECKING
 
@@ -6,6 +7,7 @@ import aiohttp
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
 from korone.utils.aiohttp_session import HTTPClient
+from korone.utils.image_pool import ImagePool
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
@@ -163,6 +165,10 @@ async def create_album_collage(*, albums: Sequence[LastFMTopAlbum], size: int, i
         msg = "Could not download album covers for this collage."
         raise LastFMCollageError(msg)
 
-    return await asyncio.to_thread(
-        _compose_collage_sync, albums=selectable, payloads=payloads, size=valid_size, include_text=include_text
-    )
+    try:
+        return await ImagePool.run(
+            _compose_collage_sync, albums=selectable, payloads=payloads, size=valid_size, include_text=include_text
+        )
+    except (TimeoutError, BrokenProcessPool) as exc:
+        msg = "Could not render this collage."
+        raise LastFMCollageError(msg) from exc
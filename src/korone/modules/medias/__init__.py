@@ -1,10 +1,12 @@
 from aiogram import Router
 
+from korone.config import CONFIG
 from korone.modules.metadata import ModuleManifest, ModulePackage, ModuleScripts
 from korone.utils.formatting import Doc
 from korone.utils.i18n import LazyProxy
 from korone.utils.i18n import lazy_gettext as l_
 
+from .filters import MediaUrlDispatcher
 from .handlers.bluesky import BlueskyMediaHandler
 from .handlers.instagram import InstagramMediaHandler
 from .handlers.pinterest import PinterestMediaHandler
@@ -13,13 +15,24 @@ from .handlers.status import MediaAutoDownloadStatus
 from .handlers.tiktok import TikTokMediaHandler
 from .handlers.twitter import TwitterMediaHandler
 from .middlewares import MediaProcessingMiddleware
+from .stats import medias_stats
+from .utils.job_stream import publish_job
 from .utils.processing import MediaProcessingManager
 
 router = Router(name="medias")
-processing_manager = MediaProcessingManager()
+media_handlers = (
+    TwitterMediaHandler,
+    BlueskyMediaHandler,
+    InstagramMediaHandler,
+    PinterestMediaHandler,
+    RedditMediaHandler,
+    TikTokMediaHandler,
+)
+processing_manager = MediaProcessingManager(publish=publish_job if CONFIG.media_stream_workers else None)
 
 
 def pre_setup() -> None:
+    router.message.filter(MediaUrlDispatcher([handler.PROVIDER for handler in media_handlers]))
     router.message.middleware(MediaProcessingMiddleware(processing_manager))
     router.startup.register(processing_manager.start)
     router.shutdown.register(processing_manager.shutdown)
@@ -38,14 +51,7 @@ manifest = ModuleManifest(
         ),
     ),
     router=router,
-    handlers=(
-        MediaAutoDownloadStatus,
-        TwitterMediaHandler,
-        BlueskyMediaHandler,
-        InstagramMediaHandler,
-        PinterestMediaHandler,
-        RedditMediaHandler,
-        TikTokMediaHandler,
-    ),
+    handlers=(MediaAutoDownloadStatus, *media_handlers),
     scripts=ModuleScripts(pre_setup=pre_setup),
+    stats=medias_stats,
 )
@@ -1,3 +1,4 @@
+import re
 from typing import TYPE_CHECKING, Any
 
 from aiogram.filters import BaseFilter
@@ -6,43 +7,98 @@ from korone.modules.medias.utils.settings import is_auto_download_enabled
 from korone.modules.medias.utils.url import normalize_media_url
 
 if TYPE_CHECKING:
-    import re
+    from collections.abc import Sequence
 
     from aiogram.types import Message
 
+    from korone.db.chat_settings import ChatSettings
+    from korone.modules.medias.utils.provider_base import MediaProvider
 
-class MediaUrlFilter(BaseFilter):
-    def __init__(self, pattern: re.Pattern[str], *, check_enabled: bool = True) -> None:
-        self.pattern = pattern
-        self.check_enabled = check_enabled
+MEDIA_URL_MATCHES_KEY = "media_url_matches"
 
-    @staticmethod
-    def _is_url_command(text: str) -> bool:
-        if not text:
-            return False
+_INLINE_FLAGS: tuple[tuple[re.RegexFlag, str], ...] = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+)
 
-        command_token = text.lstrip().split(maxsplit=1)[0]
-        if not command_token.startswith("/"):
-            return False
 
-        command = command_token[1:].split("@", maxsplit=1)[0].casefold()
-        return command == "url"
+def _scoped_pattern(pattern: re.Pattern[str]) -> str:
+    # Keep each provider's own flags when its pattern becomes one branch of the combined regex.
+    flags = "".join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+    return f"(?{flags}:{pattern.pattern})" if flags else f"(?:{pattern.pattern})"
+
+
+def _is_url_command(text: str) -> bool:
+    if not text:
+        return False
+
+    command_token = text.lstrip().split(maxsplit=1)[0]
+    if not command_token.startswith("/"):
+        return False
+
+    command = command_token[1:].split("@", maxsplit=1)[0].casefold()
+    return command == "url"
+
+
+class MediaUrlDispatcher(BaseFilter):
+    """Router-level filter that scans each message once for the links of every provider.
+
+    A substring check on the provider URL hints skips messages that cannot match; the rest go through a single
+    alternation of all provider patterns. Matching URLs are normalized once, the auto-download setting is read
+    once, and the result is exposed to handlers as `media_url_matches`, keyed by provider name. The filter
+    never rejects a message, so other handlers in the router still run.
+    """
+
+    def __init__(self, providers: Sequence[type[MediaProvider]], *, check_enabled: bool = True) -> None:
+        self.check_enabled = check_enabled
+        self._provider_names = {f"provider_{index}": provider.name for index, provider in enumerate(providers)}
+        self._pattern = re.compile(
+            "|".join(
+                f"(?P<{group}>{_scoped_pattern(provider.pattern)})"
+                for group, provider in zip(self._provider_names, providers, strict=True)
+            )
+        )
+        self._hints = tuple(dict.fromkeys(hint.lower() for provider in providers for hint in provider.url_hints))
 
-    async def __call__(self, message: Message) -> bool | dict[str, Any]:
+    def match_urls(self, text: str) -> dict[str, list[str]]:
+        lowered = text.lower()
+        if "http" not in lowered or not any(hint in lowered for hint in self._hints):
+            return {}
+
+        matches: dict[str, dict[str, None]] = {}
+        for match in self._pattern.finditer(text):
+            if match.lastgroup is None or not (url := normalize_media_url(match.group(0))):
+                continue
+            matches.setdefault(self._provider_names[match.lastgroup], {})[url] = None
+        return {provider: list(urls) for provider, urls in matches.items()}
+
+    async def __call__(self, message: Message, chat_settings: ChatSettings | None = None) -> bool | dict[str, Any]:
         text = message.text or message.caption or ""
-        if not text:
-            return False
+        if not text or _is_url_command(text):
+            return True
 
-        if self._is_url_command(text):
-            return False
+        matches = self.match_urls(text)
+        if not matches:
+            return True
 
-        normalized_urls = (normalize_media_url(match.group(0)) for match in self.pattern.finditer(text))
-        urls = list(dict.fromkeys(url for url in normalized_urls if url))
+        if self.check_enabled and not await is_auto_download_enabled(message.chat.id, chat_settings):
+            return True
 
-        if not urls:
-            return False
+        return {MEDIA_URL_MATCHES_KEY: matches}
 
-        if self.check_enabled and not await is_auto_download_enabled(message.chat.id):
-            return False
 
+class MediaUrlFilter(BaseFilter):
+    """Pass messages that `MediaUrlDispatcher` found links for `provider` in, as `media_urls`."""
+
+    def __init__(self, provider: type[MediaProvider]) -> None:
+        self.provider_name = provider.name
+
+    async def __call__(
+        self, message: Message, media_url_matches: dict[str, list[str]] | None = None
+    ) -> bool | dict[str, Any]:
+        urls = (media_url_matches or {}).get(self.provider_name)
+        if not urls:
+            return False
         return {"media_urls": urls}
@@ -25,11 +25,13 @@ from korone.modules.medias.utils.photo_compression import (
     photo_payload_needs_resize,
 )
 from korone.modules.medias.utils.processing import media_source_id
+from korone.modules.medias.utils.spool import media_spool
 from korone.modules.medias.utils.types import MediaItem, MediaKind, MediaPost
 from korone.modules.medias.utils.url import normalize_media_url
 from korone.modules.utils_.file_id_cache import (
     delete_cached_file_payload,
-    get_cached_file_payload,
+    delete_cached_file_payloads,
+    get_cached_file_payloads,
     make_file_id_cache_key,
     set_cached_file_payload,
 )
@@ -37,6 +39,7 @@ from korone.modules.utils_.telegram_exceptions import REPLIED_NOT_FOUND
 from korone.utils.formatting import Template
 from korone.utils.handlers import KoroneMessageHandler
 from korone.utils.i18n import gettext as _
+from korone.utils.image_pool import ImagePool
 from korone.utils.telegram_permissions import handle_no_rights_error, is_no_rights_error
 
 if TYPE_CHECKING:
@@ -120,15 +123,20 @@ class BaseMediaHandler(KoroneMessageHandler):
 
     @classmethod
     def filters(cls) -> tuple[CallbackType, ...]:
-        return (MediaUrlFilter(cls.PROVIDER.pattern),)
+        return (MediaUrlFilter(cls.PROVIDER),)
 
-    @staticmethod
-    def _post_cache_candidates(*urls: str) -> set[str]:
-        return {candidate for url in urls if (candidate := url.strip())}
+    @classmethod
+    def _post_cache_key(cls, canonical_key: str) -> str:
+        return make_file_id_cache_key(cls.POST_CACHE_NAMESPACE, canonical_key)
 
     @classmethod
-    def _post_cache_key(cls, url: str) -> str:
-        return make_file_id_cache_key(cls.POST_CACHE_NAMESPACE, url)
+    def _post_cache_keys(cls, canonical_key: str, source_url: str) -> list[str]:
+        # Posts cached before the canonical key stay under their raw source URL until the file_id TTL runs out, so
+        # that key is still read, and moved over on a hit.
+        cache_keys = [cls._post_cache_key(canonical_key)]
+        if (legacy_key := source_url.strip()) and legacy_key != canonical_key:
+            cache_keys.append(cls._post_cache_key(legacy_key))
+        return cache_keys
 
     @classmethod
     def _media_source_cache_key(cls, source_url: str) -> str:
@@ -252,34 +260,41 @@ class BaseMediaHandler(KoroneMessageHandler):
             ),
         )
 
-    async def _get_cached_post(self, source_url: str) -> tuple[str, MediaPost] | None:
-        for candidate_url in self._post_cache_candidates(source_url):
-            cache_key = self._post_cache_key(candidate_url)
-            cached_payload = await get_cached_file_payload(cache_key)
-            if not cached_payload:
+    @classmethod
+    async def has_cached_post(cls, source_url: str) -> bool:
+        canonical_key = await cls.PROVIDER.cached_canonical_key(source_url)
+        return bool(await get_cached_file_payloads(cls._post_cache_keys(canonical_key, source_url)))
+
+    async def _get_cached_post(self, canonical_key: str, source_url: str) -> tuple[str, MediaPost] | None:
+        cache_keys = self._post_cache_keys(canonical_key, source_url)
+        cached_payloads = await get_cached_file_payloads(cache_keys)
+
+        stale_keys: list[str] = []
+        found: tuple[str, MediaPost] | None = None
+        for cache_key in cache_keys:
+            if not (cached_payload := cached_payloads.get(cache_key)):
                 continue
 
-            cached_post = self._deserialize_post_cache_payload(cached_payload)
-            if cached_post:
-                return candidate_url, cached_post
+            if cached_post := self._deserialize_post_cache_payload(cached_payload):
+                found = cache_key, cached_post
+                break
 
-            await delete_cached_file_payload(cache_key)
+            stale_keys.append(cache_key)
 
-        return None
+        await delete_cached_file_payloads(stale_keys)
+        return found
 
-    async def _delete_post_cache(self, *urls: str) -> None:
-        for candidate_url in self._post_cache_candidates(*urls):
-            await delete_cached_file_payload(self._post_cache_key(candidate_url))
+    async def _delete_post_cache(self, canonical_key: str, source_url: str) -> None:
+        await delete_cached_file_payloads(self._post_cache_keys(canonical_key, source_url))
 
     async def _set_post_cache(
-        self, source_url: str, post: MediaPost, media_payload: list[MediaCacheEntryPayload]
+        self, canonical_key: str, post: MediaPost, media_payload: list[MediaCacheEntryPayload]
     ) -> None:
         if not media_payload:
             return
 
         payload = self._build_post_cache_payload(post, media_payload)
-        for candidate_url in self._post_cache_candidates(source_url, post.url):
-            await set_cached_file_payload(self._post_cache_key(candidate_url), payload)
+        await set_cached_file_payload(self._post_cache_key(canonical_key), payload)
 
     def _chat_action_kwargs(self) -> dict[str, Any]:
         return {"chat_id": self.event.chat.id, "bot": self.bot, "message_thread_id": self.event.message_thread_id}
@@ -322,7 +337,7 @@ class BaseMediaHandler(KoroneMessageHandler):
 
         try:
             async with asyncio.timeout(self.PHOTO_COMPRESSION_TIMEOUT_SECONDS):
-                compressed_payload = await asyncio.to_thread(
+                compressed_payload = await ImagePool.run(
                     compress_photo_payload_to_safe_jpeg,
                     media.file.data,
                     safe_limit_bytes=self.PHOTO_SAFE_LIMIT_BYTES,
@@ -686,25 +701,31 @@ class BaseMediaHandler(KoroneMessageHandler):
             return []
         return cached_media_payload
 
-    async def _try_send_cached_post(self, source_url: str) -> bool:
-        if not (cached_post_payload := await self._get_cached_post(source_url)):
+    async def _try_send_cached_post(self, canonical_key: str, source_url: str) -> bool:
+        if not (cached_post_payload := await self._get_cached_post(canonical_key, source_url)):
             return False
 
-        cached_url, cached_post = cached_post_payload
+        cache_key, cached_post = cached_post_payload
         try:
             cached_media_payload = await self._send_post(cached_post)
         except TelegramBadRequest:
-            await self._delete_post_cache(source_url, cached_url, cached_post.url)
+            await self._delete_post_cache(canonical_key, source_url)
             return False
 
         if cached_media_payload:
-            await self._set_post_cache(source_url, cached_post, cached_media_payload)
+            await self._set_post_cache(canonical_key, cached_post, cached_media_payload)
+            if cache_key != self._post_cache_key(canonical_key):
+                await delete_cached_file_payload(cache_key)
         return True
 
     async def handle(self) -> None:
         if not self.bot:
             return
 
+        async with media_spool():
+            await self._handle()
+
+    async def _handle(self) -> None:
         source_url: str | None = None
         source_identifier: str | None = None
         started_at = perf_counter()
@@ -719,6 +740,7 @@ class BaseMediaHandler(KoroneMessageHandler):
                     return
 
             source_identifier = media_source_id(source_url)
+            canonical_key = await self.PROVIDER.canonical_key(source_url)
             sentry_sdk.set_tag("korone.media_stage", stage)
             await logger.ainfo(
                 "[Medias] Handler started",
@@ -731,7 +753,7 @@ class BaseMediaHandler(KoroneMessageHandler):
             stage = "cache_send"
             sentry_sdk.set_tag("korone.media_stage", stage)
             sent_at = perf_counter()
-            if await self._try_send_cached_post(source_url):
+            if await self._try_send_cached_post(canonical_key, source_url):
                 timings[stage] = perf_counter() - sent_at
                 outcome = "cached"
                 await logger.adebug(
@@ -785,7 +807,7 @@ class BaseMediaHandler(KoroneMessageHandler):
 
             stage = "cache_store"
             sentry_sdk.set_tag("korone.media_stage", stage)
-            await self._set_post_cache(source_url, post, cached_media_payload)
+            await self._set_post_cache(canonical_key, post, cached_media_payload)
             outcome = "sent"
         except asyncio.CancelledError:
             outcome = "cancelled"
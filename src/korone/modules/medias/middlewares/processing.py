@@ -1,8 +1,10 @@
+from functools import partial
 from time import perf_counter
 from typing import TYPE_CHECKING, Any
 
 from aiogram import BaseMiddleware
 from aiogram.dispatcher.flags import get_flag
+from aiogram.types import Chat
 
 from korone.modules.medias.utils.processing import MediaHandler, MediaJob, MediaProcessingManager, media_source_id
 
@@ -34,6 +36,16 @@ class MediaProcessingMiddleware(BaseMiddleware):
         handler_object = data.get("handler")
         callback = getattr(handler_object, "callback", None)
         handler_name = getattr(callback, "__name__", type(callback).__name__)
+        media_provider = getattr(callback, "PROVIDER", None)
+        provider = getattr(media_provider, "name", handler_name)
+        # Short links are resolved by the job itself, so only a key known without a request is used here.
+        canonical_key = await media_provider.cached_canonical_key(source_url) if media_provider else None
+        # Cached posts only need a file_id resend, so they skip ahead of jobs that download.
+        has_cached_post = getattr(callback, "has_cached_post", None)
+        priority = bool(has_cached_post and await has_cached_post(source_url))
+        cached_post_check = partial(has_cached_post, source_url) if has_cached_post else None
+
+        event_chat = data.get("event_chat")
 
         detached_data = data.copy()
         detached_data.pop("state", None)
@@ -48,6 +60,12 @@ class MediaProcessingMiddleware(BaseMiddleware):
             source_url=source_url,
             source_id=media_source_id(source_url),
             queued_at=perf_counter(),
+            chat_id=event_chat.id if isinstance(event_chat, Chat) else 0,
+            provider=provider,
+            priority=priority,
+            handler_ref=f"{callback.__module__}:{callback.__qualname__}" if isinstance(callback, type) else None,
+            canonical_key=canonical_key,
+            has_cached_post=cached_post_check,
         )
         await self._manager.submit(job)
         return None
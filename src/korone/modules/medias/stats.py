@@ -0,0 +1,40 @@
+import resource
+import sys
+
+from korone.utils.formatting import Code, KeyValue, Section
+
+from .utils.job_queue import queue_stats
+from .utils.spool import memory_stats
+
+
+def _format_mib(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+
+def medias_stats() -> Section:
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    queues = (
+        KeyValue(
+            f"Queue {name}",
+            Code(
+                f"{stats.queued} queued, {stats.running} running, {stats.dropped} dropped, "
+                f"wait {stats.wait_avg * 1000:.0f}/{stats.wait_max * 1000:.0f} ms"
+            ),
+        )
+        for name, stats in sorted(queue_stats.providers.items())
+    )
+    return Section(
+        KeyValue("Buffered payloads", Code(_format_mib(memory_stats.buffered_bytes))),
+        KeyValue("Peak buffered payloads", Code(_format_mib(memory_stats.peak_buffered_bytes))),
+        KeyValue(
+            "Spooled to disk", Code(f"{memory_stats.spooled_files} files, {_format_mib(memory_stats.spooled_bytes)}")
+        ),
+        KeyValue("Active spools", Code(memory_stats.active_spools)),
+        KeyValue("Peak RSS", Code(_format_mib(max_rss))),
+        *queues,
+        title="Medias",
+    )
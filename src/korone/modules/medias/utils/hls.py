@@ -0,0 +1,285 @@
+import asyncio
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Final
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from korone.config import CONFIG
+from korone.utils.aiohttp_session import HTTPClient
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Sequence
+
+    import aiohttp
+
+_ATTRIBUTE_REGEX: Final[re.Pattern[str]] = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+_RESOLUTION_REGEX: Final[re.Pattern[str]] = re.compile(r"^(\d+)x(\d+)$")
+_EXTINF_REGEX: Final[re.Pattern[str]] = re.compile(r"^#EXTINF:\s*([0-9]+(?:\.[0-9]+)?)")
+_BYTERANGE_REGEX: Final[re.Pattern[str]] = re.compile(r"^(\d+)(?:@(\d+))?$")
+
+
+class HLSPlaylistError(Exception):
+    """Raised when a playlist cannot be fetched as a plain, unencrypted HLS media playlist."""
+
+
+@dataclass(frozen=True, slots=True)
+class HLSVariant:
+    url: str
+    bandwidth: int | None = None
+    width: int | None = None
+    height: int | None = None
+    audio_group: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class HLSMasterPlaylist:
+    variants: tuple[HLSVariant, ...]
+    # GROUP-ID -> playlist URL of the first audio rendition in that group.
+    audio_groups: dict[str, str] = field(default_factory=dict)
+
+    def audio_url_for(self, variant: HLSVariant) -> str | None:
+        if variant.audio_group and variant.audio_group in self.audio_groups:
+            return self.audio_groups[variant.audio_group]
+        return next(iter(self.audio_groups.values()), None)
+
+
+@dataclass(frozen=True, slots=True)
+class HLSSegment:
+    url: str
+    duration: float
+    # (offset, length) for EXT-X-BYTERANGE segments.
+    byte_range: tuple[int, int] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class HLSMediaPlaylist:
+    segments: tuple[HLSSegment, ...]
+
+    @property
+    def duration(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+    @property
+    def duration_seconds(self) -> int | None:
+        if not self.duration:
+            return None
+        return max(1, int(self.duration + 0.5))
+
+
+def is_hls_url(url: str) -> bool:
+    return urlparse(url).path.casefold().endswith(".m3u8")
+
+
+def _join_url(base_url: str, uri: str) -> str:
+    return urldefrag(urljoin(base_url, uri.strip()))[0]
+
+
+def _parse_attributes(line: str) -> dict[str, str]:
+    _, _, attributes = line.partition(":")
+    return {key: value.strip('"') for key, value in _ATTRIBUTE_REGEX.findall(attributes)}
+
+
+def _parse_int(value: str | None) -> int | None:
+    if value is None or not value.isdigit():
+        return None
+    return int(value)
+
+
+def _parse_byte_range(value: str | None, next_offset: int) -> tuple[int, int] | None:
+    match = _BYTERANGE_REGEX.match(value or "")
+    if not match:
+        return None
+    length = int(match.group(1))
+    offset = int(match.group(2)) if match.group(2) else next_offset
+    return offset, length
+
+
+def parse_master_playlist(text: str, playlist_url: str) -> HLSMasterPlaylist | None:
+    """Parse the variant streams and audio renditions of a master playlist, with URLs made absolute."""
+    variants: list[HLSVariant] = []
+    audio_groups: dict[str, str] = {}
+    stream_info: dict[str, str] | None = None
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-MEDIA:"):
+            attributes = _parse_attributes(line)
+            group_id = attributes.get("GROUP-ID")
+            uri = attributes.get("URI")
+            if attributes.get("TYPE") == "AUDIO" and group_id and uri:
+                audio_groups.setdefault(group_id, _join_url(playlist_url, uri))
+            continue
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            stream_info = _parse_attributes(line)
+            continue
+        if line.startswith("#") or stream_info is None:
+            continue
+
+        width = height = None
+        if resolution := _RESOLUTION_REGEX.match(stream_info.get("RESOLUTION", "")):
+            width, height = int(resolution.group(1)), int(resolution.group(2))
+        variants.append(
+            HLSVariant(
+                url=_join_url(playlist_url, line),
+                bandwidth=_parse_int(stream_info.get("BANDWIDTH")),
+                width=width,
+                height=height,
+                audio_group=stream_info.get("AUDIO"),
+            )
+        )
+        stream_info = None
+
+    if not variants:
+        return None
+    return HLSMasterPlaylist(variants=tuple(variants), audio_groups=audio_groups)
+
+
+def parse_media_playlist(text: str, playlist_url: str) -> HLSMediaPlaylist | None:
+    """Parse the segments of a media playlist in playback order.
+
+    An EXT-X-MAP initialization section is emitted as a zero-length segment ahead of the media segments it
+    applies to. Returns None for master playlists, encrypted playlists and playlists without segments.
+    """
+    segments: list[HLSSegment] = []
+    segment_duration: float | None = None
+    byte_range: str | None = None
+    next_offsets: dict[str, int] = {}
+    current_map: HLSSegment | None = None
+    has_media_segments = False
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            return None
+        if line.startswith("#EXT-X-KEY:"):
+            if _parse_attributes(line).get("METHOD", "NONE") != "NONE":
+                return None
+            continue
+        if line.startswith("#EXT-X-MAP:"):
+            attributes = _parse_attributes(line)
+            if uri := attributes.get("URI"):
+                map_url = _join_url(playlist_url, uri)
+                map_segment = HLSSegment(map_url, 0.0, _parse_byte_range(attributes.get("BYTERANGE"), 0))
+                if map_segment != current_map:
+                    segments.append(map_segment)
+                    current_map = map_segment
+            continue
+        if match := _EXTINF_REGEX.match(line):
+            segment_duration = float(match.group(1))
+            continue
+        if line.startswith("#EXT-X-BYTERANGE:"):
+            byte_range = line.partition(":")[2]
+            continue
+        if line.startswith("#"):
+            continue
+
+        segment_url = _join_url(playlist_url, line)
+        segment_range = _parse_byte_range(byte_range, next_offsets.get(segment_url, 0))
+        if segment_range:
+            next_offsets[segment_url] = segment_range[0] + segment_range[1]
+        segments.append(HLSSegment(segment_url, segment_duration or 0.0, segment_range))
+        has_media_segments = True
+        segment_duration = None
+        byte_range = None
+
+    if not has_media_segments:
+        return None
+    return HLSMediaPlaylist(segments=tuple(segments))
+
+
+def choose_variant(
+    variants: Sequence[HLSVariant], *, duration: float | None, max_bytes: int | None
+) -> HLSVariant | None:
+    """Pick the highest-bandwidth variant whose estimated size, BANDWIDTH x duration, fits in `max_bytes`.
+
+    Falls back to the lowest-bandwidth variant when none fits, and to the highest one when the duration or
+    budget is unknown.
+    """
+    ranked = sorted(variants, key=lambda variant: variant.bandwidth or 0, reverse=True)
+    if not ranked:
+        return None
+    if not duration or not max_bytes:
+        return ranked[0]
+
+    for variant in ranked:
+        if variant.bandwidth and variant.bandwidth * duration / 8 <= max_bytes:
+            return variant
+    return ranked[-1]
+
+
+async def fetch_playlist_text(
+    url: str, *, headers: dict[str, str], request_timeout: aiohttp.ClientTimeout, cookies: dict[str, str] | None = None
+) -> str:
+    session = await HTTPClient.get_session()
+    async with session.get(url, headers=headers, cookies=cookies, timeout=request_timeout) as response:
+        response.raise_for_status()
+        return await response.text()
+
+
+async def fetch_media_playlist(
+    url: str, *, headers: dict[str, str], request_timeout: aiohttp.ClientTimeout, cookies: dict[str, str] | None = None
+) -> HLSMediaPlaylist:
+    text = await fetch_playlist_text(url, headers=headers, request_timeout=request_timeout, cookies=cookies)
+    playlist = parse_media_playlist(text, url)
+    if playlist is None:
+        msg = f"Unsupported HLS media playlist: {url}"
+        raise HLSPlaylistError(msg)
+    return playlist
+
+
+async def _fetch_segment(
+    session: aiohttp.ClientSession,
+    segment: HLSSegment,
+    *,
+    headers: dict[str, str],
+    request_timeout: aiohttp.ClientTimeout,
+    cookies: dict[str, str] | None,
+) -> bytes:
+    if segment.byte_range:
+        offset, length = segment.byte_range
+        headers = {**headers, "Range": f"bytes={offset}-{offset + length - 1}"}
+
+    async with session.get(segment.url, headers=headers, cookies=cookies, timeout=request_timeout) as response:
+        response.raise_for_status()
+        return await response.read()
+
+
+async def iter_hls_segments(
+    playlist: HLSMediaPlaylist,
+    *,
+    headers: dict[str, str],
+    request_timeout: aiohttp.ClientTimeout,
+    cookies: dict[str, str] | None = None,
+    window: int | None = None,
+) -> AsyncGenerator[bytes]:
+    """Yield the segment payloads of `playlist` in order while fetching up to `window` of them concurrently.
+
+    Segments share the `HTTPClient` connector, so the window also bounds the connections used per stream.
+    Close the generator (e.g. with `contextlib.aclosing`) to cancel fetches still in flight.
+    """
+    session = await HTTPClient.get_session()
+    window = window or CONFIG.media_hls_segment_window
+    segments = iter(playlist.segments)
+
+    def schedule(segment: HLSSegment) -> asyncio.Task[bytes]:
+        return asyncio.create_task(
+            _fetch_segment(session, segment, headers=headers, request_timeout=request_timeout, cookies=cookies)
+        )
+
+    pending: deque[asyncio.Task[bytes]] = deque(schedule(segment) for segment in islice(segments, window))
+    try:
+        while pending:
+            payload = await pending.popleft()
+            if (segment := next(segments, None)) is not None:
+                pending.append(schedule(segment))
+            yield payload
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,173 @@
+import asyncio
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .processing import MediaJob
+
+
+@dataclass(slots=True)
+class ProviderQueueStats:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    dropped: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    @property
+    def wait_avg(self) -> float:
+        started = self.completed + self.running
+        return self.wait_total / started if started else 0.0
+
+
+@dataclass(slots=True)
+class MediaQueueStats:
+    providers: dict[str, ProviderQueueStats] = field(default_factory=dict)
+
+    def provider(self, name: str) -> ProviderQueueStats:
+        return self.providers.setdefault(name, ProviderQueueStats())
+
+
+queue_stats = MediaQueueStats()
+
+
+class FairJobQueue:
+    """Bounded job queue that serves chats round-robin.
+
+    Jobs that can be answered from the post cache go to a separate lane that is always served first. A chat
+    never has more than `per_chat_limit` jobs running, and when the queue is full the newest job of the chat
+    with the most queued jobs is dropped to make room, so one noisy chat cannot lock the others out.
+    """
+
+    def __init__(self, *, max_pending: int, per_chat_limit: int) -> None:
+        self.max_pending = max_pending
+        self.per_chat_limit = per_chat_limit
+        self._lanes: tuple[OrderedDict[int, deque[MediaJob]], OrderedDict[int, deque[MediaJob]]] = (
+            OrderedDict(),
+            OrderedDict(),
+        )
+        self._queued: Counter[int] = Counter()
+        self._running: Counter[int] = Counter()
+        self._size = 0
+        self._changed = asyncio.Condition()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def running(self) -> int:
+        return self._running.total()
+
+    async def put(self, job: MediaJob) -> MediaJob | None:
+        """Queue `job` and return the job dropped to make room for it, which may be `job` itself."""
+        dropped: MediaJob | None = None
+        if self._size >= self.max_pending:
+            dropped = self._evict_for(job.chat_id)
+            if dropped is None:
+                queue_stats.provider(job.provider).dropped += 1
+                return job
+
+        lane = self._lanes[0 if job.priority else 1]
+        lane.setdefault(job.chat_id, deque()).append(job)
+        self._queued[job.chat_id] += 1
+        self._size += 1
+        self._idle.clear()
+        queue_stats.provider(job.provider).queued += 1
+
+        async with self._changed:
+            self._changed.notify()
+        return dropped
+
+    async def get(self) -> MediaJob:
+        async with self._changed:
+            while (job := self._pop_next()) is None:
+                await self._changed.wait()
+
+        wait = perf_counter() - job.queued_at
+        stats = queue_stats.provider(job.provider)
+        stats.queued -= 1
+        stats.running += 1
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        return job
+
+    async def task_done(self, job: MediaJob) -> None:
+        self._running[job.chat_id] -= 1
+        if self._running[job.chat_id] <= 0:
+            del self._running[job.chat_id]
+
+        stats = queue_stats.provider(job.provider)
+        stats.running -= 1
+        stats.completed += 1
+        if not self._size and not self._running:
+            self._idle.set()
+
+        async with self._changed:
+            self._changed.notify()
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished."""
+        await self._idle.wait()
+
+    def drain(self) -> list[MediaJob]:
+        """Remove and return every job that has not started yet."""
+        jobs = [job for lane in self._lanes for chat_jobs in lane.values() for job in chat_jobs]
+        for lane in self._lanes:
+            lane.clear()
+        self._queued.clear()
+        self._size = 0
+        if not self._running:
+            self._idle.set()
+        for job in jobs:
+            stats = queue_stats.provider(job.provider)
+            stats.queued -= 1
+            stats.dropped += 1
+        return jobs
+
+    def _pop_next(self) -> MediaJob | None:
+        for lane in self._lanes:
+            # Rotate through the chats of the lane, skipping those already at their running limit.
+            for chat_id in tuple(lane):
+                chat_jobs = lane.pop(chat_id)
+                if self._running[chat_id] >= self.per_chat_limit:
+                    lane[chat_id] = chat_jobs
+                    continue
+
+                job = chat_jobs.popleft()
+                if chat_jobs:
+                    lane[chat_id] = chat_jobs
+                self._queued[chat_id] -= 1
+                if self._queued[chat_id] <= 0:
+                    del self._queued[chat_id]
+                self._running[chat_id] += 1
+                self._size -= 1
+                return job
+        return None
+
+    def _evict_for(self, chat_id: int) -> MediaJob | None:
+        victim_chat, victim_queued = self._queued.most_common(1)[0]
+        if victim_queued <= self._queued[chat_id] + 1:
+            return None
+
+        for lane in reversed(self._lanes):
+            if chat_jobs := lane.get(victim_chat):
+                job = chat_jobs.pop()
+                if not chat_jobs:
+                    del lane[victim_chat]
+                break
+        else:
+            return None
+
+        self._queued[victim_chat] -= 1
+        if self._queued[victim_chat] <= 0:
+            del self._queued[victim_chat]
+        self._size -= 1
+        stats = queue_stats.provider(job.provider)
+        stats.queued -= 1
+        stats.dropped += 1
+        return job
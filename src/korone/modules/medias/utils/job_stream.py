@@ -0,0 +1,208 @@
+import asyncio
+import importlib
+import os
+import socket
+from functools import partial
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Final, cast
+
+import orjson
+from aiogram.types import Message
+from redis.exceptions import RedisError, ResponseError
+
+from korone import aredis
+from korone.config import CONFIG
+from korone.logger import get_logger
+from korone.utils.i18n import i18n
+
+from .processing import MediaJob, media_source_id
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import TelegramObject
+    from redis.typing import EncodableT, FieldT
+
+    from .processing import MediaHandler, MediaProcessingManager
+
+logger = get_logger(__name__)
+
+MEDIA_JOB_STREAM: Final[str] = "korone:media:jobs"
+MEDIA_JOB_GROUP: Final[str] = "media-workers"
+_STREAM_MAX_LENGTH: Final[int] = 10000
+_READ_BLOCK_MS: Final[int] = 5000
+_CAPACITY_POLL_SECONDS: Final[float] = 0.5
+_READ_ERROR_BACKOFF_SECONDS: Final[float] = 5.0
+_HANDLER_MODULE_PREFIX: Final[str] = "korone.modules.medias.handlers."
+
+type StreamEntry = tuple[bytes, dict[bytes, bytes]]
+
+
+async def publish_job(job: MediaJob) -> bool:
+    """Hand `job` to the worker processes, returning False when it has to run locally instead."""
+    if job.handler_ref is None or not isinstance(job.event, Message):
+        return False
+
+    fields: dict[FieldT, EncodableT] = {
+        "handler": job.handler_ref,
+        "event": job.event.model_dump_json(exclude_none=True),
+        "media_urls": orjson.dumps(job.data.get("media_urls") or [job.source_url]),
+        "locale": i18n.current_locale,
+        "provider": job.provider,
+        "priority": int(job.priority),
+        "canonical_key": job.canonical_key or "",
+    }
+    try:
+        await aredis.xadd(MEDIA_JOB_STREAM, fields, maxlen=_STREAM_MAX_LENGTH, approximate=True)
+    except RedisError as error:
+        await logger.awarning(
+            "[Medias] Could not publish job to workers; processing locally",
+            handler=job.handler_name,
+            source_id=job.source_id,
+            error_type=type(error).__name__,
+        )
+        return False
+
+    await logger.adebug("[Medias] Job published to workers", handler=job.handler_name, source_id=job.source_id)
+    return True
+
+
+def _resolve_handler(handler_ref: str) -> type[Any]:
+    module_name, _, qualname = handler_ref.partition(":")
+    if not module_name.startswith(_HANDLER_MODULE_PREFIX):
+        msg = f"Refusing to load media handler outside {_HANDLER_MODULE_PREFIX}: {handler_ref}"
+        raise ValueError(msg)
+
+    return getattr(importlib.import_module(module_name), qualname)
+
+
+def _make_handler(handler_cls: type[Any], locale: str) -> MediaHandler:
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> None:
+        with i18n.context(), i18n.use_locale(locale):
+            await handler_cls(event, **data)
+
+    return handler
+
+
+class MediaStreamConsumer:
+    """Feeds media jobs from the Redis stream into a local processing manager.
+
+    Entries are acknowledged once their job finishes or is dropped. Entries left unacknowledged by a worker
+    that died are claimed again after `media_stream_claim_idle_seconds`, up to `media_stream_max_deliveries`
+    times; the per-post processing lock keeps a reclaimed job from being sent twice.
+    """
+
+    def __init__(self, manager: MediaProcessingManager, bot: Bot) -> None:
+        self._manager = manager
+        self._bot = bot
+        self._consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self._capacity = CONFIG.media_max_concurrent_jobs * 2
+
+    async def run(self) -> None:
+        await self._ensure_group()
+        await logger.ainfo("[Medias] Stream consumer started", stream=MEDIA_JOB_STREAM, consumer=self._consumer)
+        while True:
+            free = self._capacity - self._manager.pending_jobs
+            if free <= 0:
+                await asyncio.sleep(_CAPACITY_POLL_SECONDS)
+                continue
+
+            try:
+                entries = await self._claim_abandoned(free) or await self._read_new(free)
+            except RedisError as error:
+                await logger.awarning("[Medias] Stream read failed", error_type=type(error).__name__)
+                await asyncio.sleep(_READ_ERROR_BACKOFF_SECONDS)
+                continue
+
+            for entry_id, fields in entries:
+                await self._dispatch(entry_id, fields)
+
+    @staticmethod
+    async def _ensure_group() -> None:
+        try:
+            await aredis.xgroup_create(MEDIA_JOB_STREAM, MEDIA_JOB_GROUP, id="0", mkstream=True)
+        except ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    async def _read_new(self, count: int) -> list[StreamEntry]:
+        response = await aredis.xreadgroup(
+            MEDIA_JOB_GROUP, self._consumer, {MEDIA_JOB_STREAM: ">"}, count=count, block=_READ_BLOCK_MS
+        )
+        streams = cast("list[tuple[bytes, list[StreamEntry]]] | None", response)
+        return [entry for _, entries in streams or () for entry in entries]
+
+    async def _claim_abandoned(self, count: int) -> list[StreamEntry]:
+        _, entries, *_ = await aredis.xautoclaim(
+            MEDIA_JOB_STREAM,
+            MEDIA_JOB_GROUP,
+            self._consumer,
+            min_idle_time=CONFIG.media_stream_claim_idle_seconds * 1000,
+            count=count,
+        )
+        claimed: list[StreamEntry] = []
+        for entry_id, fields in entries:
+            pending = await aredis.xpending_range(MEDIA_JOB_STREAM, MEDIA_JOB_GROUP, entry_id, entry_id, 1)
+            deliveries = int(pending[0]["times_delivered"]) if pending else 1
+            if deliveries > CONFIG.media_stream_max_deliveries:
+                await logger.awarning(
+                    "[Medias] Dropping job after repeated abandoned deliveries",
+                    entry_id=entry_id.decode(),
+                    deliveries=deliveries,
+                )
+                await self._ack(entry_id)
+                continue
+
+            await logger.ainfo("[Medias] Reclaimed abandoned job", entry_id=entry_id.decode(), deliveries=deliveries)
+            claimed.append((entry_id, fields))
+        return claimed
+
+    async def _dispatch(self, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        try:
+            handler_ref = fields[b"handler"].decode()
+            handler_cls = _resolve_handler(handler_ref)
+            event = Message.model_validate_json(fields[b"event"]).as_(self._bot)
+            media_urls = [url for url in orjson.loads(fields[b"media_urls"]) if isinstance(url, str)]
+            locale = fields[b"locale"].decode()
+            provider = fields[b"provider"].decode()
+            priority = fields[b"priority"] == b"1"
+            canonical_key = fields.get(b"canonical_key", b"").decode() or None
+        except (KeyError, ValueError, AttributeError, ImportError) as error:
+            await logger.aerror("[Medias] Dropping malformed stream job", entry_id=entry_id.decode(), error=str(error))
+            await self._ack(entry_id)
+            return
+
+        if not media_urls:
+            await self._ack(entry_id)
+            return
+
+        source_url = media_urls[0]
+        job = MediaJob(
+            handler=_make_handler(handler_cls, locale),
+            event=event,
+            data={
+                "bot": self._bot,
+                "media_urls": media_urls,
+                "event_chat": event.chat,
+                "event_from_user": event.from_user,
+            },
+            handler_name=handler_cls.__name__,
+            source_url=source_url,
+            source_id=media_source_id(source_url),
+            queued_at=perf_counter(),
+            chat_id=event.chat.id,
+            provider=provider,
+            priority=priority,
+            canonical_key=canonical_key,
+            has_cached_post=partial(handler_cls.has_cached_post, source_url),
+            on_done=lambda: self._ack(entry_id),
+        )
+        await self._manager.submit(job)
+
+    @staticmethod
+    async def _ack(entry_id: bytes) -> None:
+        try:
+            await aredis.xack(MEDIA_JOB_STREAM, MEDIA_JOB_GROUP, entry_id)
+        except RedisError as error:
+            await logger.awarning(
+                "[Medias] Could not acknowledge stream job", entry_id=entry_id.decode(), error_type=type(error).__name__
+            )
@@ -1,10 +1,16 @@
+import math
 from io import BytesIO
 from typing import Final
 
-from PIL import Image, ImageOps
+from PIL import ExifTags, Image, ImageOps
 
-DEFAULT_QUALITY_STEPS: Final[tuple[int, ...]] = (88, 76, 64, 52, 40)
+from korone.modules.utils_.image_probe import TRANSPOSED_EXIF_ORIENTATIONS, probe_image
+
+DEFAULT_MAX_QUALITY: Final[int] = 88
+DEFAULT_MIN_QUALITY: Final[int] = 40
 DEFAULT_MAX_PASSES: Final[int] = 6
+_MAX_ENCODES_PER_PASS: Final[int] = 4
+_QUALITY_TOLERANCE: Final[int] = 4
 
 
 def _target_photo_dimensions(
@@ -67,44 +73,92 @@ def _constrain_photo_dimensions(image: Image.Image, *, max_dimensions_sum: int,
     return constrained
 
 
+def _oriented_size(image: Image.Image) -> tuple[int, int]:
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_EXIF_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
 def photo_payload_needs_resize(payload: bytes, *, max_dimensions_sum: int, max_aspect_ratio: int) -> bool:
-    try:
-        with Image.open(BytesIO(payload)) as source_image:
-            base = ImageOps.exif_transpose(source_image)
-            try:
-                width, height = base.size
-                if width < 1 or height < 1:
-                    return True
+    # Only the header is parsed here; pixel data is not decoded.
+    if probe := probe_image(payload):
+        width, height = probe.oriented_size
+    else:
+        try:
+            with Image.open(BytesIO(payload)) as source_image:
+                width, height = _oriented_size(source_image)
+        except OSError, ValueError:
+            return True
 
-                target_width, target_height = _target_photo_dimensions(
-                    width, height, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio
-                )
-                return (target_width, target_height) != (width, height)
-            finally:
-                if base is not source_image:
-                    base.close()
-    except OSError, ValueError:
+    if width < 1 or height < 1:
         return True
 
+    target_width, target_height = _target_photo_dimensions(
+        width, height, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio
+    )
+    return (target_width, target_height) != (width, height)
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=False, progressive=False)
+    return buffer.getvalue()
+
+
+def _search_quality(
+    image: Image.Image, *, safe_limit_bytes: int, min_quality: int, max_quality: int, max_encodes: int
+) -> tuple[bytes | None, bytes]:
+    """Find a high quality that fits `safe_limit_bytes`, returning the fitting encode and the smallest one.
 
-def _encode_candidate_jpeg(
-    image: Image.Image, *, safe_limit_bytes: int, quality_steps: tuple[int, ...], best: bytes | None
-) -> tuple[bytes | None, bytes | None, bytes | None]:
-    smallest_for_pass: bytes | None = None
+    JPEG size grows roughly exponentially with quality, so after probing both ends the next quality is
+    interpolated on log-size; at most `max_encodes` encodes are spent per image size.
+    """
+    high = _encode_jpeg(image, max_quality)
+    if len(high) <= safe_limit_bytes:
+        return high, high
 
-    for quality in quality_steps:
-        buffer = BytesIO()
-        image.save(buffer, format="JPEG", quality=quality, optimize=False, progressive=False)
-        encoded = buffer.getvalue()
+    low = _encode_jpeg(image, min_quality)
+    if len(low) > safe_limit_bytes:
+        return None, low
 
-        if best is None or len(encoded) < len(best):
-            best = encoded
-        if smallest_for_pass is None or len(encoded) < len(smallest_for_pass):
-            smallest_for_pass = encoded
+    low_quality, low_size, fitting = min_quality, len(low), low
+    high_quality, high_size = max_quality, len(high)
+    for _ in range(max_encodes - 2):
+        if high_quality - low_quality <= _QUALITY_TOLERANCE:
+            break
+
+        position = (math.log(safe_limit_bytes) - math.log(low_size)) / (math.log(high_size) - math.log(low_size))
+        quality = round(low_quality + (high_quality - low_quality) * position)
+        quality = max(low_quality + 1, min(high_quality - 1, quality))
+        encoded = _encode_jpeg(image, quality)
         if len(encoded) <= safe_limit_bytes:
-            return encoded, smallest_for_pass, best
+            low_quality, low_size, fitting = quality, len(encoded), encoded
+        else:
+            high_quality, high_size = quality, len(encoded)
+
+    return fitting, low
+
 
-    return None, smallest_for_pass, best
+def _open_rgb_base(source_image: Image.Image, *, max_dimensions_sum: int, max_aspect_ratio: int) -> Image.Image:
+    width, height = _oriented_size(source_image)
+    target_width, target_height = _target_photo_dimensions(
+        width, height, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio
+    )
+    if (width, height) != source_image.size:
+        target_width, target_height = target_height, target_width
+    # Let the JPEG decoder downscale by a power of two while staying at or above the target size.
+    source_image.draft("RGB", (target_width, target_height))
+
+    base = ImageOps.exif_transpose(source_image)
+    if base.mode not in {"RGB", "L"}:
+        rgba = base.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, "white")
+        background.alpha_composite(rgba)
+        return background.convert("RGB")
+    if base.mode == "L":
+        return base.convert("RGB")
+    return base
 
 
 def compress_photo_payload_to_safe_jpeg(
@@ -113,63 +167,54 @@ def compress_photo_payload_to_safe_jpeg(
     safe_limit_bytes: int,
     max_dimensions_sum: int,
     max_aspect_ratio: int,
-    quality_steps: tuple[int, ...] = DEFAULT_QUALITY_STEPS,
+    min_quality: int = DEFAULT_MIN_QUALITY,
+    max_quality: int = DEFAULT_MAX_QUALITY,
     max_passes: int = DEFAULT_MAX_PASSES,
 ) -> bytes | None:
-    best: bytes | None = None
-
     with Image.open(BytesIO(payload)) as source_image:
-        base = ImageOps.exif_transpose(source_image)
-        if base.mode not in {"RGB", "L"}:
-            rgba = base.convert("RGBA")
-            background = Image.new("RGBA", rgba.size, "white")
-            background.alpha_composite(rgba)
-            base = background.convert("RGB")
-        elif base.mode == "L":
-            base = base.convert("RGB")
-
-        constrained_base = _constrain_photo_dimensions(
-            base, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio
-        )
-        try:
-            base_width, base_height = constrained_base.size
-            if base_width < 1 or base_height < 1:
+        base = _open_rgb_base(source_image, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio)
+
+    constrained_base = _constrain_photo_dimensions(
+        base, max_dimensions_sum=max_dimensions_sum, max_aspect_ratio=max_aspect_ratio
+    )
+    try:
+        base_width, base_height = constrained_base.size
+        if base_width < 1 or base_height < 1:
+            return None
+
+        width, height = base_width, base_height
+        for _ in range(max_passes):
+            if width == base_width and height == base_height:
+                candidate_image = constrained_base
+            else:
+                candidate_image = constrained_base.resize((width, height), Image.Resampling.LANCZOS)
+
+            try:
+                encoded, smallest = _search_quality(
+                    candidate_image,
+                    safe_limit_bytes=safe_limit_bytes,
+                    min_quality=min_quality,
+                    max_quality=max_quality,
+                    max_encodes=_MAX_ENCODES_PER_PASS,
+                )
+            finally:
+                if candidate_image is not constrained_base:
+                    candidate_image.close()
+
+            if encoded is not None:
+                return encoded
+
+            # Size scales with pixel count, so shrink both sides by the square root of the overshoot.
+            shrink = max(0.3, min(0.9, (safe_limit_bytes / len(smallest)) ** 0.5 * 0.95))
+            next_width = max(1, int(width * shrink))
+            next_height = max(1, int(height * shrink))
+            if (next_width, next_height) == (width, height):
                 return None
 
-            width, height = base_width, base_height
-            for _ in range(max_passes):
-                if width == base_width and height == base_height:
-                    candidate_image = constrained_base
-                else:
-                    candidate_image = constrained_base.resize((width, height), Image.Resampling.LANCZOS)
-
-                try:
-                    encoded, smallest_for_pass, best = _encode_candidate_jpeg(
-                        candidate_image, safe_limit_bytes=safe_limit_bytes, quality_steps=quality_steps, best=best
-                    )
-                finally:
-                    if candidate_image is not constrained_base:
-                        candidate_image.close()
-
-                if encoded is not None:
-                    return encoded
-                if not smallest_for_pass:
-                    break
-
-                ratio = safe_limit_bytes / len(smallest_for_pass)
-                if ratio >= 1:
-                    break
-
-                shrink = max(0.55, min(0.9, (ratio**0.5) * 0.97))
-                next_width = max(1, int(width * shrink))
-                next_height = max(1, int(height * shrink))
-                if next_width == width and next_height == height:
-                    next_width = max(1, int(width * 0.9))
-                    next_height = max(1, int(height * 0.9))
-
-                width, height = next_width, next_height
-        finally:
-            if constrained_base is not base:
-                constrained_base.close()
-
-    return best if best and len(best) <= safe_limit_bytes else None
+            width, height = next_width, next_height
+    finally:
+        if constrained_base is not base:
+            constrained_base.close()
+        base.close()
+
+    return None
@@ -2,22 +2,28 @@ from typing import TYPE_CHECKING
 
 from korone.constants import TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaPost
+from korone.modules.medias.utils.types import ResolvedPost
 
 from . import client, parser
 from .constants import PATTERN
 
 if TYPE_CHECKING:
-    from korone.modules.medias.utils.types import MediaItem, MediaSource
+    from korone.modules.medias.utils.types import MediaItem
 
 
 class BlueskyProvider(MediaProvider):
     name = "Bluesky"
     website = "Bluesky"
     pattern = PATTERN
+    url_hints = ("bsky.app/",)
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    def extract_post_id(cls, url: str) -> str | None:
+        handle, rkey = parser.extract_handle_and_rkey(url, cls.pattern)
+        return f"{handle.casefold()}/{rkey}" if handle and rkey else None
+
+    @classmethod
+    async def resolve(cls, url: str) -> ResolvedPost | None:
         handle, rkey = parser.extract_handle_and_rkey(url, cls.pattern)
         if not handle or not rkey:
             return None
@@ -51,21 +57,21 @@ class BlueskyProvider(MediaProvider):
                 return None
 
         media_sources = parser.extract_media_sources(embed_view, embed_type, effective_did, pds_url)
-        media = await cls._download_media(media_sources)
-        if not media:
+        if not media_sources:
             return None
 
-        return MediaPost(
+        return ResolvedPost(
+            post_id=f"{handle.casefold()}/{rkey}",
             author_name=author_name or author_handle or "Bluesky",
             author_handle=author_handle or handle,
             text=text,
             url=post_url,
             website=cls.website,
-            media=media,
+            sources=media_sources,
         )
 
     @classmethod
-    async def _download_media(cls, sources: list[MediaSource]) -> list[MediaItem]:
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
         return await cls.download_media(
-            sources, filename_prefix="bsky_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="Bluesky"
+            post.sources, filename_prefix="bsky_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="Bluesky"
         )
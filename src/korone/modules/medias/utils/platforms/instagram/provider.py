@@ -1,20 +1,30 @@
+from typing import TYPE_CHECKING
+
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaPost, MediaSource
+from korone.modules.medias.utils.types import MediaSource, ResolvedPost
+
+if TYPE_CHECKING:
+    from korone.modules.medias.utils.types import MediaItem
 
 from . import client, parser
-from .constants import PATTERN, POST_PATTERN
+from .constants import PATTERN
 
 
 class InstagramProvider(MediaProvider):
     name = "Instagram"
     website = "Instagram"
     pattern = PATTERN
-    post_pattern = POST_PATTERN
+    url_hints = ("instagram.com/", "instagram7.com/")
+
+    @classmethod
+    def extract_post_id(cls, url: str) -> str | None:
+        return parser.extract_post_id(url)
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    async def resolve(cls, url: str) -> ResolvedPost | None:
         normalized_url = parser.ensure_url_scheme(url)
-        if not cls.post_pattern.search(normalized_url):
+        post_id = parser.extract_post_id(normalized_url)
+        if not post_id:
             return None
 
         instafix_url = parser.build_instafix_url(normalized_url)
@@ -25,19 +35,23 @@ class InstagramProvider(MediaProvider):
         sources = [
             MediaSource(kind=media.kind, url=media.url, thumbnail_url=media.thumbnail_url) for media in data.media
         ]
-        media_items = await cls.download_media(sources, filename_prefix="instagram")
-        if not media_items:
+        if not sources:
             return None
 
         author_name = data.username or "Instagram"
         author_handle = data.username or "instagram"
         post_url = parser.build_post_url(normalized_url)
 
-        return MediaPost(
+        return ResolvedPost(
+            post_id=post_id,
             author_name=author_name,
             author_handle=author_handle,
             text=data.description or "",
             url=post_url,
             website=cls.website,
-            media=media_items,
+            sources=sources,
         )
+
+    @classmethod
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
+        return await cls.download_media(post.sources, filename_prefix="instagram")
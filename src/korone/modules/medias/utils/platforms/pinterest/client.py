@@ -4,6 +4,7 @@ import aiohttp
 
 from korone.logger import get_logger
 from korone.utils.aiohttp_session import HTTPClient
+from korone.utils.host_limiter import HostCircuitOpenError
 
 from .constants import (
     MAX_REDIRECTS,
@@ -47,6 +48,9 @@ async def resolve_pin_url(url: str, *, headers: dict[str, str], short_id: str |
                     return None
 
                 return str(response.url)
+        except HostCircuitOpenError as error:
+            await logger.adebug("[Pinterest] Host unavailable", error=str(error), source_url=url)
+            return None
         except (TimeoutError, aiohttp.ClientError) as error:
             if attempt < REQUEST_RETRY_ATTEMPTS:
                 await _sleep_before_retry(attempt)
@@ -74,6 +78,9 @@ async def fetch_pin_page(post_id: str, *, headers: dict[str, str]) -> str | None
                     return None
 
                 return await response.text()
+        except HostCircuitOpenError as error:
+            await logger.adebug("[Pinterest] Host unavailable", error=str(error), post_id=post_id)
+            return None
         except (TimeoutError, aiohttp.ClientError, UnicodeDecodeError) as error:
             if attempt < REQUEST_RETRY_ATTEMPTS:
                 await _sleep_before_retry(attempt)
@@ -9,7 +9,7 @@ from aiogram.types import BufferedInputFile
 from korone.constants import TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
 from korone.logger import get_logger
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaItem, MediaKind, MediaPost
+from korone.modules.medias.utils.types import MediaItem, MediaKind, ResolvedPost
 from korone.modules.utils_.file_id_cache import get_cached_file_payload
 
 from . import client, parser
@@ -27,6 +27,7 @@ class PinterestProvider(MediaProvider):
     name = "Pinterest"
     website = "Pinterest"
     pattern = PATTERN
+    url_hints = ("pinterest.", "pin.it/")
     _DEFAULT_TIMEOUT = PINTEREST_TIMEOUT
     _PAGE_HEADERS: ClassVar[dict[str, str]] = {
         **MediaProvider._DEFAULT_HEADERS,
@@ -34,18 +35,24 @@ class PinterestProvider(MediaProvider):
     }
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
-        post_id = parser.extract_post_id(url)
-        if not post_id:
-            resolved_url = await client.resolve_pin_url(
-                url, headers=cls._PAGE_HEADERS, short_id=parser.extract_shortener_id(url)
-            )
-            if not resolved_url:
-                return None
+    def extract_post_id(cls, url: str) -> str | None:
+        return parser.extract_post_id(url)
 
-            post_id = parser.extract_post_id(resolved_url)
-            if not post_id:
-                return None
+    @classmethod
+    async def resolve_short_link(cls, url: str) -> str | None:
+        resolved_url = await client.resolve_pin_url(
+            url, headers=cls._PAGE_HEADERS, short_id=parser.extract_shortener_id(url)
+        )
+        if not resolved_url:
+            return None
+
+        return parser.extract_post_id(resolved_url)
+
+    @classmethod
+    async def resolve(cls, url: str) -> ResolvedPost | None:
+        post_id = await cls.resolve_post_id(url)
+        if not post_id:
+            return None
 
         html_content = await client.fetch_pin_page(post_id, headers=cls._PAGE_HEADERS)
         if not html_content:
@@ -57,23 +64,27 @@ class PinterestProvider(MediaProvider):
             return None
 
         sources = parser.extract_media_sources(pin_data)
-        media = await cls.download_media(
-            sources,
-            filename_prefix="pinterest_media",
-            max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES,
-            log_label="Pinterest",
-        )
-        if not media:
+        if not sources:
             return None
 
         author_handle = parser.extract_author(pin_data)
-        return MediaPost(
+        return ResolvedPost(
+            post_id=post_id,
             author_name=author_handle or "Pinterest",
             author_handle=author_handle or "pinterest",
             text=parser.extract_text(pin_data),
             url=parser.build_post_url(post_id),
             website=cls.website,
-            media=media,
+            sources=sources,
+        )
+
+    @classmethod
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
+        return await cls.download_media(
+            post.sources,
+            filename_prefix="pinterest_media",
+            max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES,
+            log_label="Pinterest",
         )
 
     @classmethod
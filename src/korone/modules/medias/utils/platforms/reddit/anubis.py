@@ -2,22 +2,103 @@ import asyncio
 import hashlib
 import html
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import parsedate_to_datetime
 from time import perf_counter
-from typing import ClassVar
+from typing import TYPE_CHECKING, ClassVar
 from urllib.parse import parse_qs, urljoin, urlparse
 
 import aiohttp
 import orjson
+from redis.exceptions import RedisError
 
+from korone import aredis
+from korone.config import CONFIG
 from korone.logger import get_logger
 from korone.modules.medias.utils.parsing import coerce_int
 
-from .constants import ANUBIS_PASS_CHALLENGE_PATH, REDLIB_REQUEST_COOKIES
+from .constants import (
+    ANUBIS_COOKIE_DEFAULT_TTL_SECONDS,
+    ANUBIS_COOKIE_KEY_PREFIX,
+    ANUBIS_PASS_CHALLENGE_PATH,
+    ANUBIS_POW_BATCH_SIZE,
+    ANUBIS_POW_TIMEOUT_SECONDS,
+    REDLIB_REQUEST_COOKIES,
+)
 from .types import _AnubisChallengeInfo
 
+if TYPE_CHECKING:
+    from http.cookies import Morsel
+
 logger = get_logger(__name__)
 
 
+def _search_pow_batch(random_data: str, difficulty: int, start: int, count: int) -> tuple[str, int] | None:
+    # Hash the challenge once and copy that state per nonce; comparing raw digest bytes skips hexdigest().
+    prefix = hashlib.sha256(random_data.encode())
+    zero_bytes, half_byte = divmod(difficulty, 2)
+    zeros = bytes(zero_bytes)
+    for nonce in range(start, start + count):
+        candidate = prefix.copy()
+        candidate.update(b"%d" % nonce)
+        digest = candidate.digest()
+        if digest.startswith(zeros) and (not half_byte or digest[zero_bytes] < 0x10):
+            return digest.hex(), nonce
+    return None
+
+
+class ProofOfWorkPool:
+    """Dedicated process pool for the Anubis proof-of-work search.
+
+    Kept apart from `ImagePool` so a long search never holds up sticker and photo jobs. Each search keeps one
+    nonce batch per worker in flight, so at most `anubis_pow_workers` batches keep running after it is cancelled.
+    """
+
+    _executor: ClassVar[ProcessPoolExecutor | None] = None
+
+    @classmethod
+    async def search(cls, random_data: str, difficulty: int, start: int, count: int) -> tuple[str, int] | None:
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=CONFIG.anubis_pow_workers)
+
+        executor = cls._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, _search_pow_batch, random_data, difficulty, start, count
+            )
+        except BrokenProcessPool:
+            if cls._executor is executor:
+                cls._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            await logger.awarning("[Reddit] Proof-of-work process pool broken")
+            raise
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._executor is None:
+            return
+
+        executor, cls._executor = cls._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+def _anubis_cookie_key(url: str) -> str:
+    return f"{ANUBIS_COOKIE_KEY_PREFIX}{urlparse(url).netloc.lower()}"
+
+
+def _morsel_ttl(morsel: Morsel[str]) -> int | None:
+    if max_age := coerce_int(morsel["max-age"]):
+        return max_age
+    if not morsel["expires"]:
+        return None
+    try:
+        return int(parsedate_to_datetime(morsel["expires"]).timestamp() - time.time())
+    except TypeError, ValueError:
+        return None
+
+
 class RedlibAnubisBypassMixin:
     _json_script_regex_template: ClassVar[str]
     _meta_refresh_regex: ClassVar[re.Pattern[str]]
@@ -50,7 +131,7 @@ class RedlibAnubisBypassMixin:
             params = {"id": info.challenge_id, "result": result, "redir": info.redir}
         elif info.algorithm in {"fast", "slow"}:
             started_at = perf_counter()
-            solved = await asyncio.to_thread(cls._solve_pow_challenge, info.random_data, info.difficulty)
+            solved = await cls._solve_pow_challenge(info.random_data, info.difficulty)
             if not solved:
                 await logger.adebug(
                     "[Reddit] Anubis PoW challenge not solved",
@@ -78,7 +159,7 @@ class RedlibAnubisBypassMixin:
                 async with session.get(
                     info.pass_url,
                     headers=headers,
-                    cookies=REDLIB_REQUEST_COOKIES,
+                    cookies=await cls._redlib_cookies(info.pass_url),
                     params=params,
                     allow_redirects=True,
                     timeout=cls._DEFAULT_TIMEOUT,
@@ -101,6 +182,7 @@ class RedlibAnubisBypassMixin:
                         )
                         return None
 
+                    await cls._store_anubis_cookies(challenge_url, response)
                     return {"html": html_content, "base_url": str(response.url)}
             except TimeoutError:
                 if attempt >= 2:
@@ -224,18 +306,81 @@ class RedlibAnubisBypassMixin:
         return path
 
     @classmethod
-    def _solve_pow_challenge(cls, random_data: str, difficulty: int) -> tuple[str, int] | None:
+    async def _solve_pow_challenge(cls, random_data: str, difficulty: int) -> tuple[str, int] | None:
         if difficulty < 0:
             return None
 
-        target_prefix = "0" * difficulty
-        started_at = perf_counter()
-        nonce = 0
+        # Nonce batches are searched on the proof-of-work pool, one per worker, until one of them finds a match.
+        next_start = 0
+        pending: set[asyncio.Task[tuple[str, int] | None]] = set()
+        try:
+            async with asyncio.timeout(ANUBIS_POW_TIMEOUT_SECONDS):
+                while True:
+                    while len(pending) < CONFIG.anubis_pow_workers:
+                        pending.add(
+                            asyncio.create_task(
+                                ProofOfWorkPool.search(random_data, difficulty, next_start, ANUBIS_POW_BATCH_SIZE)
+                            )
+                        )
+                        next_start += ANUBIS_POW_BATCH_SIZE
 
-        while perf_counter() - started_at <= 20.0:
-            digest = hashlib.sha256(f"{random_data}{nonce}".encode()).hexdigest()
-            if digest.startswith(target_prefix):
-                return digest, nonce
-            nonce += 1
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if solved := task.result():
+                            return solved
+        except TimeoutError, BrokenProcessPool:
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
 
-        return None
+    @staticmethod
+    async def _redlib_cookies(url: str) -> dict[str, str]:
+        """Return the Redlib preference cookies plus the Anubis pass cookies cached for the instance of `url`."""
+        try:
+            raw_cookies = await aredis.get(_anubis_cookie_key(url))
+        except RedisError as error:
+            await logger.adebug("[Reddit] Could not read cached Anubis cookies", error_type=type(error).__name__)
+            return REDLIB_REQUEST_COOKIES
+
+        if raw_cookies is None:
+            return REDLIB_REQUEST_COOKIES
+
+        try:
+            cached_cookies = orjson.loads(raw_cookies)
+        except orjson.JSONDecodeError:
+            return REDLIB_REQUEST_COOKIES
+
+        if not isinstance(cached_cookies, dict):
+            return REDLIB_REQUEST_COOKIES
+        return {**REDLIB_REQUEST_COOKIES, **{str(name): str(value) for name, value in cached_cookies.items()}}
+
+    @staticmethod
+    async def _store_anubis_cookies(url: str, response: aiohttp.ClientResponse) -> None:
+        # The pass cookie is usually set on the redirect that follows the pass-challenge request.
+        cookies: dict[str, str] = {}
+        ttls: list[int] = []
+        for morsel in (morsel for step in (*response.history, response) for morsel in step.cookies.values()):
+            if "anubis" not in morsel.key.lower():
+                continue
+            cookies[morsel.key] = morsel.value
+            if (ttl := _morsel_ttl(morsel)) is not None:
+                ttls.append(ttl)
+
+        ttl = min(ttls, default=ANUBIS_COOKIE_DEFAULT_TTL_SECONDS)
+        if not cookies or ttl <= 0:
+            return
+
+        try:
+            await aredis.set(_anubis_cookie_key(url), orjson.dumps(cookies), ex=ttl)
+        except RedisError as error:
+            await logger.adebug("[Reddit] Could not cache Anubis cookies", error_type=type(error).__name__)
+            return
+        await logger.adebug("[Reddit] Cached Anubis pass cookies", url=url, ttl=ttl)
+
+    @staticmethod
+    async def _forget_anubis_cookies(url: str) -> None:
+        try:
+            await aredis.delete(_anubis_cookie_key(url))
+        except RedisError as error:
+            await logger.adebug("[Reddit] Could not drop cached Anubis cookies", error_type=type(error).__name__)
@@ -6,6 +6,7 @@ import aiohttp
 
 from korone.logger import get_logger
 from korone.utils.aiohttp_session import HTTPClient
+from korone.utils.host_limiter import HostCircuitOpenError
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -87,6 +88,8 @@ async def _fetch_text_with_retry(
                     return None
 
                 return await response.text(), str(response.url)
+        except HostCircuitOpenError:
+            raise
         except TimeoutError, aiohttp.ClientError:
             if attempt >= _RETRY_ATTEMPTS:
                 raise
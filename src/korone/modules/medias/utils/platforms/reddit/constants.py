@@ -13,6 +13,12 @@ REDDIT_PATTERN_HOSTS = tuple(urlparse(instance).netloc for instance in REDLIB_IN
 REDDIT_PATTERN_HOSTS_REGEX = "|".join(re.escape(host) for host in REDDIT_PATTERN_HOSTS)
 ANUBIS_PASS_CHALLENGE_PATH = "/.within.website/x/cmd/anubis/api/pass-challenge"
 REDLIB_REQUEST_COOKIES = {"use_hls": "on", "hide_hls_notification": "on"}
+ANUBIS_COOKIE_KEY_PREFIX = "korone:reddit:anubis:"
+ANUBIS_COOKIE_DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# Parsed variant playlists kept between resolving a post and remuxing its video in the same process.
+HLS_PLAYLIST_MEMO_SIZE = 32
+ANUBIS_POW_BATCH_SIZE = 1 << 16
+ANUBIS_POW_TIMEOUT_SECONDS = 20.0
 
 PATTERN = re.compile(
     rf"https?://(?:"
@@ -1,36 +1,36 @@
-import asyncio
-import re
-import subprocess
-import tempfile
-from pathlib import Path
-from typing import TYPE_CHECKING
-from urllib.parse import quote, urljoin, urlparse, urlunparse
+from collections import OrderedDict
+from typing import TYPE_CHECKING, ClassVar
+from urllib.parse import quote, urlparse
 
 import aiohttp
-from aiogram.types import BufferedInputFile
 from lxml import html as lxml_html
 
 from korone.constants import TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
 from korone.logger import get_logger
+from korone.modules.medias.utils import hls
 from korone.modules.medias.utils.parsing import coerce_int
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaItem, MediaKind, MediaPost, MediaSource
+from korone.modules.medias.utils.spool import current_spool
+from korone.modules.medias.utils.types import MediaItem, MediaKind, MediaSource, ResolvedPost
 from korone.modules.utils_.file_id_cache import get_cached_file_payload
 from korone.utils.aiohttp_session import HTTPClient
+from korone.utils.host_limiter import HostLimiter
 
 from . import client, parser
 from .anubis import RedlibAnubisBypassMixin
 from .constants import (
     BLOCK_MARKERS,
+    HLS_PLAYLIST_MEMO_SIZE,
     JSON_SCRIPT_REGEX_TEMPLATE,
     META_REFRESH_REGEX,
     PATTERN,
     PLAYLIST_REGEX,
     POST_TYPE_REGEX,
+    REDDIT_PATTERN_HOSTS,
     REDLIB_INSTANCES,
-    REDLIB_REQUEST_COOKIES,
     VIDEO_REGEX,
 )
+from .remux import remux_hls_streams
 from .types import _PostRef, _ScrapedPost
 
 if TYPE_CHECKING:
@@ -45,15 +45,23 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
     _DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=90, connect=20, sock_read=60)
 
     pattern = PATTERN
+    url_hints = ("reddit.com/", "redd.it/", "redlib.", *REDDIT_PATTERN_HOSTS)
     _post_type_regex = POST_TYPE_REGEX
     _video_regex = VIDEO_REGEX
     _playlist_regex = PLAYLIST_REGEX
     _json_script_regex_template = JSON_SCRIPT_REGEX_TEMPLATE
     _meta_refresh_regex = META_REFRESH_REGEX
     _block_markers = BLOCK_MARKERS
+    # Variant URL -> media playlist already parsed while sizing the variants, taken by the remux that follows.
+    _variant_playlists: ClassVar[OrderedDict[str, hls.HLSMediaPlaylist]] = OrderedDict()
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    def extract_post_id(cls, url: str) -> str | None:
+        post_ref = cls._extract_post_ref(url)
+        return post_ref.post_id if post_ref else None
+
+    @classmethod
+    async def resolve(cls, url: str) -> ResolvedPost | None:
         post_ref = await cls._resolve_post_ref(url)
         if not post_ref:
             return None
@@ -69,24 +77,20 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
         if not scraped or not scraped.media_sources:
             return None
 
-        media = await cls._download_media(scraped.media_sources)
-        if not media:
-            return None
-
-        return MediaPost(
+        return ResolvedPost(
+            post_id=post_ref.post_id,
             author_name=scraped.author or "Reddit",
             author_handle=scraped.subreddit or "reddit",
             text=scraped.title,
             url=scraped.post_url,
             website=cls.website,
-            media=media,
+            sources=scraped.media_sources,
         )
 
     @classmethod
-    async def _resolve_post_ref(cls, url: str) -> _PostRef | None:
-        post_ref = cls._extract_post_ref(url)
-        if post_ref or not parser.is_share_url(url):
-            return post_ref
+    async def resolve_short_link(cls, url: str) -> str | None:
+        if not parser.is_share_url(url):
+            return None
 
         resolved_url = await client.resolve_reddit_url(
             url, headers=cls._DEFAULT_HEADERS, request_timeout=cls._DEFAULT_TIMEOUT
@@ -100,7 +104,16 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
             await logger.adebug(
                 "[Reddit] Share URL did not resolve to a supported post", source_url=url, resolved_url=resolved_url
             )
-        return post_ref
+            return None
+        return post_ref.post_id
+
+    @classmethod
+    async def _resolve_post_ref(cls, url: str) -> _PostRef | None:
+        if post_ref := cls._extract_post_ref(url):
+            return post_ref
+
+        post_id = await cls.resolve_post_id(url)
+        return _PostRef(kind="comments", name=None, post_id=post_id) if post_id else None
 
     @classmethod
     def _extract_post_ref(cls, url: str) -> _PostRef | None:
@@ -145,8 +158,9 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
 
     @classmethod
     def _instance_candidates(cls) -> list[str]:
+        # Instances that answered best recently go first; those whose circuit is open are skipped.
         candidates = [candidate.rstrip("/") for candidate in REDLIB_INSTANCES]
-        return [candidate for candidate in dict.fromkeys(candidates) if candidate]
+        return HostLimiter.rank(candidate for candidate in dict.fromkeys(candidates) if candidate)
 
     @classmethod
     def _build_redlib_url(cls, post_ref: _PostRef, instance: str) -> str:
@@ -186,6 +200,8 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
             if not cls._looks_like_block_page(html_content):
                 return payload
 
+            # Any cached pass cookie for this instance was rejected, so solve a fresh challenge.
+            await cls._forget_anubis_cookies(redlib_url)
             solved_payload = await cls._solve_anubis_challenge(
                 session,
                 challenge_html=html_content,
@@ -207,7 +223,7 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
         cls, session: aiohttp.ClientSession, url: str, *, headers: dict[str, str]
     ) -> dict[str, str] | None:
         payload = await client.request_redlib_page(
-            url, headers=headers, cookies=REDLIB_REQUEST_COOKIES, request_timeout=cls._DEFAULT_TIMEOUT
+            url, headers=headers, cookies=await cls._redlib_cookies(url), request_timeout=cls._DEFAULT_TIMEOUT
         )
         if not payload:
             await logger.adebug("[Reddit] Non-200 Redlib response", url=url)
@@ -438,126 +454,37 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
         if not hls_url:
             return None
 
-        master_playlist = await cls._fetch_text(hls_url)
-        if not master_playlist:
-            return None
-
-        audio_groups: dict[str, str] = {}
-        best_variant: str | None = None
-        best_bandwidth = -1
-        best_width: int | None = None
-        best_height: int | None = None
-        best_audio_group: str | None = None
-
-        stream_info: str | None = None
-        for raw_line in master_playlist.splitlines():
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line.startswith("#EXT-X-MEDIA:"):
-                media_type = cls._parse_stream_text(line, "TYPE")
-                group_id = cls._parse_stream_text(line, "GROUP-ID")
-                uri = cls._parse_stream_text(line, "URI")
-                if media_type == "AUDIO" and group_id and uri:
-                    audio_groups[group_id] = uri
-                continue
-            if line.startswith("#EXT-X-STREAM-INF:"):
-                stream_info = line
-                continue
-            if line.startswith("#"):
-                continue
-            if stream_info is None:
-                continue
-
-            bandwidth = cls._parse_stream_int(stream_info, "BANDWIDTH")
-            width, height = cls._parse_stream_resolution(stream_info)
-            audio_group = cls._parse_stream_text(stream_info, "AUDIO")
-            if bandwidth > best_bandwidth:
-                best_bandwidth = bandwidth
-                best_variant = line
-                best_width = width
-                best_height = height
-                best_audio_group = audio_group
-
-            if best_variant is None:
-                best_variant = line
-                best_width = width
-                best_height = height
-                best_audio_group = audio_group
-
-            stream_info = None
-
-        if not best_variant:
+        master_text = await cls._fetch_text(hls_url)
+        master = hls.parse_master_playlist(master_text, hls_url) if master_text else None
+        top_variant = hls.choose_variant(master.variants, duration=None, max_bytes=None) if master else None
+        if master is None or top_variant is None:
             return None
 
-        variant_playlist_url = parser.normalize_media_url(hls_url, best_variant)
-        if not variant_playlist_url:
+        # Every variant covers the same timeline, so one media playlist is enough to size them all.
+        variant_text = await cls._fetch_text(top_variant.url)
+        variant_playlist = hls.parse_media_playlist(variant_text, top_variant.url) if variant_text else None
+        if variant_playlist is None:
             return None
 
-        variant_playlist = await cls._fetch_text(variant_playlist_url)
-        if not variant_playlist:
-            return None
-
-        video_path = cls._extract_playlist_media_path(variant_playlist)
-        if not video_path:
-            return None
-
-        video_url = parser.normalize_media_url(variant_playlist_url, video_path)
-        if not video_url:
-            return None
-
-        audio_url: str | None = None
-        audio_uri_candidates: list[str] = []
-        if best_audio_group:
-            candidate = audio_groups.get(best_audio_group)
-            if candidate:
-                audio_uri_candidates.append(candidate)
-        audio_uri_candidates.extend(uri for uri in audio_groups.values() if uri not in audio_uri_candidates)
-
-        for audio_uri in audio_uri_candidates:
-            audio_playlist_url = parser.normalize_media_url(hls_url, audio_uri)
-            if not audio_playlist_url:
-                continue
-
-            audio_playlist = await cls._fetch_text(audio_playlist_url)
-            if not audio_playlist:
-                continue
-
-            audio_path = cls._extract_playlist_media_path(audio_playlist)
-            if not audio_path:
-                continue
-
-            audio_url = parser.normalize_media_url(audio_playlist_url, audio_path)
-            if audio_url:
-                break
-
-        variant_duration = cls._parse_hls_segment_duration(variant_playlist)
-
+        variant = (
+            hls.choose_variant(
+                master.variants, duration=variant_playlist.duration, max_bytes=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
+            )
+            or top_variant
+        )
+        if variant.url == top_variant.url:
+            cls._variant_playlists[variant.url] = variant_playlist
+            while len(cls._variant_playlists) > HLS_PLAYLIST_MEMO_SIZE:
+                cls._variant_playlists.popitem(last=False)
         return MediaSource(
             kind=MediaKind.VIDEO,
-            url=video_url,
-            audio_url=audio_url,
-            width=best_width,
-            height=best_height,
-            duration=variant_duration,
+            url=variant.url,
+            audio_url=master.audio_url_for(variant),
+            width=variant.width,
+            height=variant.height,
+            duration=variant_playlist.duration_seconds,
         )
 
-    @staticmethod
-    def _extract_playlist_media_path(playlist: str) -> str | None:
-        for raw_line in playlist.splitlines():
-            line = raw_line.strip()
-            if not line or line.startswith("#"):
-                continue
-            return line
-        return None
-
-    @staticmethod
-    def _parse_stream_text(stream_info: str, key: str) -> str | None:
-        match = re.search(rf'{re.escape(key)}=(?:"([^"]*)"|([^,\s]+))', stream_info)
-        if not match:
-            return None
-        return match.group(1) or match.group(2)
-
     @classmethod
     def _extract_video_duration_seconds(cls, video_node: lxml_html.HtmlElement) -> int | None:
         duration_candidates = (
@@ -596,54 +523,14 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
             total = (total * 60) + int(part)
         return total if total > 0 else None
 
-    @classmethod
-    async def _extract_hls_duration_seconds(cls, hls_variant_url: str) -> int | None:
-        parsed_variant = urlparse(hls_variant_url)
-        if not parsed_variant.path.endswith(".m3u8"):
-            return None
-
-        playlist = await cls._fetch_text(hls_variant_url)
-        if not playlist:
-            return None
-
-        return cls._parse_hls_segment_duration(playlist)
-
-    @staticmethod
-    def _parse_hls_segment_duration(playlist: str) -> int | None:
-        total_seconds = 0.0
-        has_segments = False
-
-        for raw_line in playlist.splitlines():
-            line = raw_line.strip()
-            if not line:
-                continue
-
-            match = re.match(r"(?i)#EXTINF:([0-9]+(?:\.[0-9]+)?)", line)
-            if not match:
-                continue
-
-            try:
-                segment_duration = float(match.group(1))
-            except ValueError:
-                continue
-
-            if segment_duration <= 0:
-                continue
-
-            has_segments = True
-            total_seconds += segment_duration
-
-        if not has_segments:
-            return None
-
-        rounded_duration = int(total_seconds + 0.5)
-        return rounded_duration if rounded_duration > 0 else 1
-
     @classmethod
     async def _fetch_text(cls, url: str) -> str | None:
         try:
             text = await client.fetch_text(
-                url, headers=cls._DEFAULT_HEADERS, cookies=REDLIB_REQUEST_COOKIES, request_timeout=cls._DEFAULT_TIMEOUT
+                url,
+                headers=cls._DEFAULT_HEADERS,
+                cookies=await cls._redlib_cookies(url),
+                request_timeout=cls._DEFAULT_TIMEOUT,
             )
         except TimeoutError:
             await logger.awarning("[Reddit] Playlist request timed out", url=url)
@@ -658,40 +545,11 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
 
         return text
 
-    @classmethod
-    def _join_hls_url(cls, master_url: str, playlist_path: str) -> str:
-        joined = urljoin(master_url, playlist_path)
-        master = urlparse(master_url)
-        parsed_joined = urlparse(joined)
-        if parsed_joined.query:
-            return joined
-        return urlunparse(parsed_joined._replace(query=master.query))
-
-    @staticmethod
-    def _parse_stream_int(stream_info: str, key: str) -> int:
-        match = re.search(rf"{re.escape(key)}=(\d+)", stream_info)
-        if not match:
-            return -1
-        try:
-            return int(match.group(1))
-        except ValueError:
-            return -1
-
-    @staticmethod
-    def _parse_stream_resolution(stream_info: str) -> tuple[int | None, int | None]:
-        match = re.search(r"RESOLUTION=(\d+)x(\d+)", stream_info)
-        if not match:
-            return None, None
-        try:
-            return int(match.group(1)), int(match.group(2))
-        except ValueError:
-            return None, None
-
     @classmethod
     async def _download_source(
         cls, source: MediaSource, index: int, prefix: str, max_size: int | None, label: str
     ) -> MediaItem | None:
-        if not source.audio_url:
+        if not hls.is_hls_url(source.url):
             return await super()._download_source(source, index, prefix, max_size, label)
 
         cache_key = cls._media_source_cache_key(source.url)
@@ -709,37 +567,18 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
                     height=source.height,
                 )
 
-        video_payload_result = await cls._fetch_payload_with_retry(
-            source.url, label=label, stage="source", max_size=max_size, source_kind=source.kind, source_index=index
+        spool = current_spool()
+        payload = await remux_hls_streams(
+            source.url,
+            source.audio_url,
+            headers=cls._DEFAULT_HEADERS,
+            request_timeout=cls._DEFAULT_TIMEOUT,
+            max_size=max_size,
+            cookies=await cls._redlib_cookies(source.url),
+            video_playlist=cls._variant_playlists.pop(source.url, None),
+            spool=spool,
         )
-        if not video_payload_result:
-            return await cls._download_fallback_source(source, index, prefix, max_size, label)
-
-        video_payload, _ = video_payload_result
-
-        audio_payload: bytes | None = None
-        if source.audio_url:
-            audio_payload_result = await cls._fetch_payload_with_retry(
-                source.audio_url,
-                label=label,
-                stage="source",
-                max_size=max_size,
-                source_kind=source.kind,
-                source_index=index,
-            )
-            if not audio_payload_result:
-                await logger.awarning(
-                    "[Reddit] Failed to fetch HLS audio payload",
-                    source_url=source.audio_url,
-                    video_url=source.url,
-                    source_index=index,
-                )
-                return await cls._download_fallback_source(source, index, prefix, max_size, label)
-
-            audio_payload, _ = audio_payload_result
-
-        remuxed_payload = await asyncio.to_thread(cls._remux_hls_payloads_to_mp4, video_payload, audio_payload)
-        if not remuxed_payload:
+        if payload is None:
             await logger.awarning(
                 "[Reddit] Failed to remux HLS media",
                 source_url=source.url,
@@ -748,12 +587,6 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
             )
             return await cls._download_fallback_source(source, index, prefix, max_size, label)
 
-        if max_size and len(remuxed_payload) > max_size:
-            await logger.adebug(
-                "[Reddit] Remuxed HLS media too large", size=len(remuxed_payload), source_url=source.url
-            )
-            return await cls._download_fallback_source(source, index, prefix, max_size, label)
-
         thumbnail: InputFile | None = None
         if source.thumbnail_url and source.kind == MediaKind.VIDEO:
             thumbnail = await cls._download_thumbnail(source.thumbnail_url, label, index, prefix)
@@ -761,7 +594,7 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
         filename = f"{prefix}_{index}.mp4"
         return MediaItem(
             kind=source.kind,
-            file=BufferedInputFile(remuxed_payload, filename),
+            file=cls._payload_input_file(payload, filename, spool),
             filename=filename,
             source_url=source.url,
             thumbnail=thumbnail,
@@ -787,34 +620,11 @@ class RedditProvider(RedlibAnubisBypassMixin, MediaProvider):
         )
         return await super()._download_source(fallback_source, index, prefix, max_size, label)
 
-    @staticmethod
-    def _remux_hls_payloads_to_mp4(video_payload: bytes, audio_payload: bytes | None) -> bytes | None:
-        with tempfile.TemporaryDirectory(prefix="korone-reddit-hls-") as temp_dir:
-            temp_dir_path = Path(temp_dir)
-            video_input_path = temp_dir_path / "video.ts"
-            video_input_path.write_bytes(video_payload)
-
-            command = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(video_input_path)]
-            if audio_payload is not None:
-                audio_input_path = temp_dir_path / "audio.aac"
-                audio_input_path.write_bytes(audio_payload)
-                command.extend(["-i", str(audio_input_path)])
-
-            output_path = temp_dir_path / "output.mp4"
-            command.extend(["-c", "copy", str(output_path)])
-
-            try:
-                result = subprocess.run(command, capture_output=True, text=True, check=False)
-            except OSError:
-                return None
-
-            if result.returncode != 0 or not output_path.exists():
-                return None
-
-            return output_path.read_bytes()
-
     @classmethod
-    async def _download_media(cls, sources: list[MediaSource]) -> list[MediaItem]:
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
         return await cls.download_media(
-            sources, filename_prefix="reddit_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="Reddit"
+            post.sources,
+            filename_prefix="reddit_media",
+            max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES,
+            log_label="Reddit",
         )
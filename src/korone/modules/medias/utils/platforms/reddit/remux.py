@@ -0,0 +1,254 @@
+import asyncio
+import errno
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Final
+
+import aiohttp
+
+from korone.logger import get_logger
+from korone.modules.medias.utils.hls import HLSPlaylistError, fetch_media_playlist, iter_hls_segments
+from korone.modules.medias.utils.spool import memory_stats
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from korone.modules.medias.utils.hls import HLSMediaPlaylist
+    from korone.modules.medias.utils.spool import MediaSpool
+
+logger = get_logger(__name__)
+
+_CHUNK_SIZE_BYTES: Final[int] = 64 * 1024
+_FIFO_OPEN_POLL_SECONDS: Final[float] = 0.05
+# Fragmented MP4 can be written to a pipe, since it needs no seek back to patch the moov atom.
+_FRAGMENTED_MP4_FLAGS: Final[str] = "frag_keyframe+empty_moov+default_base_moof"
+
+
+class RemuxTooLargeError(Exception):
+    """Raised when the remuxed output grows past the size limit."""
+
+
+def _write_all(fd: int, payload: bytes) -> None:
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+class _FifoWriter:
+    """Blocking writes to a FIFO, run on a single dedicated thread so they stay ordered and off the event loop."""
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="korone-hls-fifo")
+
+    async def write(self, payload: bytes) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, _write_all, self._fd, payload)
+
+    def close(self) -> None:
+        # Queued behind any write still in flight, which fails with EPIPE once ffmpeg exits, so the fd is never
+        # closed (and possibly reused) under it.
+        self._executor.submit(os.close, self._fd)
+        self._executor.shutdown(wait=False)
+
+
+async def _stream_playlist(
+    url: str,
+    *,
+    headers: dict[str, str],
+    cookies: dict[str, str] | None,
+    request_timeout: aiohttp.ClientTimeout,
+    write: Callable[[bytes], Awaitable[None]],
+    playlist: HLSMediaPlaylist | None = None,
+) -> None:
+    if playlist is None:
+        playlist = await fetch_media_playlist(url, headers=headers, request_timeout=request_timeout, cookies=cookies)
+    segments = iter_hls_segments(playlist, headers=headers, request_timeout=request_timeout, cookies=cookies)
+    async with aclosing(segments):
+        async for payload in segments:
+            await write(payload)
+
+
+async def _feed_stdin(
+    url: str,
+    stdin: asyncio.StreamWriter,
+    *,
+    headers: dict[str, str],
+    cookies: dict[str, str] | None,
+    request_timeout: aiohttp.ClientTimeout,
+    playlist: HLSMediaPlaylist | None,
+) -> None:
+    async def write(payload: bytes) -> None:
+        stdin.write(payload)
+        await stdin.drain()
+
+    try:
+        await _stream_playlist(
+            url, headers=headers, cookies=cookies, request_timeout=request_timeout, write=write, playlist=playlist
+        )
+    finally:
+        stdin.close()
+
+
+async def _open_fifo_writer(path: Path, process: asyncio.subprocess.Process) -> _FifoWriter:
+    # Opening a FIFO for writing fails with ENXIO until ffmpeg opens it for reading.
+    while True:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            break
+        except OSError as error:
+            if error.errno != errno.ENXIO or process.returncode is not None:
+                raise
+        await asyncio.sleep(_FIFO_OPEN_POLL_SECONDS)
+
+    os.set_blocking(fd, True)
+    return _FifoWriter(fd)
+
+
+async def _feed_fifo(
+    url: str,
+    path: Path,
+    process: asyncio.subprocess.Process,
+    *,
+    headers: dict[str, str],
+    cookies: dict[str, str] | None,
+    request_timeout: aiohttp.ClientTimeout,
+) -> None:
+    writer = await _open_fifo_writer(path, process)
+    try:
+        await _stream_playlist(
+            url, headers=headers, cookies=cookies, request_timeout=request_timeout, write=writer.write
+        )
+    finally:
+        writer.close()
+
+
+async def _collect_output(
+    stdout: asyncio.StreamReader, *, max_size: int | None, output: BinaryIO | None
+) -> list[bytes]:
+    chunks: list[bytes] = []
+    total_size = 0
+    while chunk := await stdout.read(_CHUNK_SIZE_BYTES):
+        total_size += len(chunk)
+        if max_size is not None and total_size > max_size:
+            msg = f"Remuxed output exceeded {max_size} bytes"
+            raise RemuxTooLargeError(msg)
+
+        if output is not None:
+            await asyncio.to_thread(output.write, chunk)
+        else:
+            chunks.append(chunk)
+    return chunks
+
+
+async def remux_hls_streams(
+    video_url: str,
+    audio_url: str | None,
+    *,
+    headers: dict[str, str],
+    request_timeout: aiohttp.ClientTimeout,
+    max_size: int | None,
+    cookies: dict[str, str] | None = None,
+    video_playlist: HLSMediaPlaylist | None = None,
+    spool: MediaSpool | None = None,
+) -> bytes | Path | None:
+    """Stream the segments of the HLS video and audio media playlists into ffmpeg and read the MP4 back.
+
+    Video goes through stdin and audio through a FIFO, so only the segments in flight are held in memory. The output is
+    written to `spool` when given and collected in memory otherwise; ffmpeg is killed as soon as it passes
+    `max_size`. `video_playlist` skips fetching the video media playlist when the caller already parsed it.
+    """
+    if not shutil.which("ffmpeg"):
+        return None
+
+    fifo_dir = Path(await asyncio.to_thread(tempfile.mkdtemp, prefix="korone-reddit-hls-"))
+    audio_fifo = fifo_dir / "audio"
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+    if audio_url:
+        await asyncio.to_thread(os.mkfifo, audio_fifo)
+        command.extend(["-i", str(audio_fifo)])
+    command.extend(["-c", "copy", "-movflags", _FRAGMENTED_MP4_FLAGS, "-f", "mp4", "pipe:1"])
+
+    output_path = spool.new_path(".mp4") if spool else None
+    output: BinaryIO | None = None
+    process: asyncio.subprocess.Process | None = None
+    try:
+        if output_path is not None:
+            output = await asyncio.to_thread(output_path.open, "wb")
+
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        if process.stdin is None or process.stdout is None or process.stderr is None:
+            return None
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(
+                    _feed_stdin(
+                        video_url,
+                        process.stdin,
+                        headers=headers,
+                        cookies=cookies,
+                        request_timeout=request_timeout,
+                        playlist=video_playlist,
+                    )
+                )
+                if audio_url:
+                    tg.create_task(
+                        _feed_fifo(
+                            audio_url,
+                            audio_fifo,
+                            process,
+                            headers=headers,
+                            cookies=cookies,
+                            request_timeout=request_timeout,
+                        )
+                    )
+                output_task = tg.create_task(_collect_output(process.stdout, max_size=max_size, output=output))
+                stderr_task = tg.create_task(process.stderr.read())
+        except ExceptionGroup as group:
+            if group.subgroup(RemuxTooLargeError):
+                await logger.adebug("[Reddit] Remuxed HLS media too large", source_url=video_url, max_size=max_size)
+                return None
+
+            _, unexpected = group.split((aiohttp.ClientError, TimeoutError, OSError, HLSPlaylistError))
+            if unexpected:
+                raise
+            await logger.awarning(
+                "[Reddit] Streaming HLS remux failed",
+                source_url=video_url,
+                errors=[f"{type(error).__name__}: {error}" for error in group.exceptions],
+            )
+            return None
+
+        returncode = await process.wait()
+        if returncode != 0:
+            await logger.adebug(
+                "[Reddit] ffmpeg remux failed",
+                returncode=returncode,
+                stderr=stderr_task.result().decode(errors="replace"),
+            )
+            return None
+
+        if output is not None and output_path is not None:
+            size = output.tell()
+            await asyncio.to_thread(output.close)
+            output = None
+            memory_stats.spooled_files += 1
+            memory_stats.spooled_bytes += size
+            return output_path
+
+        return b"".join(output_task.result())
+    finally:
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+        if output is not None:
+            await asyncio.to_thread(output.close)
+            if output_path is not None:
+                await asyncio.to_thread(output_path.unlink, missing_ok=True)
+        await asyncio.to_thread(shutil.rmtree, fifo_dir, ignore_errors=True)
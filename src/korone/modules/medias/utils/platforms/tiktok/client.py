@@ -27,7 +27,7 @@ async def resolve_redirect_url(url: str) -> str | None:
             max_redirects=MAX_REDIRECTS,
         ) as response:
             return str(response.url)
-    except (aiohttp.ClientError, aiohttp.TooManyRedirects) as exc:
+    except (aiohttp.ClientError, aiohttp.TooManyRedirects, TimeoutError) as exc:
         await logger.awarning("[TikTok] Redirect resolution failed", error=str(exc), url=url)
         return None
 
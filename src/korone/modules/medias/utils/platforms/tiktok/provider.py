@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, ClassVar
 from korone.constants import TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
 from korone.logger import get_logger
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaKind, MediaPost
+from korone.modules.medias.utils.types import MediaKind, ResolvedPost
 
 from . import client, parser
 from .constants import PATTERN, TIKTOK_MEDIA_HEADERS, TIKTOK_TIMEOUT
@@ -21,13 +21,18 @@ class TikTokProvider(MediaProvider):
     name = "TikTok"
     website = "TikTok"
     pattern = PATTERN
+    url_hints = ("tiktok.com/",)
     _DEFAULT_HEADERS: ClassVar[dict[str, str]] = dict(TIKTOK_MEDIA_HEADERS)
     _DEFAULT_TIMEOUT = TIKTOK_TIMEOUT
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    def extract_post_id(cls, url: str) -> str | None:
+        return parser.extract_post_id(url)
+
+    @classmethod
+    async def resolve(cls, url: str) -> ResolvedPost | None:
         normalized_url = parser.ensure_url_scheme(url)
-        post_id, resolved_url = await cls._resolve_post_id(normalized_url)
+        post_id = await cls.resolve_post_id(normalized_url)
         if not post_id:
             return None
 
@@ -36,34 +41,30 @@ class TikTokProvider(MediaProvider):
             return None
 
         media_sources = await cls._extract_media_sources(item_struct)
-        media = await cls._download_media(media_sources, post_id=post_id)
-        if not media:
+        if not media_sources:
             return None
 
         author_name, author_handle = parser.extract_author(item_struct)
         text = parser.extract_text(item_struct)
-        post_url = parser.build_post_url(item_struct, resolved_url or normalized_url)
+        post_url = parser.build_post_url(item_struct, normalized_url)
 
-        return MediaPost(
+        return ResolvedPost(
+            post_id=post_id,
             author_name=author_name or author_handle or "TikTok",
             author_handle=author_handle or "tiktok",
             text=text,
             url=post_url,
             website=cls.website,
-            media=media,
+            sources=media_sources,
         )
 
     @classmethod
-    async def _resolve_post_id(cls, url: str) -> tuple[str | None, str | None]:
-        post_id = parser.extract_post_id(url)
-        if post_id:
-            return post_id, url
-
+    async def resolve_short_link(cls, url: str) -> str | None:
         resolved_url = await client.resolve_redirect_url(url)
         if not resolved_url:
-            return None, None
+            return None
 
-        return parser.extract_post_id(resolved_url), resolved_url
+        return parser.extract_post_id(resolved_url)
 
     @classmethod
     async def _extract_media_sources(cls, item_struct: dict[str, object]) -> list[MediaSource]:
@@ -80,14 +81,17 @@ class TikTokProvider(MediaProvider):
         return sources
 
     @classmethod
-    async def _download_media(cls, sources: list[MediaSource], *, post_id: str) -> list[MediaItem]:
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
         media = await cls.download_media(
-            sources, filename_prefix="tiktok_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="TikTok"
+            post.sources,
+            filename_prefix="tiktok_media",
+            max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES,
+            log_label="TikTok",
         )
         if media:
             return media
 
-        offload_sources = cls._build_offload_sources(post_id, sources)
+        offload_sources = cls._build_offload_sources(post.post_id, post.sources)
         offload_media = await cls.download_media(
             offload_sources,
             filename_prefix="tiktok_media",
@@ -8,6 +8,7 @@ import orjson
 from korone.logger import get_logger
 from korone.modules.medias.utils.provider_base import MediaProvider
 from korone.utils.aiohttp_session import HTTPClient
+from korone.utils.host_limiter import HostCircuitOpenError
 
 logger = get_logger(__name__)
 
@@ -66,6 +67,9 @@ async def _request_json(
                 return data
         except asyncio.CancelledError:
             raise
+        except HostCircuitOpenError as exc:
+            await logger.adebug(f"[{log_label}] Host unavailable", error=str(exc), url=url)
+            return None
         except (TimeoutError, aiohttp.ClientError) as exc:
             if attempt < _RETRY_ATTEMPTS:
                 await _sleep_before_retry(attempt)
@@ -4,7 +4,7 @@ from urllib.parse import quote
 from korone.constants import TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES
 from korone.logger import get_logger
 from korone.modules.medias.utils.provider_base import MediaProvider
-from korone.modules.medias.utils.types import MediaPost
+from korone.modules.medias.utils.types import ResolvedPost
 
 from . import client, parser
 from .constants import FXTWITTER_STATUS_API, PATTERN
@@ -12,7 +12,7 @@ from .constants import FXTWITTER_STATUS_API, PATTERN
 if TYPE_CHECKING:
     from typing import Any
 
-    from korone.modules.medias.utils.types import MediaItem, MediaSource
+    from korone.modules.medias.utils.types import MediaItem
 
 logger = get_logger(__name__)
 
@@ -21,9 +21,15 @@ class TwitterProvider(MediaProvider):
     name = "Twitter"
     website = "Twitter"
     pattern = PATTERN
+    url_hints = ("x.com/", "twitter.com/")
 
     @classmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    def extract_post_id(cls, url: str) -> str | None:
+        status_id, _ = parser.extract_status_id_and_handle(url)
+        return status_id
+
+    @classmethod
+    async def resolve(cls, url: str) -> ResolvedPost | None:
         status_id, handle = parser.extract_status_id_and_handle(url)
         if not status_id:
             return None
@@ -47,26 +53,26 @@ class TwitterProvider(MediaProvider):
         post_url = parser.extract_post_url(tweet, status_id, author_handle, url)
 
         media_sources = parser.extract_media_sources(tweet)
-        media = await cls._download_media(media_sources)
-        if not media:
+        if not media_sources:
             return None
 
-        return MediaPost(
+        return ResolvedPost(
+            post_id=status_id,
             author_name=author_name or author_handle or "X",
             author_handle=author_handle or "",
             text=text,
             url=post_url,
             website=cls.website,
-            media=media,
+            sources=media_sources,
             quote_text=quote_text,
             quote_author_name=quote_author_name,
             quote_author_handle=quote_author_handle,
         )
 
     @classmethod
-    async def _download_media(cls, sources: list[MediaSource]) -> list[MediaItem]:
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
         return await cls.download_media(
-            sources, filename_prefix="x_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="FXTwitter"
+            post.sources, filename_prefix="x_media", max_size=TELEGRAM_MEDIA_MAX_FILE_SIZE_BYTES, log_label="FXTwitter"
         )
 
     @classmethod
@@ -0,0 +1,126 @@
+from typing import Any
+
+import orjson
+from redis.exceptions import RedisError
+
+from korone import aredis
+from korone.constants import CACHE_MEDIA_POST_METADATA_TTL_SECONDS, CACHE_MEDIA_SHORT_LINK_TTL_SECONDS
+from korone.logger import get_logger
+
+from .types import MediaKind, MediaSource, ResolvedPost
+
+_CACHE_PREFIX = "korone:media:post"
+_SHORT_LINK_PREFIX = "korone:media:short-link"
+logger = get_logger(__name__)
+
+
+def _cache_key(provider: str, post_id: str) -> str:
+    return f"{_CACHE_PREFIX}:{provider.casefold()}:{post_id}"
+
+
+def _short_link_key(provider: str, url: str) -> str:
+    return f"{_SHORT_LINK_PREFIX}:{provider.casefold()}:{url}"
+
+
+def _optional_str(value: object) -> str | None:
+    return value if isinstance(value, str) else None
+
+
+def _optional_int(value: object) -> int | None:
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _decode_source(payload: object) -> MediaSource | None:
+    if not isinstance(payload, dict):
+        return None
+
+    kind = payload.get("kind")
+    url = payload.get("url")
+    if kind not in MediaKind or not isinstance(url, str):
+        return None
+
+    return MediaSource(
+        kind=MediaKind(kind),
+        url=url,
+        thumbnail_url=_optional_str(payload.get("thumbnail_url")),
+        duration=_optional_int(payload.get("duration")),
+        width=_optional_int(payload.get("width")),
+        height=_optional_int(payload.get("height")),
+        audio_url=_optional_str(payload.get("audio_url")),
+        fallback_url=_optional_str(payload.get("fallback_url")),
+    )
+
+
+def _decode_post(raw: bytes | str) -> ResolvedPost | None:
+    try:
+        payload: Any = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("sources"), list):
+        return None
+
+    sources = [source for item in payload["sources"] if (source := _decode_source(item)) is not None]
+    fields = ("post_id", "author_name", "author_handle", "text", "url", "website")
+    if not sources or not all(isinstance(payload.get(field), str) for field in fields):
+        return None
+
+    return ResolvedPost(
+        post_id=payload["post_id"],
+        author_name=payload["author_name"],
+        author_handle=payload["author_handle"],
+        text=payload["text"],
+        url=payload["url"],
+        website=payload["website"],
+        sources=sources,
+        quote_text=_optional_str(payload.get("quote_text")),
+        quote_author_name=_optional_str(payload.get("quote_author_name")),
+        quote_author_handle=_optional_str(payload.get("quote_author_handle")),
+    )
+
+
+async def get_cached_resolved_post(provider: str, post_id: str) -> ResolvedPost | None:
+    try:
+        raw = await aredis.get(_cache_key(provider, post_id))
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[PostCache] Could not read resolved post", provider=provider, error=str(exc))
+        return None
+
+    return _decode_post(raw) if raw else None
+
+
+async def set_cached_resolved_post(provider: str, post: ResolvedPost) -> None:
+    # Source URLs are often signed and expire, so only the metadata is kept and only briefly.
+    try:
+        await aredis.set(
+            _cache_key(provider, post.post_id), orjson.dumps(post), ex=CACHE_MEDIA_POST_METADATA_TTL_SECONDS
+        )
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[PostCache] Could not persist resolved post", provider=provider, error=str(exc))
+
+
+async def delete_cached_resolved_post(provider: str, post_id: str) -> None:
+    try:
+        await aredis.delete(_cache_key(provider, post_id))
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[PostCache] Could not delete resolved post", provider=provider, error=str(exc))
+
+
+async def get_cached_short_link(provider: str, url: str) -> str | None:
+    try:
+        raw = await aredis.get(_short_link_key(provider, url))
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[PostCache] Could not read short link", provider=provider, error=str(exc))
+        return None
+
+    if isinstance(raw, bytes):
+        return raw.decode() or None
+    return raw or None
+
+
+async def set_cached_short_link(provider: str, url: str, post_id: str) -> None:
+    # A short link keeps pointing at the same post, so the lookup outlives the post metadata.
+    try:
+        await aredis.set(_short_link_key(provider, url), post_id, ex=CACHE_MEDIA_SHORT_LINK_TTL_SECONDS)
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[PostCache] Could not persist short link", provider=provider, error=str(exc))
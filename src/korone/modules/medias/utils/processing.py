@@ -1,7 +1,8 @@
 import asyncio
 import hashlib
 from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
+from contextlib import suppress
+from dataclasses import dataclass, replace
 from time import perf_counter
 from typing import TYPE_CHECKING, Any
 
@@ -9,26 +10,32 @@ import sentry_sdk
 from aiogram.types import TelegramObject
 from redis.exceptions import LockError, LockNotOwnedError, RedisError
 
-from korone import aredis
+from korone import aredis, media_lock_redis
 from korone.config import CONFIG
 from korone.logger import get_logger
 
+from .job_queue import FairJobQueue
+
 if TYPE_CHECKING:
     from redis.asyncio.lock import Lock
 
 logger = get_logger(__name__)
 
 _MEDIA_LOCK_PREFIX = "korone:media-processing"
+# Leaders publish the lock name here once their job is done, so followers on every instance can resend it.
+_MEDIA_DONE_CHANNEL = "korone:media-processing:done"
+_MEDIA_DONE_RETRY_DELAY = 5.0
 
 type MediaHandler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+type MediaJobPublisher = Callable[[MediaJob], Awaitable[bool]]
 
 
 def media_source_id(source_url: str) -> str:
     return hashlib.sha256(source_url.encode("utf-8")).hexdigest()[:16]
 
 
-def _media_lock_name(source_url: str) -> str:
-    digest = hashlib.sha256(source_url.encode("utf-8")).hexdigest()
+def _media_lock_name(key: str) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
     return f"{_MEDIA_LOCK_PREFIX}:{digest}"
 
 
@@ -41,20 +48,49 @@ class MediaJob:
     source_url: str
     source_id: str
     queued_at: float
+    chat_id: int
+    provider: str
+    priority: bool = False
+    handler_ref: str | None = None
+    # Provider canonical key of the post, so every link to the same post shares one lock. Computed without
+    # requests, so a short link that was never resolved is keyed by its own URL.
+    canonical_key: str | None = None
+    # Whether the post cache can already answer this job; jobs without it wait on the lock instead of coalescing.
+    has_cached_post: Callable[[], Awaitable[bool]] | None = None
+    # Set on followers re-queued after their leader cached the post, which resend it without taking the lock.
+    coalesced: bool = False
+    on_done: Callable[[], Awaitable[None]] | None = None
 
 
 class MediaProcessingManager:
-    def __init__(self) -> None:
+    def __init__(self, *, publish: MediaJobPublisher | None = None) -> None:
+        self._publish = publish
         self._accepting = False
-        self._tasks: set[asyncio.Task[None]] = set()
-        self._concurrency = asyncio.Semaphore(CONFIG.media_max_concurrent_jobs)
+        self._workers: set[asyncio.Task[None]] = set()
+        self._queue = FairJobQueue(
+            max_pending=CONFIG.media_max_pending_jobs, per_chat_limit=CONFIG.media_max_jobs_per_chat
+        )
+        # Followers wait for the job holding the lock of their post without taking a worker.
+        self._followers: set[asyncio.Task[None]] = set()
+        self._leader_done: dict[str, asyncio.Event] = {}
+        self._listener: asyncio.Task[None] | None = None
+
+    @property
+    def pending_jobs(self) -> int:
+        return len(self._queue) + self._queue.running + len(self._followers)
 
     async def start(self) -> None:
         self._accepting = True
+        for index in range(CONFIG.media_max_concurrent_jobs):
+            worker = asyncio.create_task(self._worker(), name=f"media-worker:{index}")
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        self._listener = asyncio.create_task(self._listen_leader_done(), name="media-leader-listener")
         await logger.ainfo(
             "[Medias] Processing manager started",
             max_concurrent_jobs=CONFIG.media_max_concurrent_jobs,
             max_pending_jobs=CONFIG.media_max_pending_jobs,
+            max_jobs_per_chat=CONFIG.media_max_jobs_per_chat,
         )
 
     async def submit(self, job: MediaJob) -> bool:
@@ -66,53 +102,138 @@ class MediaProcessingManager:
             )
             return False
 
-        if len(self._tasks) >= CONFIG.media_max_pending_jobs:
+        if self._publish is not None and await self._publish(job):
+            return True
+
+        return await self._enqueue(job)
+
+    async def _enqueue(self, job: MediaJob) -> bool:
+        dropped = await self._queue.put(job)
+        if dropped is not None:
             await logger.awarning(
                 "[Medias] Processing capacity exhausted",
-                handler=job.handler_name,
-                source_id=job.source_id,
-                pending_jobs=len(self._tasks),
+                handler=dropped.handler_name,
+                provider=dropped.provider,
+                source_id=dropped.source_id,
+                chat_id=dropped.chat_id,
+                pending_jobs=self.pending_jobs,
                 max_pending_jobs=CONFIG.media_max_pending_jobs,
             )
-            return False
-
-        task = asyncio.create_task(
-            self._run(job),
-            name=f"media:{job.handler_name}:{job.source_id}",
-        )
-        self._tasks.add(task)
-        task.add_done_callback(self._tasks.discard)
-        return True
+            if dropped.on_done is not None:
+                await dropped.on_done()
+        return dropped is not job
 
     async def shutdown(self) -> None:
         self._accepting = False
-        tasks = tuple(self._tasks)
-        if not tasks:
+        if not self.pending_jobs:
+            await self._stop_workers()
             await logger.ainfo("[Medias] Processing manager stopped", pending_jobs=0)
             return
 
         await logger.ainfo(
             "[Medias] Waiting for processing jobs",
-            pending_jobs=len(tasks),
+            pending_jobs=self.pending_jobs,
             timeout_seconds=CONFIG.media_shutdown_timeout,
         )
         try:
             async with asyncio.timeout(CONFIG.media_shutdown_timeout):
-                await asyncio.gather(*tasks, return_exceptions=True)
+                await self._join()
         except TimeoutError:
+            dropped = self._queue.drain()
             await logger.awarning(
                 "[Medias] Cancelling processing jobs after shutdown timeout",
-                pending_jobs=len(self._tasks),
+                pending_jobs=self.pending_jobs,
+                dropped_jobs=len(dropped) + len(self._followers),
                 timeout_seconds=CONFIG.media_shutdown_timeout,
             )
-            for task in tuple(self._tasks):
-                task.cancel()
-            await asyncio.gather(*tuple(self._tasks), return_exceptions=True)
 
-        await logger.ainfo("[Medias] Processing manager stopped", pending_jobs=len(self._tasks))
+        await self._stop_workers()
+        await logger.ainfo("[Medias] Processing manager stopped", pending_jobs=self.pending_jobs)
+
+    async def _join(self) -> None:
+        # Followers go back to the queue once their leader is done, and may follow a new leader from there.
+        while True:
+            await self._queue.join()
+            if not self._followers:
+                return
+            await asyncio.wait(tuple(self._followers))
+
+    async def _stop_workers(self) -> None:
+        tasks = (*self._workers, *self._followers, *((self._listener,) if self._listener else ()))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener = None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                following = await self._run(job)
+            finally:
+                await self._queue.task_done(job)
+            # A follower is done only once it runs again after its leader.
+            if job.on_done is not None and not following:
+                await job.on_done()
+
+    async def _follow_leader(self, job: MediaJob, lock: Lock, lock_name: str) -> None:
+        done = self._leader_done.setdefault(lock_name, asyncio.Event())
+        try:
+            leader_done = not await lock.locked()
+        except RedisError:
+            leader_done = True
+        if leader_done:
+            # The leader finished before `done` was registered, so its announcement was missed.
+            self._leader_done.pop(lock_name, None)
+            done.set()
+
+        follower = asyncio.create_task(self._await_leader(job, done), name=f"media-follower:{job.source_id}")
+        self._followers.add(follower)
+        follower.add_done_callback(self._followers.discard)
 
-    async def _run(self, job: MediaJob) -> None:
+    async def _await_leader(self, job: MediaJob, done: asyncio.Event) -> None:
+        waited_at = perf_counter()
+        # A leader that died without publishing holds the lock until it expires.
+        with suppress(TimeoutError):
+            async with asyncio.timeout(CONFIG.media_processing_lock_timeout):
+                await done.wait()
+
+        cached = job.has_cached_post is not None and await job.has_cached_post()
+        await logger.ainfo(
+            "[Medias] Leader job finished",
+            handler=job.handler_name,
+            source_id=job.source_id,
+            cached=cached,
+            wait_seconds=round(perf_counter() - waited_at, 3),
+        )
+        # With the post cached, the follower only resends file_ids; otherwise it tries to lead itself.
+        await self._enqueue(replace(job, priority=cached, coalesced=cached, queued_at=perf_counter()))
+
+    async def _announce_leader_done(self, lock_name: str) -> None:
+        if done := self._leader_done.pop(lock_name, None):
+            done.set()
+        try:
+            await aredis.publish(_MEDIA_DONE_CHANNEL, lock_name)
+        except RedisError as error:
+            await logger.awarning("[Medias] Could not announce finished job", error_type=type(error).__name__)
+
+    async def _listen_leader_done(self) -> None:
+        while True:
+            try:
+                async with aredis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(_MEDIA_DONE_CHANNEL)
+                    async for message in pubsub.listen():
+                        data = message.get("data")
+                        if isinstance(data, bytes) and (done := self._leader_done.pop(data.decode(), None)):
+                            done.set()
+            except RedisError as error:
+                # Followers whose message was missed fall back to the lock timeout.
+                await logger.awarning("[Medias] Leader listener disconnected", error_type=type(error).__name__)
+                await asyncio.sleep(_MEDIA_DONE_RETRY_DELAY)
+
+    async def _run(self, job: MediaJob) -> bool:
         started_at = perf_counter()
+        following = False
         with sentry_sdk.isolation_scope() as scope:
             scope.set_tag("korone.handler", job.handler_name)
             scope.set_tag("korone.fsm_isolation", "disabled")
@@ -131,10 +252,13 @@ class MediaProcessingManager:
                 "[Medias] Processing started",
                 handler=job.handler_name,
                 source_id=job.source_id,
-                pending_jobs=len(self._tasks),
+                chat_id=job.chat_id,
+                priority=job.priority,
+                pending_jobs=self.pending_jobs,
+                queue_wait_seconds=round(started_at - job.queued_at, 3),
             )
             try:
-                await self._run_with_lock(job, scope)
+                following = await self._run_with_lock(job, scope)
             except asyncio.CancelledError:
                 await logger.ainfo(
                     "[Medias] Processing cancelled",
@@ -166,17 +290,38 @@ class MediaProcessingManager:
                     "[Medias] Processing finished",
                     handler=job.handler_name,
                     source_id=job.source_id,
+                    following=following,
                     duration_seconds=round(duration, 3),
                 )
+        return following
 
-    async def _run_with_lock(self, job: MediaJob, scope: sentry_sdk.Scope) -> None:
-        lock = aredis.lock(
-            _media_lock_name(job.source_url),
-            timeout=CONFIG.media_processing_lock_timeout,
-        )
+    async def _run_with_lock(self, job: MediaJob, scope: sentry_sdk.Scope) -> bool:
+        """Run `job` under the processing lock of its post, returning True when it was parked as a follower.
+
+        Jobs that can be answered from the post cache do not wait on the lock while holding a worker: they
+        follow the job holding it and are queued again once it is done.
+        """
+        if job.coalesced:
+            scope.set_tag("korone.media_lock", "coalesced")
+            await job.handler(job.event, job.data)
+            return False
+
+        lock_name = _media_lock_name(job.canonical_key or job.source_url)
+        lock = media_lock_redis.lock(lock_name, timeout=CONFIG.media_processing_lock_timeout)
+        can_follow = job.has_cached_post is not None
         lock_started_at = perf_counter()
         try:
-            acquired = await lock.acquire()
+            acquired = await lock.acquire(blocking=not can_follow)
+            if not acquired and can_follow:
+                await self._follow_leader(job, lock, lock_name)
+                scope.set_tag("korone.media_lock", "following")
+                await logger.ainfo(
+                    "[Medias] Following the job already processing this post",
+                    handler=job.handler_name,
+                    source_id=job.source_id,
+                    chat_id=job.chat_id,
+                )
+                return True
         except asyncio.CancelledError:
             raise
         except RedisError as error:
@@ -187,9 +332,8 @@ class MediaProcessingManager:
                 source_id=job.source_id,
                 error_type=type(error).__name__,
             )
-            async with self._concurrency:
-                await job.handler(job.event, job.data)
-            return
+            await job.handler(job.event, job.data)
+            return False
 
         lock_wait = perf_counter() - lock_started_at
         scope.set_context(
@@ -218,19 +362,13 @@ class MediaProcessingManager:
             name=f"media-lock-renewal:{job.source_id}",
         )
         try:
-            async with self._concurrency:
-                queue_wait = perf_counter() - job.queued_at
-                await logger.adebug(
-                    "[Medias] Processing slot acquired",
-                    handler=job.handler_name,
-                    source_id=job.source_id,
-                    queue_wait_seconds=round(queue_wait, 3),
-                )
-                await job.handler(job.event, job.data)
+            await job.handler(job.event, job.data)
         finally:
             renewal_task.cancel()
             await asyncio.gather(renewal_task, return_exceptions=True)
             await self._release_lock(lock, lock_lost, job)
+            await self._announce_leader_done(lock_name)
+        return False
 
     @staticmethod
     async def _renew_lock(lock: Lock, lock_lost: asyncio.Event, job: MediaJob) -> None:
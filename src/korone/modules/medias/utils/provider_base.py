@@ -4,21 +4,31 @@ import random
 from abc import ABC, abstractmethod
 from pathlib import Path
 from time import perf_counter
-from typing import TYPE_CHECKING, ClassVar, Literal
+from typing import TYPE_CHECKING, BinaryIO, ClassVar, Literal, overload
 from urllib.parse import urlparse
 
 import aiohttp
 import sentry_sdk
-from aiogram.types import BufferedInputFile
+from aiogram.types import BufferedInputFile, FSInputFile
 
+from korone.config import CONFIG
 from korone.logger import get_logger
 from korone.modules.medias.utils.url import normalize_media_url
 from korone.modules.utils_.file_id_cache import get_cached_file_payload, make_file_id_cache_key
 from korone.utils.aiohttp_session import HTTPClient
-
+from korone.utils.host_limiter import HostCircuitOpenError
+
+from .post_cache import (
+    delete_cached_resolved_post,
+    get_cached_resolved_post,
+    get_cached_short_link,
+    set_cached_resolved_post,
+    set_cached_short_link,
+)
+from .spool import current_spool, memory_stats, track_buffered
 from .types import MediaItem, MediaKind
 
-type FetchPayloadAttemptResult = tuple[bytes, str] | Literal["retry"] | None
+type FetchPayloadAttemptResult = tuple[bytes | Path, str] | Literal["retry"] | None
 
 if TYPE_CHECKING:
     import re
@@ -26,7 +36,8 @@ if TYPE_CHECKING:
 
     from aiogram.types import InputFile
 
-    from .types import MediaPost, MediaSource
+    from .spool import MediaSpool
+    from .types import MediaPost, MediaSource, ResolvedPost
 
 logger = get_logger(__name__)
 
@@ -35,6 +46,8 @@ class MediaProvider(ABC):
     name: ClassVar[str]
     website: ClassVar[str]
     pattern: ClassVar[re.Pattern[str]]
+    # Lowercase substrings at least one of which appears in any URL `pattern` matches.
+    url_hints: ClassVar[tuple[str, ...]]
 
     _DEFAULT_HEADERS: ClassVar[dict[str, str]] = {
         "User-Agent": (
@@ -51,17 +64,99 @@ class MediaProvider(ABC):
     _DOWNLOAD_RETRY_BASE_DELAY_SECONDS: ClassVar[float] = 0.35
     _DOWNLOAD_RETRY_JITTER_SECONDS: ClassVar[float] = 0.2
     _DOWNLOAD_CHUNK_SIZE_BYTES: ClassVar[int] = 64 * 1024
+    _SPOOL_WRITE_BUFFER_BYTES: ClassVar[int] = 1024 * 1024
     _TRANSIENT_HTTP_STATUS: ClassVar[tuple[int, ...]] = (408, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524)
 
     @classmethod
     def extract_urls(cls, text: str) -> list[str]:
         return [match.group(0) for match in cls.pattern.finditer(text)]
 
+    @classmethod
+    def extract_post_id(cls, url: str) -> str | None:
+        """Return the post id in `url` when it can be read without a request, e.g. not from a short link."""
+        return None
+
+    @classmethod
+    async def resolve_short_link(cls, url: str) -> str | None:
+        """Follow a short link to the id of the post it points at; None when the provider has no short links."""
+        return None
+
+    @classmethod
+    async def resolve_post_id(cls, url: str) -> str | None:
+        if post_id := await cls.cached_post_id(url):
+            return post_id
+
+        post_id = await cls.resolve_short_link(url)
+        if post_id:
+            await set_cached_short_link(cls.name, normalize_media_url(url) or url.strip(), post_id)
+        return post_id
+
+    @classmethod
+    async def cached_post_id(cls, url: str) -> str | None:
+        """Like `resolve_post_id`, but never sends a request: short links are only looked up in the cache."""
+        if post_id := cls.extract_post_id(url):
+            return post_id
+        return await get_cached_short_link(cls.name, normalize_media_url(url) or url.strip())
+
+    @classmethod
+    async def canonical_key(cls, url: str) -> str:
+        """Identify the post behind `url`, so every way of linking to a post maps to the same key.
+
+        Falls back to the normalized URL when no post id can be found.
+        """
+        return cls._canonical_key(url, await cls.resolve_post_id(url))
+
+    @classmethod
+    async def cached_canonical_key(cls, url: str) -> str:
+        """Like `canonical_key`, but cheap enough to compute before a job is queued.
+
+        Short links that were never resolved fall back to their normalized URL.
+        """
+        return cls._canonical_key(url, await cls.cached_post_id(url))
+
+    @classmethod
+    def _canonical_key(cls, url: str, post_id: str | None) -> str:
+        if post_id:
+            return f"{cls.name.casefold()}:{post_id}"
+        return normalize_media_url(url) or url.strip()
+
     @classmethod
     @abstractmethod
-    async def fetch(cls, url: str) -> MediaPost | None:
+    async def resolve(cls, url: str) -> ResolvedPost | None:
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    async def download_post_media(cls, post: ResolvedPost) -> list[MediaItem]:
         raise NotImplementedError
 
+    @classmethod
+    async def fetch(cls, url: str) -> MediaPost | None:
+        post = await cls._resolve_cached(url)
+        if not post:
+            return None
+
+        media = await cls.download_post_media(post)
+        if not media:
+            # The cached source URLs may have expired; resolve the post again next time.
+            await delete_cached_resolved_post(cls.name, post.post_id)
+            return None
+
+        return post.to_post(media)
+
+    @classmethod
+    async def _resolve_cached(cls, url: str) -> ResolvedPost | None:
+        if (post_id := await cls.resolve_post_id(url)) and (
+            cached := await get_cached_resolved_post(cls.name, post_id)
+        ):
+            await logger.adebug("[Medias] Resolved post cache hit", provider=cls.name, post_id=post_id)
+            return cached
+
+        post = await cls.resolve(url)
+        if post:
+            await set_cached_resolved_post(cls.name, post)
+        return post
+
     @classmethod
     async def safe_fetch(cls, url: str) -> MediaPost | None:
         try:
@@ -153,6 +248,15 @@ class MediaProvider(ABC):
                 source_kind=source.kind.value,
             )
 
+    @staticmethod
+    def _payload_input_file(payload: bytes | Path, filename: str, spool: MediaSpool | None) -> InputFile | str:
+        if not isinstance(payload, Path):
+            return BufferedInputFile(payload, filename)
+        if spool and spool.shared:
+            # The Bot API server reads the shared spool directly, so it only needs the path.
+            return payload.as_uri()
+        return FSInputFile(payload, filename)
+
     @classmethod
     async def _download_source(
         cls, source: MediaSource, index: int, prefix: str, max_size: int | None, label: str
@@ -172,8 +276,16 @@ class MediaProvider(ABC):
                     height=source.height,
                 )
 
+        # Photos stay in memory because compression needs their bytes; videos may be spooled to disk.
+        spool = current_spool() if source.kind == MediaKind.VIDEO else None
         payload_result = await cls._fetch_payload_with_retry(
-            source.url, label=label, stage="source", max_size=max_size, source_kind=source.kind, source_index=index
+            source.url,
+            label=label,
+            stage="source",
+            max_size=max_size,
+            source_kind=source.kind,
+            source_index=index,
+            spool=spool,
         )
         if payload_result is None:
             return None
@@ -189,10 +301,9 @@ class MediaProvider(ABC):
             thumbnail = await cls._download_thumbnail(source.thumbnail_url, label, index, prefix)
 
         filename = f"{prefix}_{index}{extension}"
-
         return MediaItem(
             kind=source.kind,
-            file=BufferedInputFile(payload, filename),
+            file=cls._payload_input_file(payload, filename, spool),
             filename=filename,
             source_url=source.url,
             thumbnail=thumbnail,
@@ -250,6 +361,7 @@ class MediaProvider(ABC):
         jitter = random.uniform(0.0, cls._DOWNLOAD_RETRY_JITTER_SECONDS)
         await asyncio.sleep(backoff + jitter)
 
+    @overload
     @classmethod
     async def _fetch_payload_with_retry(
         cls,
@@ -260,7 +372,35 @@ class MediaProvider(ABC):
         max_size: int | None = None,
         source_kind: MediaKind | None = None,
         source_index: int | None = None,
-    ) -> tuple[bytes, str] | None:
+        spool: None = None,
+    ) -> tuple[bytes, str] | None: ...
+
+    @overload
+    @classmethod
+    async def _fetch_payload_with_retry(
+        cls,
+        url: str,
+        *,
+        label: str,
+        stage: Literal["source", "thumbnail"],
+        max_size: int | None = None,
+        source_kind: MediaKind | None = None,
+        source_index: int | None = None,
+        spool: MediaSpool | None,
+    ) -> tuple[bytes | Path, str] | None: ...
+
+    @classmethod
+    async def _fetch_payload_with_retry(
+        cls,
+        url: str,
+        *,
+        label: str,
+        stage: Literal["source", "thumbnail"],
+        max_size: int | None = None,
+        source_kind: MediaKind | None = None,
+        source_index: int | None = None,
+        spool: MediaSpool | None = None,
+    ) -> tuple[bytes | Path, str] | None:
         session = await HTTPClient.get_session()
         max_attempts = cls._DOWNLOAD_RETRY_ATTEMPTS
         for attempt in range(1, max_attempts + 1):
@@ -273,6 +413,7 @@ class MediaProvider(ABC):
                         attempt=attempt,
                         max_attempts=max_attempts,
                         max_size=max_size,
+                        spool=spool,
                     )
                 if attempt_result != "retry":
                     return attempt_result
@@ -293,6 +434,14 @@ class MediaProvider(ABC):
                     source_index=source_index,
                 )
                 return None
+            except HostCircuitOpenError:
+                await logger.adebug(
+                    "[Medias] Download host unavailable",
+                    **cls._build_download_log_context(
+                        label=label, url=url, stage=stage, source_kind=source_kind, source_index=source_index
+                    ),
+                )
+                return None
             except aiohttp.ClientError as error:
                 if attempt < max_attempts:
                     await cls._sleep_before_retry(attempt)
@@ -326,6 +475,7 @@ class MediaProvider(ABC):
         attempt: int,
         max_attempts: int,
         max_size: int | None,
+        spool: MediaSpool | None = None,
     ) -> FetchPayloadAttemptResult:
         if response.status != 200:
             if attempt < max_attempts and cls._should_retry_status(response.status):
@@ -337,7 +487,7 @@ class MediaProvider(ABC):
             await logger.adebug(f"[{label}] Media too large", size=content_len)
             return None
 
-        payload = await cls._read_payload(response, label=label, max_size=max_size)
+        payload = await cls._read_payload(response, label=label, max_size=max_size, spool=spool)
         if payload is None:
             return None
 
@@ -407,24 +557,69 @@ class MediaProvider(ABC):
         )
 
     @classmethod
-    async def _read_payload(cls, response: aiohttp.ClientResponse, *, label: str, max_size: int | None) -> bytes | None:
-        if max_size is None:
-            return await response.read()
-
-        payload = bytearray()
+    async def _read_payload(
+        cls, response: aiohttp.ClientResponse, *, label: str, max_size: int | None, spool: MediaSpool | None = None
+    ) -> bytes | Path | None:
+        """Read the body into memory, or into a file of `spool` once it reaches `media_spool_threshold_bytes`.
+
+        Shared spools take every payload, since the local Bot API server can read them without an upload.
+        """
+        threshold = 0 if spool and spool.shared else CONFIG.media_spool_threshold_bytes
+        chunks: list[bytes] = []
+        buffered = 0
         total_size = 0
-        async for chunk in response.content.iter_chunked(cls._DOWNLOAD_CHUNK_SIZE_BYTES):
-            if not chunk:
-                continue
+        path: Path | None = None
+        file: BinaryIO | None = None
+        if spool and response.content_length is not None and response.content_length >= threshold:
+            path = spool.new_path()
+            file = await asyncio.to_thread(path.open, "wb")
 
-            total_size += len(chunk)
-            if total_size > max_size:
-                await logger.adebug(f"[{label}] Media too large", size=total_size)
-                return None
-
-            payload.extend(chunk)
+        try:
+            async for chunk in response.content.iter_chunked(cls._DOWNLOAD_CHUNK_SIZE_BYTES):
+                if not chunk:
+                    continue
 
-        return bytes(payload)
+                total_size += len(chunk)
+                if max_size is not None and total_size > max_size:
+                    await logger.adebug(f"[{label}] Media too large", size=total_size)
+                    return None
+
+                chunks.append(chunk)
+                buffered += len(chunk)
+                track_buffered(len(chunk))
+
+                if spool and file is None and total_size >= threshold:
+                    path = spool.new_path()
+                    file = await asyncio.to_thread(path.open, "wb")
+                if file is not None and buffered >= cls._SPOOL_WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(file.write, b"".join(chunks))
+                    chunks.clear()
+                    track_buffered(-buffered)
+                    buffered = 0
+
+            if file is not None and path is not None:
+                if chunks:
+                    await asyncio.to_thread(file.write, b"".join(chunks))
+                await asyncio.to_thread(file.close)
+                file = None
+                memory_stats.spooled_files += 1
+                memory_stats.spooled_bytes += total_size
+                result: bytes | Path = path
+                path = None
+                return result
+
+            payload = b"".join(chunks)
+            if spool:
+                # Keep counting the payload until its job releases the spool.
+                spool.retained_bytes += buffered
+                buffered = 0
+            return payload
+        finally:
+            track_buffered(-buffered)
+            if file is not None:
+                await asyncio.to_thread(file.close)
+            if path is not None:
+                await asyncio.to_thread(path.unlink, missing_ok=True)
 
     @classmethod
     async def _download_thumbnail(cls, url: str, label: str, index: int, prefix: str) -> InputFile | None:
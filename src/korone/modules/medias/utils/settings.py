@@ -1,8 +1,9 @@
-from korone.db.repositories.disabling import DisablingRepository
+from korone.db.chat_settings import ChatSettings, get_chat_settings
 
 AUTO_DOWNLOAD_KEY = "medias_autodownload"
 
 
-async def is_auto_download_enabled(chat_id: int) -> bool:
-    disabled = await DisablingRepository.get_disabled(chat_id)
-    return AUTO_DOWNLOAD_KEY not in disabled
+async def is_auto_download_enabled(chat_id: int, settings: ChatSettings | None = None) -> bool:
+    if settings is None or settings.chat_id != chat_id:
+        settings = await get_chat_settings(chat_id)
+    return not settings.is_disabled(AUTO_DOWNLOAD_KEY)
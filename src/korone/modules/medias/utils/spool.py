@@ -0,0 +1,83 @@
+import asyncio
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from korone.config import CONFIG
+from korone.logger import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+logger = get_logger(__name__)
+
+_current_spool: ContextVar[MediaSpool | None] = ContextVar("media_spool", default=None)
+
+
+@dataclass(slots=True)
+class MediaMemoryStats:
+    buffered_bytes: int = 0
+    peak_buffered_bytes: int = 0
+    spooled_files: int = 0
+    spooled_bytes: int = 0
+    active_spools: int = 0
+
+
+memory_stats = MediaMemoryStats()
+
+
+def track_buffered(delta: int) -> None:
+    """Account payload bytes held in memory by the media pipeline, keeping the high-water mark."""
+    memory_stats.buffered_bytes += delta
+    memory_stats.peak_buffered_bytes = max(memory_stats.peak_buffered_bytes, memory_stats.buffered_bytes)
+
+
+class MediaSpool:
+    """Private directory for payloads of one media job, removed as a whole when the job ends.
+
+    A shared spool lives in a directory the local Bot API server can read at the same path, so its files
+    are sent as `file://` URIs instead of being uploaded.
+    """
+
+    def __init__(self, directory: Path, *, shared: bool = False) -> None:
+        self.directory = directory
+        self.shared = shared
+        self.retained_bytes = 0
+        self._names = count(1)
+
+    def new_path(self, suffix: str = "") -> Path:
+        return self.directory / f"{next(self._names)}{suffix}"
+
+
+def current_spool() -> MediaSpool | None:
+    return _current_spool.get()
+
+
+@asynccontextmanager
+async def media_spool() -> AsyncGenerator[MediaSpool]:
+    shared = bool(CONFIG.botapi_server and CONFIG.botapi_shared_spool_dir)
+    root = CONFIG.botapi_shared_spool_dir if shared else CONFIG.media_spool_dir
+    if root:
+        await asyncio.to_thread(Path(root).mkdir, parents=True, exist_ok=True)
+    directory = Path(await asyncio.to_thread(tempfile.mkdtemp, prefix="korone-media-", dir=root))
+    if shared:
+        # mkdtemp creates the directory owner-only; the Bot API server runs as a different user.
+        await asyncio.to_thread(directory.chmod, 0o755)
+
+    spool = MediaSpool(directory, shared=shared)
+    token = _current_spool.set(spool)
+    memory_stats.active_spools += 1
+    try:
+        yield spool
+    finally:
+        _current_spool.reset(token)
+        memory_stats.active_spools -= 1
+        # In-memory payloads of the job are released together with its files.
+        track_buffered(-spool.retained_bytes)
+        await asyncio.to_thread(shutil.rmtree, directory, ignore_errors=True)
+        await logger.adebug("[Medias] Spool directory removed", directory=str(directory))
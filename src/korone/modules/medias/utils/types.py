@@ -46,3 +46,32 @@ class MediaSource:
     height: int | None = None
     audio_url: str | None = None
     fallback_url: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedPost:
+    """Post metadata and media source URLs, resolved by a provider before anything is downloaded."""
+
+    post_id: str
+    author_name: str
+    author_handle: str
+    text: str
+    url: str
+    website: str
+    sources: list[MediaSource]
+    quote_text: str | None = None
+    quote_author_name: str | None = None
+    quote_author_handle: str | None = None
+
+    def to_post(self, media: list[MediaItem]) -> MediaPost:
+        return MediaPost(
+            author_name=self.author_name,
+            author_handle=self.author_handle,
+            text=self.text,
+            url=self.url,
+            website=self.website,
+            media=media,
+            quote_text=self.quote_text,
+            quote_author_name=self.quote_author_name,
+            quote_author_handle=self.quote_author_handle,
+        )
@@ -3,6 +3,7 @@ from aiogram.filters import Command
 
 from korone import aredis
 from korone.filters.user_status import IsOP
+from korone.utils.cached import clear_local_cache
 from korone.utils.formatting import Code, Doc, Template
 from korone.utils.handlers import KoroneMessageHandler
 
@@ -16,6 +17,7 @@ class RedisClearHandler(KoroneMessageHandler):
     async def handle(self) -> None:
         before = await aredis.dbsize()
         await aredis.flushdb()
+        await clear_local_cache()
         after = await aredis.dbsize()
         removed = max(before - after, 0)
 
@@ -8,12 +8,19 @@ from korone import aredis
 from korone.db.session import get_postgres_stats
 from korone.filters.user_status import IsOP
 from korone.modules import LOADED_MODULES
+from korone.modules.utils_.admin_index import admin_index
+from korone.utils.cached import cache_stats
 from korone.utils.formatting import Code, Doc, KeyValue, Section, Template
 from korone.utils.handlers import KoroneMessageHandler
+from korone.utils.host_limiter import CircuitState, HostLimiter
+from korone.utils.image_pool import ImagePool
+from korone.utils.redis_pool import redis_pool_stats
 
 if TYPE_CHECKING:
     from aiogram.dispatcher.event.handler import CallbackType
 
+_HOST_STATS_LIMIT = 10
+
 
 def convert_size(size_bytes: int) -> str:
     if size_bytes == 0:
@@ -36,6 +43,69 @@ async def get_system_stats() -> Doc:
     )
 
     technical_section += KeyValue("Redis keys", Code(await aredis.dbsize()))
+
+    cache = cache_stats()
+    technical_section += KeyValue(
+        "Cache hits",
+        Template(
+            "local {local_hits}/{local_total}, redis {redis_hits}/{redis_total}",
+            local_hits=Code(cache["local_hits"]),
+            local_total=Code(cache["local_hits"] + cache["local_misses"]),
+            redis_hits=Code(cache["redis_hits"]),
+            redis_total=Code(cache["redis_hits"] + cache["redis_misses"]),
+        ),
+    )
+    technical_section += KeyValue(
+        "Admin index",
+        Template(
+            "{chats} chats, {hits}/{total} hits",
+            chats=Code(len(admin_index)),
+            hits=Code(admin_index.hits),
+            total=Code(admin_index.hits + admin_index.misses),
+        ),
+    )
+
+    for pool in redis_pool_stats():
+        technical_section += KeyValue(
+            f"Redis pool {pool.name}",
+            Template(
+                "{in_use}/{max_connections} in use, {saturated} waits, avg {wait_avg} ms, max {wait_max} ms",
+                in_use=Code(pool.in_use),
+                max_connections=Code(pool.max_connections),
+                saturated=Code(pool.saturated),
+                wait_avg=Code(round(pool.wait_avg_ms, 2)),
+                wait_max=Code(round(pool.wait_max_ms, 2)),
+            ),
+        )
+    image_pool = ImagePool.stats
+    technical_section += KeyValue(
+        "Image pool",
+        Template(
+            "{workers} workers, {pending} queued (max {max_pending}), {failed} failed, {timeouts} timeouts",
+            workers=Code(image_pool.workers),
+            pending=Code(image_pool.pending),
+            max_pending=Code(image_pool.max_pending),
+            failed=Code(image_pool.failed),
+            timeouts=Code(image_pool.timeouts),
+        ),
+    )
+    # Hosts with an open circuit first, then the busiest ones.
+    hosts = sorted(HostLimiter.stats(), key=lambda host: (host.circuit == CircuitState.CLOSED, -host.requests))
+    for host in hosts[:_HOST_STATS_LIMIT]:
+        technical_section += KeyValue(
+            f"Host {host.host}",
+            Template(
+                "{circuit}, limit {limit}, {in_flight} in flight, {success}% ok of {requests}, avg {latency} ms, "
+                "{rejected} rejected",
+                circuit=Code(host.circuit.value),
+                limit=Code(host.limit),
+                in_flight=Code(host.in_flight),
+                success=Code(round(host.success_rate * 100)),
+                requests=Code(host.requests),
+                latency=Code(round(host.latency_ms)),
+                rejected=Code(host.rejected),
+            ),
+        )
     technical_section += KeyValue("Modules", Template("{modules} loaded", modules=Code(len(LOADED_MODULES))))
 
     doc += technical_section
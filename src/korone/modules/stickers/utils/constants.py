@@ -1,5 +1,6 @@
 DEFAULT_EMOJI = "🤔"
 MAX_STICKER_SIDE = 512
+MAX_STATIC_STICKER_SIZE_BYTES = 512_000
 MAX_VIDEO_SECONDS = 3.0
 MAX_VIDEO_SIZE_BYTES = 256_000
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".avi", ".mkv", ".gif"}
@@ -1,6 +1,7 @@
 import asyncio
 import math
 import shutil
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from functools import cache
 from pathlib import Path
@@ -10,11 +11,19 @@ import orjson
 from aiogram.types import FSInputFile, InputSticker
 from PIL import Image
 
+from korone.modules.utils_.image_probe import PROBE_HEADER_BYTES, probe_image
 from korone.modules.utils_.telegram_file import download_telegram_file
 from korone.utils.formatting import Template
 from korone.utils.i18n import gettext as _
-
-from .constants import MAX_STICKER_SIDE, MAX_VIDEO_SECONDS, MAX_VIDEO_SIZE_BYTES, VIDEO_EXTENSIONS
+from korone.utils.image_pool import ImagePool
+
+from .constants import (
+    MAX_STATIC_STICKER_SIZE_BYTES,
+    MAX_STICKER_SIDE,
+    MAX_VIDEO_SECONDS,
+    MAX_VIDEO_SIZE_BYTES,
+    VIDEO_EXTENSIONS,
+)
 from .errors import StickerPrepareError
 
 if TYPE_CHECKING:
@@ -96,19 +105,34 @@ async def prepare_sticker_file(source_path: Path) -> tuple[Path, str]:
         await convert_video_for_sticker(source_path, output)
         return output, "video"
 
+    if await _is_sticker_ready_image(source_path):
+        return source_path, "static"
+
     output = source_path.with_suffix(".png")
     await convert_image_for_sticker(source_path, output)
     return output, "static"
 
 
+async def _is_sticker_ready_image(source_path: Path) -> bool:
+    """Check whether a static PNG or WebP already fits a sticker, so it can be used without re-encoding."""
+    if (await asyncio.to_thread(source_path.stat)).st_size > MAX_STATIC_STICKER_SIZE_BYTES:
+        return False
+
+    header = await asyncio.to_thread(read_file_header, source_path, PROBE_HEADER_BYTES)
+    probe = probe_image(header)
+    if probe is None or probe.format not in {"png", "webp"} or probe.orientation != 1 or probe.animated:
+        return False
+    return max(probe.width, probe.height) == MAX_STICKER_SIDE and min(probe.width, probe.height) >= 1
+
+
 def create_input_sticker(path: Path, *, sticker_format: str, emoji: str) -> InputSticker:
     return InputSticker(sticker=FSInputFile(path), format=sticker_format, emoji_list=[emoji])
 
 
 async def convert_image_for_sticker(source_path: Path, output_path: Path) -> None:
     try:
-        await asyncio.to_thread(_convert_image_for_sticker_sync, source_path, output_path)
-    except OSError as exc:
+        await ImagePool.run(_convert_image_for_sticker_sync, source_path, output_path)
+    except (OSError, TimeoutError, BrokenProcessPool) as exc:
         raise StickerPrepareError(_("Could not process this file as an image sticker.")) from exc
 
 
@@ -255,6 +279,11 @@ def path_size(path: Path) -> int:
     return path.stat().st_size
 
 
+def read_file_header(path: Path, size: int) -> bytes:
+    with path.open("rb") as file:
+        return file.read(size)
+
+
 async def run_subprocess(command: list[str]) -> tuple[int, str, str]:
     process = await asyncio.create_subprocess_exec(
         *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
@@ -52,7 +52,7 @@ class UserInfoHandler(KoroneMessageHandler):
             return
 
         chat_id = self.chat.chat_id
-        user_id = target_user.id
+        user_id = target_user.chat_id
 
         doc = Doc(Title(_("User Information")))
 
@@ -1,33 +1,19 @@
-from typing import TYPE_CHECKING, Literal
-
-from aiogram.enums import ChatMemberStatus
+from typing import TYPE_CHECKING
 
 from korone.config import CONFIG
 from korone.constants import TELEGRAM_ANONYMOUS_ADMIN_BOT_ID
 from korone.db.repositories.chat import ChatRepository
 from korone.db.repositories.chat_admin import ChatAdminRepository
 from korone.logger import get_logger
-from korone.modules.utils_.chat_member import update_chat_members
+from korone.modules.utils_.admin_index import admin_index
+from korone.modules.utils_.chat_member import refresh_chat_members
 
 if TYPE_CHECKING:
-    from typing import Any
-
     from korone.db.models.chat import ChatModel
+    from korone.modules.utils_.admin_index import AdminEntry
 
 logger = get_logger(__name__)
 
-AdminPermission = Literal[
-    "can_post_messages",
-    "can_edit_messages",
-    "can_delete_messages",
-    "can_restrict_members",
-    "can_promote_members",
-    "can_change_info",
-    "can_invite_users",
-    "can_pin_messages",
-    "can_manage_tags",
-]
-
 
 async def _resolve_model(model_id: int) -> ChatModel | None:
     if model := await ChatRepository.get_by_chat_id(model_id):
@@ -35,18 +21,33 @@ async def _resolve_model(model_id: int) -> ChatModel | None:
     return await ChatRepository.get_by_id(model_id)
 
 
-async def _ensure_admin_cache(chat_model: ChatModel) -> None:
-    if await ChatAdminRepository.has_admins(chat_model):
-        return
+async def _get_admins(chat_model: ChatModel) -> dict[int, AdminEntry]:
+    if (admins := await admin_index.get(chat_model.chat_id)) is not None:
+        return admins
+
+    admins_data, updated_at = await ChatAdminRepository.get_admins_by_user_chat_id(chat_model)
+    if not admins_data or updated_at is None:
+        return await refresh_chat_members(chat_model)
+    return admin_index.put(chat_model.chat_id, admins_data, updated_at)
 
-    await update_chat_members(chat_model)
 
+def _is_implicit_admin(chat: int, user: int) -> bool:
+    return chat == user or user in CONFIG.operators or user == TELEGRAM_ANONYMOUS_ADMIN_BOT_ID
 
-async def _get_admin_data(chat_model: ChatModel, user_model: ChatModel) -> dict[str, Any] | None:
-    await _ensure_admin_cache(chat_model)
-    if admin := await ChatAdminRepository.get_chat_admin(chat_model, user_model):
-        return admin.data
-    return None
+
+def _check_admin_entry(
+    admin: AdminEntry | None, required_permissions: list[str] | None, *, require_creator: bool
+) -> bool | list[str]:
+    if admin is None:
+        return False
+
+    if require_creator:
+        return admin.is_creator
+
+    if not required_permissions or admin.is_creator:
+        return True
+
+    return admin.missing_permissions(required_permissions) or True
 
 
 async def check_user_admin_permissions(
@@ -66,14 +67,14 @@ async def check_user_admin_permissions(
         require_creator=require_creator,
     )
 
-    if chat == user and not require_creator:
+    chat_id = chat_model.chat_id if chat_model else chat
+    user_id = user_model.chat_id if user_model else user
+    if not require_creator and (_is_implicit_admin(chat, user) or _is_implicit_admin(chat_id, user_id)):
         return True
 
-    if user in CONFIG.operators and not require_creator:
-        return True
-
-    if user == TELEGRAM_ANONYMOUS_ADMIN_BOT_ID and not require_creator:
-        return True
+    # Fast path: the in-memory index is keyed by Telegram ids and answers without touching the database.
+    if (admins := await admin_index.get(chat_id)) is not None:
+        return _check_admin_entry(admins.get(user_id), required_permissions, require_creator=require_creator)
 
     if not chat_model:
         chat_model = await _resolve_model(chat)
@@ -85,40 +86,11 @@ async def check_user_admin_permissions(
     if not user_model:
         return False
 
-    if not require_creator:
-        if chat_model.chat_id == user_model.chat_id:
-            return True
-        if user_model.chat_id in CONFIG.operators:
-            return True
-        if user_model.chat_id == TELEGRAM_ANONYMOUS_ADMIN_BOT_ID:
-            return True
-
-    admin_data = await _get_admin_data(chat_model, user_model)
-    if not admin_data:
-        return False
-
-    if require_creator:
-        return _is_creator_status(admin_data.get("status"))
-
-    if not required_permissions:
+    if not require_creator and _is_implicit_admin(chat_model.chat_id, user_model.chat_id):
         return True
 
-    if _is_creator_status(admin_data.get("status")):
-        return True
-
-    missing_permissions = [permission for permission in required_permissions if admin_data.get(permission) is not True]
-
-    return missing_permissions or True
-
-
-def _is_creator_status(status: str | None) -> bool:
-    if status is None:
-        return False
-
-    try:
-        return ChatMemberStatus(status) == ChatMemberStatus.CREATOR
-    except ValueError:
-        return False
+    admins = await _get_admins(chat_model)
+    return _check_admin_entry(admins.get(user_model.chat_id), required_permissions, require_creator=require_creator)
 
 
 async def is_user_admin(chat: int, user: int) -> bool:
@@ -127,26 +99,8 @@ async def is_user_admin(chat: int, user: int) -> bool:
 
 
 async def is_chat_creator(chat: int, user: int) -> bool:
-    chat_model = await _resolve_model(chat)
-    if not chat_model:
-        return False
-
-    user_model = await _resolve_model(user)
-    if not user_model:
-        return False
-
-    admin_data = await _get_admin_data(chat_model, user_model)
-    if not admin_data:
-        return False
-
-    admin_status = admin_data.get("status")
-    if not admin_status:
-        return False
-
-    try:
-        return ChatMemberStatus(admin_status) == ChatMemberStatus.CREATOR
-    except ValueError:
-        return False
+    result = await check_user_admin_permissions(chat, user, require_creator=True)
+    return result is True
 
 
 async def get_admins_rights(chat: int, *, force_update: bool = False) -> None:
@@ -154,5 +108,7 @@ async def get_admins_rights(chat: int, *, force_update: bool = False) -> None:
     if not chat_model:
         return
 
-    if force_update or not await ChatAdminRepository.has_admins(chat_model):
-        await update_chat_members(chat_model)
+    if force_update:
+        await refresh_chat_members(chat_model, force=True)
+    else:
+        await _get_admins(chat_model)
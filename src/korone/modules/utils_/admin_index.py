@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, Final, Literal, get_args
+
+from aiogram.enums import ChatMemberStatus
+
+from korone.constants import CACHE_ADMIN_TTL_SECONDS
+from korone.db.chat_settings import get_chat_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+AdminPermission = Literal[
+    "can_post_messages",
+    "can_edit_messages",
+    "can_delete_messages",
+    "can_restrict_members",
+    "can_promote_members",
+    "can_change_info",
+    "can_invite_users",
+    "can_pin_messages",
+    "can_manage_tags",
+]
+
+_PERMISSION_BITS: Final[dict[str, int]] = {
+    permission: 1 << index for index, permission in enumerate(get_args(AdminPermission))
+}
+_ADMIN_INDEX_MAXSIZE: Final[int] = 10000
+# Snapshot timestamps round-trip through a JSON float, so allow for sub-millisecond drift.
+_VERSION_TOLERANCE_SECONDS: Final[float] = 0.001
+
+
+@dataclass(frozen=True, slots=True)
+class AdminEntry:
+    status: str | None
+    permissions: int
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> AdminEntry:
+        status = data.get("status")
+        permissions = 0
+        for permission, bit in _PERMISSION_BITS.items():
+            if data.get(permission) is True:
+                permissions |= bit
+        return cls(status=status if isinstance(status, str) else None, permissions=permissions)
+
+    @property
+    def is_creator(self) -> bool:
+        return self.status == ChatMemberStatus.CREATOR
+
+    def missing_permissions(self, required: Iterable[str]) -> list[str]:
+        return [permission for permission in required if not self.permissions & _PERMISSION_BITS.get(permission, 0)]
+
+
+@dataclass(frozen=True, slots=True)
+class _ChatAdmins:
+    admins: dict[int, AdminEntry]
+    updated_at: datetime
+
+    @property
+    def expired(self) -> bool:
+        return (datetime.now(UTC) - self.updated_at).total_seconds() > CACHE_ADMIN_TTL_SECONDS
+
+
+class AdminIndex:
+    """Chat admins keyed by Telegram chat and user ids, so admin checks need no database round-trip.
+
+    Entries expire together with the database admin cache. Refreshes on other instances are picked up by
+    comparing against the chat settings snapshot, which is invalidated whenever the admins are replaced.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._chats: dict[int, _ChatAdmins] = {}
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def put(self, chat_id: int, admins: Mapping[int, Mapping[str, Any]], updated_at: datetime) -> dict[int, AdminEntry]:
+        entries = {user_id: AdminEntry.from_data(data) for user_id, data in admins.items()}
+        self._chats.pop(chat_id, None)
+        self._chats[chat_id] = _ChatAdmins(entries, updated_at)
+        while len(self._chats) > self.maxsize:
+            del self._chats[next(iter(self._chats))]
+        return entries
+
+    def discard(self, chat_id: int) -> None:
+        self._chats.pop(chat_id, None)
+
+    async def get(self, chat_id: int) -> dict[int, AdminEntry] | None:
+        cached = self._chats.get(chat_id)
+        if cached is None or cached.expired or not await self._is_current(chat_id, cached):
+            self._chats.pop(chat_id, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cached.admins
+
+    @staticmethod
+    async def _is_current(chat_id: int, cached: _ChatAdmins) -> bool:
+        if not cached.admins:
+            return True
+
+        admins_updated_at = (await get_chat_settings(chat_id)).admins_updated_at
+        if admins_updated_at is None:
+            return False
+        return (admins_updated_at - cached.updated_at).total_seconds() < _VERSION_TOLERANCE_SECONDS
+
+
+admin_index = AdminIndex(_ADMIN_INDEX_MAXSIZE)
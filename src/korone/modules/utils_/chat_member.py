@@ -1,20 +1,33 @@
-from typing import TYPE_CHECKING, Any
+import asyncio
+from typing import TYPE_CHECKING, Any, Final
 
 from aiogram.exceptions import TelegramBadRequest
+from redis.exceptions import LockError, RedisError
 
-from korone import bot
-from korone.db.repositories.chat import ChatRepository
+from korone import aredis, bot
+from korone.constants import CACHE_ADMIN_TTL_SECONDS
+from korone.db.chat_settings import get_chat_settings
 from korone.db.repositories.chat_admin import ChatAdminRepository
 from korone.logger import get_logger
+from korone.modules.utils_.admin_index import admin_index
 
 if TYPE_CHECKING:
+    from collections.abc import Coroutine
+
     from aiogram.types import ResultChatMemberUnion
 
     from korone.db.models.chat import ChatModel
+    from korone.modules.utils_.admin_index import AdminEntry
 
 
 logger = get_logger(__name__)
 
+_REFRESH_LOCK_PREFIX: Final[str] = "korone:admin-refresh"
+_REFRESH_LOCK_TIMEOUT_SECONDS: Final[int] = 30
+
+# In-flight refresh per chat and whether it bypasses the result of another instance's refresh.
+_refreshes: dict[int, tuple[asyncio.Task[dict[int, AdminEntry]], bool]] = {}
+
 
 async def get_chat_members(chat_id: int) -> list[ResultChatMemberUnion]:
     try:
@@ -26,18 +39,103 @@ async def get_chat_members(chat_id: int) -> list[ResultChatMemberUnion]:
         raise
 
 
-async def update_chat_members(chat: ChatModel) -> None:
+async def update_chat_members(chat: ChatModel) -> dict[int, AdminEntry]:
     chat_members = await get_chat_members(chat.chat_id)
-    admins_map: dict[int, dict[str, Any]] = {}
+    index_map: dict[int, dict[str, Any]] = {member.user.id: member.model_dump(mode="json") for member in chat_members}
 
-    for member in chat_members:
-        user = await ChatRepository.get_by_chat_id(member.user.id)
-        if not user:
-            user = await ChatRepository.upsert_user(member.user)
+    updated_at = await ChatAdminRepository.replace_chat_admins_from_users(
+        chat, ((member.user, index_map[member.user.id]) for member in chat_members)
+    )
+    await logger.adebug(
+        "update_chat_members: updated admin cache in database", chat_id=chat.chat_id, count=len(index_map)
+    )
+    return admin_index.put(chat.chat_id, index_map, updated_at)
 
-        admins_map[user.id] = member.model_dump(mode="json")
 
-    await ChatAdminRepository.replace_chat_admins(chat, admins_map)
-    await logger.adebug(
-        "update_chat_members: updated admin cache in database", chat_id=chat.chat_id, count=len(admins_map)
+async def refresh_chat_members(chat: ChatModel, *, force: bool = False) -> dict[int, AdminEntry]:
+    """Refresh the admin cache of `chat`, sharing one refresh between all concurrent callers.
+
+    Within the process callers await the same task; across instances a Redis lock serializes the refresh, and
+    an instance that waited on it reuses the fresh result instead of asking Telegram again unless `force` is set.
+    A forced caller never joins a refresh that is not forced: it queues a forced one behind it instead.
+    """
+    match _refreshes.get(chat.chat_id):
+        case (task, running_force) if running_force or not force:
+            await logger.adebug("refresh_chat_members: joining in-flight refresh", chat_id=chat.chat_id)
+        case (previous, _):
+            await logger.adebug("refresh_chat_members: queueing forced refresh", chat_id=chat.chat_id)
+            task = _start_refresh(chat, _refresh_after(previous, chat), force=True)
+        case _:
+            task = _start_refresh(chat, _refresh_once(chat, force=force), force=force)
+
+    # Shielded so a cancelled waiter does not abort the refresh the other waiters depend on.
+    return await asyncio.shield(task)
+
+
+def _start_refresh(
+    chat: ChatModel, refresh: Coroutine[Any, Any, dict[int, AdminEntry]], *, force: bool
+) -> asyncio.Task[dict[int, AdminEntry]]:
+    task = asyncio.create_task(refresh, name=f"admin-refresh-{chat.chat_id}")
+    _refreshes[chat.chat_id] = (task, force)
+    task.add_done_callback(lambda done: _on_refresh_done(chat.chat_id, done))
+    return task
+
+
+async def _refresh_after(previous: asyncio.Task[dict[int, AdminEntry]], chat: ChatModel) -> dict[int, AdminEntry]:
+    # The outcome of the previous refresh does not matter, it only must not overlap with this one.
+    await asyncio.wait((previous,))
+    return await _refresh_once(chat, force=True)
+
+
+def _on_refresh_done(chat_id: int, task: asyncio.Task[dict[int, AdminEntry]]) -> None:
+    if (entry := _refreshes.get(chat_id)) is not None and entry[0] is task:
+        del _refreshes[chat_id]
+    if not task.cancelled():
+        # Mark the exception as retrieved; every waiter already receives it through the shield.
+        task.exception()
+
+
+async def _refresh_once(chat: ChatModel, *, force: bool) -> dict[int, AdminEntry]:
+    lock = aredis.lock(
+        f"{_REFRESH_LOCK_PREFIX}:{chat.chat_id}",
+        timeout=_REFRESH_LOCK_TIMEOUT_SECONDS,
+        blocking_timeout=_REFRESH_LOCK_TIMEOUT_SECONDS,
     )
+    try:
+        acquired = await lock.acquire()
+    except RedisError as error:
+        await logger.awarning(
+            "refresh_chat_members: Redis lock unavailable, refreshing without it",
+            chat_id=chat.chat_id,
+            error=str(error),
+        )
+        return await update_chat_members(chat)
+
+    if not acquired:
+        await logger.awarning("refresh_chat_members: timed out waiting for another refresh", chat_id=chat.chat_id)
+        return await update_chat_members(chat)
+
+    try:
+        if not force and (admins := await _get_fresh_stored_admins(chat)) is not None:
+            await logger.adebug("refresh_chat_members: refreshed by another instance", chat_id=chat.chat_id)
+            return admins
+        return await update_chat_members(chat)
+    finally:
+        try:
+            await lock.release()
+        except (LockError, RedisError) as error:
+            await logger.adebug("refresh_chat_members: lock release failed", chat_id=chat.chat_id, error=str(error))
+
+
+async def _get_fresh_stored_admins(chat: ChatModel) -> dict[int, AdminEntry] | None:
+    cache_age = (await get_chat_settings(chat.chat_id)).admin_cache_age()
+    if cache_age is None or cache_age > CACHE_ADMIN_TTL_SECONDS:
+        return None
+
+    if (admins := await admin_index.get(chat.chat_id)) is not None:
+        return admins
+
+    admins_data, updated_at = await ChatAdminRepository.get_admins_by_user_chat_id(chat)
+    if updated_at is None:
+        return None
+    return admin_index.put(chat.chat_id, admins_data, updated_at)
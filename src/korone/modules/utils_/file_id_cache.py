@@ -9,7 +9,7 @@ from korone.constants import CACHE_FILE_ID_TTL_SECONDS
 from korone.logger import get_logger
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Iterable, Mapping
 
 _CACHE_PREFIX = "telegram:file-id"
 logger = get_logger(__name__)
@@ -20,13 +20,7 @@ def make_file_id_cache_key(namespace: str, identifier: str) -> str:
     return f"{_CACHE_PREFIX}:{namespace}:{digest}"
 
 
-async def get_cached_file_payload(cache_key: str) -> dict[str, Any] | None:
-    try:
-        raw = await aredis.get(cache_key)
-    except (RedisError, RuntimeError) as exc:
-        await logger.awarning("[FileIdCache] Could not read cache payload", cache_key=cache_key, error=str(exc))
-        return None
-
+def _decode_payload(raw: bytes | str | None) -> dict[str, Any] | None:
     if not raw:
         return None
 
@@ -41,6 +35,34 @@ async def get_cached_file_payload(cache_key: str) -> dict[str, Any] | None:
     return payload
 
 
+async def get_cached_file_payload(cache_key: str) -> dict[str, Any] | None:
+    try:
+        raw = await aredis.get(cache_key)
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[FileIdCache] Could not read cache payload", cache_key=cache_key, error=str(exc))
+        return None
+
+    return _decode_payload(raw)
+
+
+async def get_cached_file_payloads(cache_keys: Iterable[str]) -> dict[str, dict[str, Any]]:
+    cache_keys = list(dict.fromkeys(cache_keys))
+    if not cache_keys:
+        return {}
+
+    try:
+        raw_values = await aredis.mget(cache_keys)
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[FileIdCache] Could not read cache payloads", cache_keys=cache_keys, error=str(exc))
+        return {}
+
+    return {
+        cache_key: payload
+        for cache_key, raw in zip(cache_keys, raw_values, strict=True)
+        if (payload := _decode_payload(raw)) is not None
+    }
+
+
 async def set_cached_file_payload(
     cache_key: str, payload: Mapping[str, Any], *, ttl: int = CACHE_FILE_ID_TTL_SECONDS
 ) -> None:
@@ -55,3 +77,14 @@ async def delete_cached_file_payload(cache_key: str) -> None:
         await aredis.delete(cache_key)
     except (RedisError, RuntimeError) as exc:
         await logger.awarning("[FileIdCache] Could not delete cache payload", cache_key=cache_key, error=str(exc))
+
+
+async def delete_cached_file_payloads(cache_keys: Iterable[str]) -> None:
+    cache_keys = list(cache_keys)
+    if not cache_keys:
+        return
+
+    try:
+        await aredis.delete(*cache_keys)
+    except (RedisError, RuntimeError) as exc:
+        await logger.awarning("[FileIdCache] Could not delete cache payloads", cache_keys=cache_keys, error=str(exc))
@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from typing import Final, Literal
+
+# Enough for JPEG APP segments (EXIF thumbnails included) that may precede the SOF marker.
+PROBE_HEADER_BYTES: Final[int] = 256 * 1024
+
+_PNG_SIGNATURE: Final[bytes] = b"\x89PNG\r\n\x1a\n"
+_GIF_SIGNATURES: Final[tuple[bytes, ...]] = (b"GIF87a", b"GIF89a")
+# SOF0-SOF15 carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) share the range but do not.
+_JPEG_SOF_MARKERS: Final[frozenset[int]] = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_SOS_MARKER: Final[int] = 0xDA
+_EXIF_ORIENTATION_TAG: Final[int] = 0x0112
+_WEBP_ANIMATION_FLAG: Final[int] = 0x02
+# EXIF orientations that rotate the image by 90 degrees, swapping width and height.
+TRANSPOSED_EXIF_ORIENTATIONS: Final[frozenset[int]] = frozenset({5, 6, 7, 8})
+
+
+@dataclass(frozen=True, slots=True)
+class ImageProbe:
+    format: str
+    width: int
+    height: int
+    orientation: int = 1
+    animated: bool = False
+
+    @property
+    def oriented_size(self) -> tuple[int, int]:
+        if self.orientation in TRANSPOSED_EXIF_ORIENTATIONS:
+            return self.height, self.width
+        return self.width, self.height
+
+
+def probe_image(payload: bytes) -> ImageProbe | None:
+    """Read format, size and EXIF orientation from the image header without decoding pixels.
+
+    Supports JPEG, PNG, GIF and WebP; returns None for anything else or for a truncated header.
+    """
+    try:
+        if payload.startswith(b"\xff\xd8"):
+            return _probe_jpeg(payload)
+        if payload.startswith(_PNG_SIGNATURE) and payload[12:16] == b"IHDR" and len(payload) >= 24:
+            return _probe_png(payload)
+        if payload[:6] in _GIF_SIGNATURES and len(payload) >= 10:
+            return ImageProbe("gif", int.from_bytes(payload[6:8], "little"), int.from_bytes(payload[8:10], "little"))
+        if payload[:4] == b"RIFF" and payload[8:12] == b"WEBP":
+            return _probe_webp(payload)
+    except IndexError:
+        return None
+    return None
+
+
+def _probe_jpeg(payload: bytes) -> ImageProbe | None:
+    orientation = 1
+    offset = 2
+    while offset + 4 <= len(payload):
+        if payload[offset] != 0xFF:
+            return None
+        marker = payload[offset + 1]
+        if marker == 0xFF:
+            # Fill bytes may pad markers.
+            offset += 1
+            continue
+
+        length = int.from_bytes(payload[offset + 2 : offset + 4], "big")
+        segment = payload[offset + 4 : offset + 2 + length]
+        if marker == 0xE1 and segment.startswith(b"Exif\x00\x00"):
+            orientation = _exif_orientation(segment[6:]) or orientation
+        elif marker in _JPEG_SOF_MARKERS and len(segment) >= 5:
+            height = int.from_bytes(segment[1:3], "big")
+            width = int.from_bytes(segment[3:5], "big")
+            return ImageProbe("jpeg", width, height, orientation)
+        elif marker == _JPEG_SOS_MARKER:
+            return None
+
+        offset += 2 + length
+    return None
+
+
+def _probe_png(payload: bytes) -> ImageProbe:
+    width = int.from_bytes(payload[16:20], "big")
+    height = int.from_bytes(payload[20:24], "big")
+    return ImageProbe("png", width, height, animated=_png_is_animated(payload))
+
+
+def _png_is_animated(payload: bytes) -> bool:
+    # APNG declares its animation in an acTL chunk, which must come before the first IDAT.
+    offset = len(_PNG_SIGNATURE)
+    while offset + 8 <= len(payload):
+        chunk_type = payload[offset + 4 : offset + 8]
+        if chunk_type == b"acTL":
+            return True
+        if chunk_type == b"IDAT":
+            return False
+        # Length, type and CRC surround the chunk data.
+        offset += 12 + int.from_bytes(payload[offset : offset + 4], "big")
+    return False
+
+
+def _probe_webp(payload: bytes) -> ImageProbe | None:
+    chunk = payload[12:16]
+    if chunk == b"VP8 " and payload[23:26] == b"\x9d\x01\x2a":
+        width = int.from_bytes(payload[26:28], "little") & 0x3FFF
+        height = int.from_bytes(payload[28:30], "little") & 0x3FFF
+        return ImageProbe("webp", width, height)
+
+    if chunk == b"VP8L" and payload[20] == 0x2F:
+        bits = int.from_bytes(payload[21:25], "little")
+        return ImageProbe("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+
+    if chunk == b"VP8X":
+        width = int.from_bytes(payload[24:27], "little") + 1
+        height = int.from_bytes(payload[27:30], "little") + 1
+        animated = bool(payload[20] & _WEBP_ANIMATION_FLAG)
+        return ImageProbe("webp", width, height, _webp_orientation(payload) or 1, animated=animated)
+
+    return None
+
+
+def _webp_orientation(payload: bytes) -> int | None:
+    offset = 12
+    while offset + 8 <= len(payload):
+        fourcc = payload[offset : offset + 4]
+        size = int.from_bytes(payload[offset + 4 : offset + 8], "little")
+        if fourcc == b"EXIF":
+            data = payload[offset + 8 : offset + 8 + size]
+            return _exif_orientation(data.removeprefix(b"Exif\x00\x00"))
+        # Chunks are padded to an even size.
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def _exif_orientation(tiff: bytes) -> int | None:
+    order: Literal["little", "big"]
+    match tiff[:4]:
+        case b"II*\x00":
+            order = "little"
+        case b"MM\x00*":
+            order = "big"
+        case _:
+            return None
+
+    ifd_offset = int.from_bytes(tiff[4:8], order)
+    entry_count = int.from_bytes(tiff[ifd_offset : ifd_offset + 2], order)
+    for index in range(entry_count):
+        entry = ifd_offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            return None
+        if int.from_bytes(tiff[entry : entry + 2], order) == _EXIF_ORIENTATION_TAG:
+            orientation = int.from_bytes(tiff[entry + 8 : entry + 10], order)
+            return orientation if 1 <= orientation <= 8 else None
+    return None
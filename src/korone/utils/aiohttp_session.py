@@ -1,5 +1,7 @@
 from aiohttp import ClientSession, TCPConnector
 
+from .host_limiter import HostLimiter
+
 
 class HTTPClient:
     _session: ClientSession | None = None
@@ -18,7 +20,7 @@ class HTTPClient:
                     enable_cleanup_closed=True,
                     force_close=False,
                 )
-            cls._session = ClientSession(connector=cls._connector)
+            cls._session = ClientSession(connector=cls._connector, middlewares=(HostLimiter.middleware,))
         return cls._session
 
     @classmethod
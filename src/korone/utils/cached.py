@@ -3,15 +3,20 @@ import functools
 import math
 import random
 import time
+from collections import Counter, OrderedDict
 from typing import TYPE_CHECKING, ParamSpec, TypeVar, cast
+from uuid import uuid4
 
 import orjson
+from redis.exceptions import RedisError, WatchError
 
 from korone import aredis
 from korone.logger import get_logger
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Callable
+    from collections.abc import Awaitable, Callable, Iterable, Mapping
+
+    from redis.asyncio.client import Pipeline
 
 type JsonValue = str | int | float | bool | list[JsonValue] | dict[str, JsonValue] | None
 
@@ -20,18 +25,77 @@ T = TypeVar("T", bound=JsonValue)
 
 _NOT_SET_MARKER = "__korone_not_set__"
 _LOCK_CLEANUP_INTERVAL = 300
+_LOCAL_CACHE_MAXSIZE = 256
+_INVALIDATION_CHANNEL = "korone:cache:invalidate"
+_INVALIDATION_RETRY_DELAY = 5.0
+_INSTANCE_ID = uuid4().hex
 
 logger = get_logger(__name__)
 _background_tasks: set[asyncio.Task[None]] = set()
+_stats: Counter[str] = Counter()
 
 
-async def set_value(key: str, value: JsonValue, ttl: float | None) -> None:
+def _serialize(value: JsonValue, ttl: float | None) -> bytes:
     expiry_timestamp = time.time() + ttl if ttl else None
     wrapped = {"v": value, "s": _NOT_SET_MARKER if value is None else None, "exp": expiry_timestamp}
-    serialized = orjson.dumps(wrapped)
-    await aredis.set(key, serialized)
-    if ttl:
-        await aredis.expire(key, int(ttl))
+    return orjson.dumps(wrapped)
+
+
+async def set_value(key: str, value: JsonValue, ttl: float | None) -> None:
+    await set_many({key: value}, ttl)
+
+
+async def set_many(items: Mapping[str, JsonValue], ttl: float | None) -> None:
+    if not items:
+        return
+
+    # SET with PX writes value and expiry atomically; the pipeline sends every write and
+    # invalidation in a single round-trip.
+    expire_ms = max(int(ttl * 1000), 1) if ttl else None
+    async with aredis.pipeline(transaction=False) as pipe:
+        for key, value in items.items():
+            pipe.set(key, _serialize(value, ttl), px=expire_ms)
+        _local_cache.invalidate_in(pipe, items.keys())
+        await pipe.execute()
+
+
+async def set_value_if_version(
+    key: str, value: JsonValue, ttl: float | None, *, version_key: str, version: bytes | str | None
+) -> bool:
+    """Write `key` only while `version_key` still holds `version`, returning whether it was written.
+
+    Writers bump `version_key` before dropping `key`, so a value computed from data read before the bump can
+    never be stored after it.
+    """
+    expire_ms = max(int(ttl * 1000), 1) if ttl else None
+    async with aredis.pipeline(transaction=True) as pipe:
+        await pipe.watch(version_key)
+        if await pipe.get(version_key) != version:
+            return False
+
+        pipe.multi()
+        pipe.set(key, _serialize(value, ttl), px=expire_ms)
+        _local_cache.invalidate_in(pipe, (key,))
+        try:
+            await pipe.execute()
+        except WatchError:
+            return False
+    return True
+
+
+async def get_many(keys: Iterable[str]) -> dict[str, tuple[JsonValue, float | None]]:
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    found: dict[str, tuple[JsonValue, float | None]] = {}
+    for key, cached_data in zip(keys, await aredis.mget(keys), strict=True):
+        if cached_data is None:
+            continue
+        value, expiry, is_valid = _deserialize(cached_data)
+        if is_valid:
+            found[key] = (value, expiry)
+    return found
 
 
 def _deserialize(data: bytes | str) -> tuple[JsonValue | None, float | None, bool]:
@@ -71,6 +135,146 @@ def _track_background_task(task: asyncio.Task[None], *, message: str, **context:
     task.add_done_callback(_on_done)
 
 
+class _LocalEntry:
+    __slots__ = ("deadline", "expiry", "value")
+
+    def __init__(self, value: JsonValue, expiry: float | None, deadline: float) -> None:
+        self.value = value
+        self.expiry = expiry
+        self.deadline = deadline
+
+
+class _LocalCache:
+    """Per-process LRU in front of Redis, kept coherent across instances through Redis pub/sub."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.enabled = False
+        self._entries: OrderedDict[str, _LocalEntry] = OrderedDict()
+        self._listener_task: asyncio.Task[None] | None = None
+        # Entries are only kept while the invalidation channel is subscribed; otherwise they could miss updates.
+        self._subscribed = False
+
+    def get(self, key: str) -> _LocalEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        now = time.time()
+        if now >= entry.deadline or (entry.expiry is not None and now >= entry.expiry):
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, value: JsonValue, expiry: float | None, local_ttl: float) -> None:
+        if not self._subscribed:
+            return
+        self._entries[key] = _LocalEntry(value, expiry, time.time() + local_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def invalidate_in(self, pipe: Pipeline, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.discard(key)
+            if self.enabled:
+                pipe.publish(_INVALIDATION_CHANNEL, orjson.dumps({"k": key, "o": _INSTANCE_ID}))
+
+    async def invalidate(self, key: str | None = None) -> None:
+        if key is None:
+            self.clear()
+        else:
+            self.discard(key)
+
+        if not self.enabled:
+            return
+
+        message = orjson.dumps({"k": key, "o": _INSTANCE_ID})
+        try:
+            await aredis.publish(_INVALIDATION_CHANNEL, message)
+        except RedisError as error:
+            await logger.awarning("Cached: could not publish invalidation", key=key, error=str(error))
+
+    def start(self) -> None:
+        if self._listener_task is not None and not self._listener_task.done():
+            return
+        self._listener_task = asyncio.get_running_loop().create_task(
+            self._listen(), name="cached-invalidation-listener"
+        )
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with aredis.pubsub() as pubsub:
+                    try:
+                        await pubsub.subscribe(_INVALIDATION_CHANNEL)
+                        async for message in pubsub.listen():
+                            match message.get("type"):
+                                case "subscribe":
+                                    # Anything cached before this point may have missed invalidations.
+                                    self.clear()
+                                    self._subscribed = True
+                                case "message":
+                                    self._handle_invalidation(message.get("data"))
+                    finally:
+                        self._subscribed = False
+                        self.clear()
+            except RedisError as error:
+                await logger.awarning("Cached: invalidation listener disconnected", error=str(error))
+                await asyncio.sleep(_INVALIDATION_RETRY_DELAY)
+
+    def _handle_invalidation(self, data: object) -> None:
+        if not isinstance(data, bytes | str):
+            return
+        try:
+            payload = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return
+        if not isinstance(payload, dict) or payload.get("o") == _INSTANCE_ID:
+            return
+
+        match payload.get("k"):
+            case str() as key:
+                self.discard(key)
+            case None:
+                self.clear()
+
+    async def close(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+            self._listener_task = None
+        self.clear()
+
+
+_local_cache = _LocalCache(_LOCAL_CACHE_MAXSIZE)
+
+
+def cache_stats() -> dict[str, int]:
+    return {name: _stats[name] for name in ("local_hits", "local_misses", "redis_hits", "redis_misses")}
+
+
+async def clear_local_cache() -> None:
+    await _local_cache.invalidate()
+
+
+def start_local_cache() -> None:
+    """Subscribe to cross-instance invalidations; the in-process cache stays empty until the subscription is up."""
+    _local_cache.start()
+
+
+async def close_local_cache() -> None:
+    await _local_cache.close()
+
+
 class _LockEntry:
     __slots__ = ("lock", "waiters")
 
@@ -131,13 +335,22 @@ class Cached[**P, T: JsonValue]:
         no_self: bool = False,
         stampede_protection: bool = True,
         early_recompute_beta: float = 1.0,
+        local_ttl: float | None = None,
+        version_key: Callable[P, str] | None = None,
     ) -> None:
+        """`version_key` names a Redis counter that `reset_cache` bumps; a value computed while it changed is
+        returned but not stored, so a slow reader cannot write back data an invalidation already dropped.
+        """
         self.ttl = ttl
         self.key = key
         self.no_self = no_self
         self.stampede_protection = stampede_protection
         self.early_recompute_beta = early_recompute_beta
+        self.local_ttl = local_ttl
+        self.version_key = version_key
         self.func: Callable[P, Awaitable[T]] | None = None
+        if local_ttl:
+            _local_cache.enabled = True
 
     def __call__(self, func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
         self.func = func
@@ -156,24 +369,39 @@ class Cached[**P, T: JsonValue]:
 
         key = self._build_key(*args, **kwargs)
 
+        if self.local_ttl:
+            if (entry := _local_cache.get(key)) is not None:
+                _stats["local_hits"] += 1
+                self._maybe_recompute(key, entry.expiry, *args, **kwargs)
+                return cast("T", entry.value)
+            _stats["local_misses"] += 1
+
         cached_data = await aredis.get(key)
         if cached_data is not None:
             value, expiry, is_valid = _deserialize(cached_data)
             if is_valid:
-                if self.early_recompute_beta > 0 and _should_early_recompute(expiry, self.early_recompute_beta):
-                    background_task = asyncio.create_task(self._recompute_and_store(key, *args, **kwargs))
-                    _track_background_task(background_task, message="Cached: PER background refresh failed", key=key)
+                _stats["redis_hits"] += 1
+                if self.local_ttl:
+                    _local_cache.put(key, value, expiry, self.local_ttl)
+                self._maybe_recompute(key, expiry, *args, **kwargs)
                 return cast("T", value)
+        _stats["redis_misses"] += 1
 
         if self.stampede_protection:
             return await self._get_or_set_with_lock(key, *args, **kwargs)
 
+        version = await self._read_version(*args, **kwargs)
         result = await self.func(*args, **kwargs)
-        background_task = asyncio.create_task(set_value(key, result, ttl=self.ttl))
+        background_task = asyncio.create_task(self._store(key, result, version, *args, **kwargs))
         _track_background_task(background_task, message="Cached: background write failed", key=key)
         await logger.adebug("Cached: writing new data", key=key)
         return result
 
+    def _maybe_recompute(self, key: str, expiry: float | None, *args: P.args, **kwargs: P.kwargs) -> None:
+        if self.early_recompute_beta > 0 and _should_early_recompute(expiry, self.early_recompute_beta):
+            background_task = asyncio.create_task(self._recompute_and_store(key, *args, **kwargs))
+            _track_background_task(background_task, message="Cached: PER background refresh failed", key=key)
+
     async def _get_or_set_with_lock(self, key: str, *args: P.args, **kwargs: P.kwargs) -> T:
         if self.func is None:
             msg = "Cached decorator not properly initialized"
@@ -188,8 +416,9 @@ class Cached[**P, T: JsonValue]:
                     if is_valid:
                         return cast("T", value)
 
+                version = await self._read_version(*args, **kwargs)
                 result = await self.func(*args, **kwargs)
-                await set_value(key, result, ttl=self.ttl)
+                await self._store(key, result, version, *args, **kwargs)
                 await logger.adebug("Cached: writing new data (lock holder)", key=key)
                 return result
         finally:
@@ -199,16 +428,34 @@ class Cached[**P, T: JsonValue]:
         if self.func is None:
             return
 
+        version = await self._read_version(*args, **kwargs)
         result = await self.func(*args, **kwargs)
-        await set_value(key, result, ttl=self.ttl)
+        await self._store(key, result, version, *args, **kwargs)
         await logger.adebug("Cached: PER background refresh complete", key=key)
 
+    async def _read_version(self, *args: P.args, **kwargs: P.kwargs) -> bytes | str | None:
+        if self.version_key is None:
+            return None
+        return await aredis.get(self.version_key(*args, **kwargs))
+
+    async def _store(self, key: str, result: T, version: bytes | str | None, *args: P.args, **kwargs: P.kwargs) -> None:
+        if self.version_key is None:
+            await set_value(key, result, ttl=self.ttl)
+            return
+
+        version_key = self.version_key(*args, **kwargs)
+        if not await set_value_if_version(key, result, self.ttl, version_key=version_key, version=version):
+            await logger.adebug("Cached: skipped write of data invalidated while computing", key=key)
+
     def _build_key(self, *args: P.args, **kwargs: P.kwargs) -> str:
+        return self.cache_key(*args, **kwargs)
+
+    def cache_key(self, *args: object, **kwargs: object) -> str:
         if self.func is None:
             msg = "Cached decorator not properly initialized"
             raise RuntimeError(msg)
 
-        ordered_kwargs = sorted(dict(kwargs).items())
+        ordered_kwargs = sorted(kwargs.items())
 
         func_module = getattr(self.func, "__module__", "") or ""
         func_name = getattr(self.func, "__name__", "unknown")
@@ -221,21 +468,58 @@ class Cached[**P, T: JsonValue]:
 
         return new_key
 
-    async def reset_cache(self, *args: object, new_value: T | None = None, **kwargs: object) -> int | None:
-        if self.func is None:
-            msg = "Cached decorator not properly initialized"
-            raise RuntimeError(msg)
+    async def get_many(self, keys: Iterable[str]) -> dict[str, T]:
+        """Look up several keys built by `cache_key` at once; misses are left out of the result."""
+        found: dict[str, T] = {}
+        remote_keys: list[str] = []
+        for key in dict.fromkeys(keys):
+            if self.local_ttl and (entry := _local_cache.get(key)) is not None:
+                _stats["local_hits"] += 1
+                found[key] = cast("T", entry.value)
+                continue
+            if self.local_ttl:
+                _stats["local_misses"] += 1
+            remote_keys.append(key)
+
+        remote = await get_many(remote_keys)
+        _stats["redis_hits"] += len(remote)
+        _stats["redis_misses"] += len(remote_keys) - len(remote)
+        for key, (value, expiry) in remote.items():
+            if self.local_ttl:
+                _local_cache.put(key, value, expiry, self.local_ttl)
+            found[key] = cast("T", value)
+        return found
+
+    async def set_many(self, items: Mapping[str, T]) -> None:
+        await set_many(items, ttl=self.ttl)
 
-        ordered_kwargs = sorted(kwargs.items())
-        func_module = getattr(self.func, "__module__", "") or ""
-        func_name = getattr(self.func, "__name__", "unknown")
-        base_key = self.key or func_module + func_name
-        args_key = str(args[1:] if self.no_self else args)
-        key = base_key + args_key
-        if ordered_kwargs:
-            key += str(ordered_kwargs)
+    async def reset_cache(self, *args: object, new_value: T | None = None, **kwargs: object) -> int | None:
+        key = self.cache_key(*args, **kwargs)
+        # Bumped before the key is dropped, so readers that loaded the old data cannot store it afterwards.
+        version_key = cast("Callable[..., str]", self.version_key)(*args, **kwargs) if self.version_key else None
 
         if new_value is not None:
+            if version_key is not None:
+                await self._bump_version(version_key)
             await set_value(key, new_value, ttl=self.ttl)
             return None
-        return await aredis.delete(key)
+
+        async with aredis.pipeline(transaction=False) as pipe:
+            queued = self._bump_version_in(pipe, version_key) if version_key is not None else 0
+            pipe.delete(key)
+            _local_cache.invalidate_in(pipe, (key,))
+            results = await pipe.execute()
+        return results[queued]
+
+    def _bump_version_in(self, pipe: Pipeline, version_key: str) -> int:
+        pipe.incr(version_key)
+        if not self.ttl:
+            return 1
+        # The counter must outlive any value stored under the old version.
+        pipe.expire(version_key, max(math.ceil(self.ttl * 2), 1))
+        return 2
+
+    async def _bump_version(self, version_key: str) -> None:
+        async with aredis.pipeline(transaction=False) as pipe:
+            self._bump_version_in(pipe, version_key)
+            await pipe.execute()
@@ -0,0 +1,262 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TYPE_CHECKING, ClassVar, Final
+from urllib.parse import urlparse
+
+import aiohttp
+
+from korone.config import CONFIG
+from korone.logger import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from aiohttp import ClientHandlerType, ClientRequest, ClientResponse
+
+logger = get_logger(__name__)
+
+_MIN_CONCURRENCY: Final[float] = 1.0
+_DECREASE_FACTOR: Final[float] = 0.5
+_EWMA_ALPHA: Final[float] = 0.2
+# A response slower than this multiple of the smoothed latency counts as congestion.
+_LATENCY_TOLERANCE: Final[float] = 3.0
+# aiohttp reports its total timeout by cancelling the request, so a request cancelled after this long is
+# taken as timed out.
+_HUNG_REQUEST_SECONDS: Final[float] = 10.0
+# The breaker only judges hosts with this many results since their circuit last closed.
+_MIN_SAMPLES: Final[int] = 5
+_OPEN_ERROR_RATE: Final[float] = 0.5
+_MAX_OPEN_SECONDS: Final[float] = 300.0
+_MAX_HOSTS: Final[int] = 512
+
+
+class HostCircuitOpenError(aiohttp.ClientConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+@dataclass(frozen=True, slots=True)
+class HostStats:
+    host: str
+    circuit: CircuitState
+    limit: int
+    in_flight: int
+    latency_ms: float
+    success_rate: float
+    requests: int
+    failures: int
+    rejected: int
+
+
+@dataclass(slots=True)
+class HostState:
+    """AIMD concurrency limit and circuit breaker of a single host.
+
+    Every response within `_LATENCY_TOLERANCE` of the smoothed latency raises the limit by 1/limit, so it
+    grows by about one per round trip; a failure or a slow response halves it, at most once per round trip.
+    The circuit opens once the smoothed error rate reaches `_OPEN_ERROR_RATE`, rejects requests for
+    `http_circuit_open_seconds` (doubling on each failed probe) and then lets a single probe through.
+    """
+
+    host: str
+    limit: float = field(default_factory=lambda: float(CONFIG.http_host_max_concurrency))
+    in_flight: int = 0
+    latency: float = 0.0
+    error_rate: float = 0.0
+    samples: int = 0
+    requests: int = 0
+    failures: int = 0
+    rejected: int = 0
+    circuit: CircuitState = CircuitState.CLOSED
+    opened_at: float = 0.0
+    open_seconds: float = field(default_factory=lambda: float(CONFIG.http_circuit_open_seconds))
+    probing: bool = False
+    decreased_at: float = 0.0
+    _waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+
+    @property
+    def available(self) -> bool:
+        match self.circuit:
+            case CircuitState.OPEN:
+                return time.monotonic() - self.opened_at >= self.open_seconds
+            case CircuitState.HALF_OPEN:
+                return not self.probing
+            case _:
+                return True
+
+    @property
+    def idle(self) -> bool:
+        return not self.in_flight and not self._waiters and self.circuit == CircuitState.CLOSED
+
+    async def acquire(self) -> bool:
+        """Wait for a free slot and take it, returning whether the request is the half-open probe."""
+        while True:
+            if not self.available:
+                self.rejected += 1
+                msg = f"Circuit open for {self.host}"
+                raise HostCircuitOpenError(msg)
+
+            if self.in_flight < int(max(_MIN_CONCURRENCY, self.limit)):
+                self.in_flight += 1
+                if self.circuit == CircuitState.CLOSED:
+                    return False
+                self.circuit = CircuitState.HALF_OPEN
+                self.probing = True
+                return True
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if not waiter.done():
+                    self._waiters.remove(waiter)
+
+    async def release(self, *, probe: bool, failed: bool | None, latency: float) -> None:
+        """Free the slot and feed the result in; `failed` is None when the outcome is unknown."""
+        self.in_flight -= 1
+        previous = self.circuit
+        if failed is not None:
+            self._record(failed=failed, latency=latency, probe=probe)
+        elif probe:
+            self.probing = False
+        self._wake()
+
+        if self.circuit != previous:
+            await logger.ainfo(
+                "[HTTP] Host circuit changed",
+                host=self.host,
+                circuit=self.circuit.value,
+                error_rate=round(self.error_rate, 2),
+                open_seconds=self.open_seconds,
+            )
+
+    def stats(self) -> HostStats:
+        return HostStats(
+            host=self.host,
+            circuit=self.circuit,
+            limit=int(self.limit),
+            in_flight=self.in_flight,
+            latency_ms=self.latency * 1000,
+            success_rate=1.0 - self.error_rate,
+            requests=self.requests,
+            failures=self.failures,
+            rejected=self.rejected,
+        )
+
+    def _record(self, *, failed: bool, latency: float, probe: bool) -> None:
+        now = time.monotonic()
+        self.requests += 1
+        self.failures += failed
+        self.samples += 1
+        self.error_rate += _EWMA_ALPHA * (failed - self.error_rate)
+
+        congested = failed or (self.latency > 0 and latency > self.latency * _LATENCY_TOLERANCE)
+        if not failed:
+            self.latency = latency if not self.latency else self.latency + _EWMA_ALPHA * (latency - self.latency)
+
+        max_concurrency = float(CONFIG.http_host_max_concurrency)
+        if not congested:
+            self.limit = min(max_concurrency, self.limit + 1 / self.limit)
+        elif now - self.decreased_at >= self.latency:
+            self.limit = max(_MIN_CONCURRENCY, self.limit * _DECREASE_FACTOR)
+            self.decreased_at = now
+
+        if probe:
+            self.probing = False
+            if failed:
+                self._open(now, min(self.open_seconds * 2, _MAX_OPEN_SECONDS))
+            else:
+                self.circuit = CircuitState.CLOSED
+                self.open_seconds = float(CONFIG.http_circuit_open_seconds)
+                self.error_rate = 0.0
+                self.samples = 0
+        elif (
+            self.circuit == CircuitState.CLOSED and self.samples >= _MIN_SAMPLES and self.error_rate >= _OPEN_ERROR_RATE
+        ):
+            self._open(now, self.open_seconds)
+
+    def _open(self, now: float, open_seconds: float) -> None:
+        self.circuit = CircuitState.OPEN
+        self.opened_at = now
+        self.open_seconds = open_seconds
+        self.limit = _MIN_CONCURRENCY
+
+    def _wake(self) -> None:
+        # Waiters check the limit and the circuit again, so those that cannot go yet simply wait again.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class HostLimiter:
+    """Per-host adaptive concurrency limits and circuit breakers for requests made through `HTTPClient`.
+
+    `middleware` is installed on the shared session, so every request, redirects included, takes a slot of
+    its host until the response headers arrive. Requests to a host whose circuit is open fail fast with
+    `HostCircuitOpenError`, an `aiohttp.ClientConnectionError`, instead of waiting out their timeout.
+    """
+
+    _hosts: ClassVar[OrderedDict[str, HostState]] = OrderedDict()
+
+    @classmethod
+    def state(cls, host: str) -> HostState:
+        host = host.lower()
+        if state := cls._hosts.get(host):
+            cls._hosts.move_to_end(host)
+            return state
+
+        state = cls._hosts[host] = HostState(host)
+        if len(cls._hosts) > _MAX_HOSTS:
+            stale = next((name for name, entry in cls._hosts.items() if entry.idle), None)
+            if stale is not None:
+                del cls._hosts[stale]
+        return state
+
+    @classmethod
+    def is_available(cls, url: str) -> bool:
+        state = cls._hosts.get((urlparse(url).hostname or "").lower())
+        return state is None or state.available
+
+    @classmethod
+    def rank(cls, urls: Iterable[str]) -> list[str]:
+        """Order `urls` by the recent success rate of their hosts, leaving out hosts whose circuit is open."""
+
+        def error_rate(url: str) -> float:
+            state = cls._hosts.get((urlparse(url).hostname or "").lower())
+            return state.error_rate if state else 0.0
+
+        return sorted((url for url in urls if cls.is_available(url)), key=error_rate)
+
+    @classmethod
+    def stats(cls) -> list[HostStats]:
+        return [state.stats() for state in cls._hosts.values()]
+
+    @classmethod
+    async def middleware(cls, request: ClientRequest, handler: ClientHandlerType) -> ClientResponse:
+        state = cls.state(request.url.host or "")
+        probe = await state.acquire()
+        started_at = time.monotonic()
+        failed: bool | None = None
+        try:
+            response = await handler(request)
+        except TimeoutError, aiohttp.ClientConnectionError:
+            failed = True
+            raise
+        except asyncio.CancelledError:
+            failed = True if time.monotonic() - started_at >= _HUNG_REQUEST_SECONDS else None
+            raise
+        else:
+            failed = response.status == 429 or response.status >= 500
+            return response
+        finally:
+            await state.release(probe=probe, failed=failed, latency=time.monotonic() - started_at)
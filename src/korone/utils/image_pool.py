@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from korone.config import CONFIG
+from korone.logger import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = get_logger(__name__)
+
+
+@dataclass(slots=True)
+class ImagePoolStats:
+    workers: int = 0
+    pending: int = 0
+    max_pending: int = 0
+    completed: int = 0
+    failed: int = 0
+    timeouts: int = 0
+
+
+class ImagePool:
+    """Process pool for CPU-bound Pillow work, kept apart from the default thread pool.
+
+    Functions, arguments and results cross a process boundary, so they must be picklable: pass payloads as
+    bytes or paths rather than open images. A timed-out job keeps its worker busy until it finishes, but the
+    caller is released.
+    """
+
+    _executor: ProcessPoolExecutor | None = None
+    stats = ImagePoolStats()
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=CONFIG.image_pool_workers)
+            cls.stats.workers = CONFIG.image_pool_workers
+        return cls._executor
+
+    @classmethod
+    async def run[**P, R](cls, func: Callable[P, R], /, *args: P.args, **kwargs: P.kwargs) -> R:
+        executor = cls._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+
+        cls.stats.pending += 1
+        cls.stats.max_pending = max(cls.stats.max_pending, cls.stats.pending)
+        try:
+            async with asyncio.timeout(CONFIG.image_pool_job_timeout):
+                result = await future
+        except TimeoutError:
+            cls.stats.timeouts += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); the next job starts a fresh pool.
+            cls.stats.failed += 1
+            if cls._executor is executor:
+                cls._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            await logger.awarning("Image process pool broken", function=func.__name__)
+            raise
+        except Exception:
+            cls.stats.failed += 1
+            raise
+        finally:
+            cls.stats.pending -= 1
+
+        cls.stats.completed += 1
+        return result
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._executor is None:
+            return
+
+        executor, cls._executor = cls._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        cls.stats.workers = 0
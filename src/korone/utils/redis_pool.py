@@ -0,0 +1,106 @@
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from korone.config import CONFIG
+
+if TYPE_CHECKING:
+    from redis.asyncio.connection import AbstractConnection
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    name: str
+    max_connections: int
+    in_use: int
+    idle: int
+    acquired: int
+    saturated: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking pool that records how often callers had to wait for a connection and for how long."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        db: int,
+        max_connections: int,
+        timeout: float,
+        health_check_interval: int,
+        socket_keepalive: bool,
+    ) -> None:
+        super().__init__(
+            max_connections=max_connections,
+            timeout=timeout,
+            host=CONFIG.redis_host,
+            port=CONFIG.redis_port,
+            db=db,
+            health_check_interval=health_check_interval,
+            socket_keepalive=socket_keepalive,
+        )
+        self.name = name
+        self._acquired = 0
+        self._saturated = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def get_connection(self) -> AbstractConnection:
+        saturated = not self.can_get_connection()
+        started = time.monotonic()
+        try:
+            connection = await super().get_connection()
+        except RedisConnectionError:
+            if saturated:
+                self._timeouts += 1
+            raise
+
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._saturated += saturated
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return connection
+
+    def stats(self) -> PoolStats:
+        in_use = len(list(self._get_in_use_connections()))
+        idle = len(list(self._get_free_connections()))
+        return PoolStats(
+            name=self.name,
+            max_connections=self.max_connections,
+            in_use=in_use,
+            idle=idle,
+            acquired=self._acquired,
+            saturated=self._saturated,
+            timeouts=self._timeouts,
+            wait_avg_ms=self._wait_total / self._acquired * 1000 if self._acquired else 0.0,
+            wait_max_ms=self._wait_max * 1000,
+        )
+
+
+_pools: list[InstrumentedConnectionPool] = []
+
+
+def create_redis_client(name: str, *, db: int, max_connections: int) -> Redis:
+    pool = InstrumentedConnectionPool(
+        name,
+        db=db,
+        max_connections=max_connections,
+        timeout=CONFIG.redis_pool_timeout,
+        health_check_interval=CONFIG.redis_health_check_interval,
+        socket_keepalive=CONFIG.redis_socket_keepalive,
+    )
+    _pools.append(pool)
+    return Redis.from_pool(pool)
+
+
+def redis_pool_stats() -> list[PoolStats]:
+    return [pool.stats() for pool in _pools]